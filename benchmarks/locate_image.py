@@ -0,0 +1,80 @@
+"""Micro-benchmark of locate_image template matching
+
+Pastes an icon-like template at a few unaligned positions of a synthetic
+desktop frame and reports the median time of the NumPy pyramid matcher, with
+a cold and a warm template cache, next to pyscreeze's pure Python matcher
+(the path of pyautogui.locateOnScreen without OpenCV). Needs Pillow and
+NumPy, no display.
+
+Usage:
+    uv run python benchmarks/locate_image.py
+    uv run python benchmarks/locate_image.py --width 3840 --height 2160 --no-pyscreeze
+"""
+import argparse
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.screenshot_encode import synthetic_desktop  # noqa: E402
+from src.computer.locate import TemplateCache, locate  # noqa: E402
+
+# Template positions as fractions of the frame, odd pixel offsets on purpose
+POSITIONS = [(0.1, 0.2), (0.61, 0.47), (0.33, 0.81)]
+
+
+def icon(size: int = 32) -> Image.Image:
+    """Draw a toolbar-icon-like template"""
+    image = Image.new("RGB", (size, size), (235, 235, 235))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((4, 4, size - 5, size - 5), outline=(20, 90, 200), width=3)
+    draw.line((10, size // 2, size - 10, size // 2), fill=(20, 90, 200), width=2)
+    draw.line((size // 2, 10, size // 2, size - 10), fill=(20, 90, 200), width=2)
+    return image
+
+
+def median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--size", type=int, default=32, help="template edge in pixels")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-pyscreeze", action="store_true", help="skip the slow pure Python baseline")
+    args = parser.parse_args()
+
+    image = synthetic_desktop(args.width, args.height)
+    template = icon(args.size)
+    for x, y in POSITIONS:
+        image.paste(template, (int(x * args.width) | 1, int(y * args.height) | 1))
+    buffer = BytesIO()
+    template.save(buffer, format="PNG")
+    data = buffer.getvalue()
+
+    cache = TemplateCache()
+    matches = locate(image, cache.get(data))
+    cold = median_ms(lambda: locate(image, TemplateCache().get(data)), args.repeat)
+    warm = median_ms(lambda: locate(image, cache.get(data)), args.repeat)
+    print(f"Synthetic desktop {args.width}x{args.height}, template {args.size}px, {len(matches)}/{len(POSITIONS)} found")
+    print(f"{'matcher':<24} {'median ms':>10}")
+    print(f"{'numpy, cold template':<24} {cold:>10.1f}")
+    print(f"{'numpy, cached template':<24} {warm:>10.1f}")
+    if not args.no_pyscreeze:
+        import pyscreeze
+        baseline = median_ms(lambda: list(pyscreeze._locateAll_pillow(template, image)), 1)
+        print(f"{'pyscreeze pure python':<24} {baseline:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
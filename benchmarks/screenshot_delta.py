@@ -0,0 +1,61 @@
+"""Micro-benchmark of delta screenshot tile hashing and payload size
+
+Hashes a synthetic desktop frame, changes a small area (a caret-sized and a
+dialog-sized box) and reports the median hashing time and the size of the
+changed tiles compared with a full PNG frame. Needs Pillow and NumPy, no display.
+
+Usage:
+    uv run python benchmarks/screenshot_delta.py
+    uv run python benchmarks/screenshot_delta.py --width 3840 --height 2160 --tile 32
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.screenshot_encode import synthetic_desktop  # noqa: E402
+from core.config import settings  # noqa: E402
+from src.computer.delta import DeltaTracker, tile_hashes  # noqa: E402
+from src.computer.imaging import encode_image  # noqa: E402
+
+# (label, box as fractions of the frame)
+CHANGES = [
+    ("caret", (0.3, 0.3, 0.001, 0.01)),
+    ("dialog", (0.35, 0.35, 0.3, 0.3)),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--tile", type=int, default=settings.screenshot_delta_tile_size)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    settings.screenshot_delta_tile_size = args.tile
+
+    image = synthetic_desktop(args.width, args.height)
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        tile_hashes(image, args.tile)
+        timings.append((time.perf_counter() - start) * 1000)
+    full_size = len(encode_image(image, "png"))
+    print(f"Synthetic desktop {args.width}x{args.height}, tile {args.tile}px, hash median {statistics.median(timings):.1f} ms")
+    print(f"Full png frame {full_size / 1024:.1f} KiB")
+    print(f"{'change':<8} {'tiles':>6} {'delta KiB':>10} {'of full':>8}")
+    for label, (x, y, w, h) in CHANGES:
+        tracker = DeltaTracker()
+        tracker.diff("bench", image)
+        changed = image.copy()
+        box = (int(x * args.width), int(y * args.height), int((x + w) * args.width) + 1, int((y + h) * args.height) + 1)
+        changed.paste((255, 255, 255), box)
+        boxes = tracker.diff("bench", changed)
+        size = sum(len(encode_image(changed.crop((l, t, l + bw, t + bh)), "png")) for l, t, bw, bh in boxes)
+        print(f"{label:<8} {len(boxes):>6} {size / 1024:>10.1f} {size / full_size:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
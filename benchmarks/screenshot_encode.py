@@ -0,0 +1,92 @@
+"""Micro-benchmark of screenshot encode time and size per format
+
+Encodes a synthetic desktop image (flat windows, text, gradients and a photo-like
+noisy area) with every supported format/setting and prints the median encode time
+and payload size. Only Pillow is needed, no display.
+
+Usage:
+    uv run python benchmarks/screenshot_encode.py
+    uv run python benchmarks/screenshot_encode.py --width 3840 --height 2160 --repeat 5
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.computer.imaging import encode_image  # noqa: E402
+
+# (label, format, quality, compress_level)
+CASES = [
+    ("png level 1", "png", None, 1),
+    ("png level 6", "png", None, 6),
+    ("png level 9", "png", None, 9),
+    ("jpeg q60", "jpeg", 60, None),
+    ("jpeg q80", "jpeg", 80, None),
+    ("jpeg q95", "jpeg", 95, None),
+    ("webp q60", "webp", 60, None),
+    ("webp q80", "webp", 80, None),
+]
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+
+
+def synthetic_desktop(width: int, height: int, seed: int = 0) -> Image.Image:
+    """Draw a desktop-like RGB image"""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height))
+    draw = ImageDraw.Draw(image)
+
+    # Wallpaper gradient
+    for y in range(height):
+        shade = int(40 + 80 * y / height)
+        draw.line([(0, y), (width, y)], fill=(20, shade, 120))
+
+    # Taskbar
+    draw.rectangle([0, height - 48, width, height], fill=(32, 32, 36))
+
+    # Windows with title bars and lines of text
+    for _ in range(6):
+        left = rng.randint(0, width * 2 // 3)
+        top = rng.randint(0, height * 2 // 3)
+        right = min(width - 1, left + rng.randint(width // 5, width // 2))
+        bottom = min(height - 49, top + rng.randint(height // 5, height // 2))
+        draw.rectangle([left, top, right, bottom], fill=(245, 245, 245), outline=(90, 90, 90))
+        draw.rectangle([left, top, right, top + 28], fill=(60, 90, 160))
+        for line_y in range(top + 40, bottom - 16, 18):
+            words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14)))
+            draw.text((left + 12, line_y), words, fill=(30, 30, 30))
+
+    # Photo-like area, the worst case for lossless encoders
+    photo_width, photo_height = width // 4, height // 4
+    noise = Image.effect_noise((photo_width, photo_height), 64).convert("RGB")
+    image.paste(noise, (width - photo_width - 40, 40))
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=2560)
+    parser.add_argument("--height", type=int, default=1440)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    image = synthetic_desktop(args.width, args.height)
+    raw_size = args.width * args.height * 3
+    print(f"Synthetic desktop {args.width}x{args.height}, raw RGB {raw_size / 1024 / 1024:.1f} MiB, {args.repeat} runs each")
+    print(f"{'case':<14} {'median ms':>10} {'size KiB':>10} {'ratio':>8}")
+    for label, image_format, quality, compress_level in CASES:
+        timings = []
+        data = b""
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            data = encode_image(image, image_format, quality, compress_level)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{label:<14} {statistics.median(timings):>10.1f} {len(data) / 1024:>10.1f} {raw_size / len(data):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
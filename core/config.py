@@ -1,3 +1,4 @@
+from typing import Any, Dict, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -28,9 +29,90 @@ class Settings(BaseSettings):
     
     # Computer control configuration
     drag_step: int = Field(default=30, description="Step size for mouse drag operations")
-    mouse_operate_interval: float = Field(default=0.1, description="Interval between mouse operations in seconds")
+    mouse_operate_interval: float = Field(default=0.1, description="Pause after pressing and before releasing the mouse in a drag, in seconds")
+    drag_duration: float = Field(default=0.5, description="Default duration of a mouse drag in seconds")
+    drag_rate: int = Field(default=60, gt=0, description="Maximum mouse moves per second during a drag")
+    drag_profile: str = Field(default="linear", description="Default drag motion profile: linear, ease or bezier")
     scroll_scale: int = Field(default=100, description="Scale factor for scroll amount")
-    
+    batch_max_actions: int = Field(default=50, description="Maximum number of actions in a single batch request")
+    scheduler_input_queue_size: int = Field(default=64, description="Maximum input actions waiting for the input lane before requests are rejected with 429")
+    scheduler_read_concurrency: int = Field(default=4, gt=0, description="Observation actions (screenshots, cursor position, screen size) running concurrently, their display reads share the input thread")
+    scheduler_read_queue_size: int = Field(default=64, description="Maximum observation actions waiting for the read lane before requests are rejected with 429")
+
+    # Screenshot configuration
+    screenshot_format: str = Field(default="png", description="Default screenshot format: png, jpeg or webp")
+    screenshot_quality: int = Field(default=80, description="Default jpeg/webp screenshot quality (1-100)")
+    screenshot_png_compress_level: int = Field(default=6, description="Default png compression level (0-9), lower is faster and larger")
+    screenshot_max_width: int = Field(default=0, description="Default maximum screenshot width, screenshots are downscaled to fit (0 for no limit)")
+    screenshot_max_height: int = Field(default=0, description="Default maximum screenshot height, screenshots are downscaled to fit (0 for no limit)")
+    screenshot_delta_tile_size: int = Field(default=64, gt=0, multiple_of=8, description="Tile edge in pixels for delta screenshots, a multiple of 8")
+    screenshot_delta_max_sessions: int = Field(default=64, description="Maximum sessions whose last delta screenshot frame is remembered")
+    screenshot_coalesce_window: float = Field(default=0.05, description="Seconds a finished screenshot is reused for identical requests, concurrent identical requests always share one capture")
+    observation_cache_ttl: float = Field(default=0.5, description="Seconds cursor position and screenshots are served from cache while no input happened, 0 disables")
+    screen_size_cache_ttl: float = Field(default=30.0, description="Seconds the screen size is served from cache, 0 disables")
+    observation_cache_max_entries: int = Field(default=32, description="Maximum cached observations")
+    frame_grabber_enabled: bool = Field(default=False, description="Capture frames in the background and serve screenshots from the buffered frames")
+    frame_grabber_fps: float = Field(default=10.0, gt=0, description="Background frame captures per second")
+    frame_buffer_size: int = Field(default=8, gt=0, description="Raw frames kept by the background frame grabber")
+    screen_watch_interval: float = Field(default=0.1, gt=0, description="Default seconds between checks of wait_for_screen_change and wait_until_stable")
+    screen_watch_size: int = Field(default=160, gt=0, description="Width of the grayscale thumbnail compared by the screen wait actions")
+    screen_watch_tolerance: int = Field(default=8, ge=0, description="Gray level difference of a thumbnail pixel that counts as a screen change")
+    locate_template_cache_size: int = Field(default=32, description="Decoded locate_image templates kept by content hash")
+    locate_pyramid_levels: int = Field(default=2, ge=0, description="Maximum halvings of the image pyramid of locate_image")
+    locate_min_template_size: int = Field(default=8, gt=0, description="Minimum template edge in pixels at the coarsest pyramid level")
+    locate_pyramid_slack: float = Field(default=0.3, ge=0, description="Confidence margin for candidates at the coarse pyramid level, refined at full resolution")
+    frame_store_max_mb: int = Field(default=256, gt=0, description="Memory budget in MB of the screenshots the MCP server keeps as resources, the least recently used are evicted first")
+    screenshot_inline: bool = Field(default=False, description="Return full screenshots inline from the MCP take_screenshot tool instead of a thumbnail and a resource link")
+    screenshot_thumbnail_width: int = Field(default=512, gt=0, description="Width of the JPEG thumbnail returned with a screenshot resource link")
+    screenshot_thumbnail_quality: int = Field(default=60, description="JPEG quality of screenshot thumbnails (1-100)")
+    idempotency_cache_ttl: float = Field(default=300.0, gt=0, description="Seconds the tool server keeps the result of an action for retries with the same idempotency key")
+    idempotency_cache_size: int = Field(default=1024, ge=0, description="Maximum action results kept by idempotency key, 0 disables the idempotency cache")
+    encode_workers: int = Field(default=0, description="Screenshot resize/encode threads on the tool server, 0 for min(4, CPU count)")
+
+    # Tool server HTTP client configuration
+    http_max_connections: int = Field(default=100, description="Maximum pooled connections per tool server endpoint")
+    http_max_keepalive_connections: int = Field(default=20, description="Maximum idle keep-alive connections per tool server endpoint")
+    http_keepalive_expiry: float = Field(default=30.0, description="Seconds an idle keep-alive connection is kept open")
+    http2_enabled: bool = Field(default=False, description="Use HTTP/2 to tool servers (requires the h2 package)")
+    http_connect_timeout: float = Field(default=5.0, description="Connect timeout to tool servers in seconds")
+    http_timeout: float = Field(default=30.0, description="Default request timeout to tool servers in seconds")
+    http_action_timeouts: Dict[str, float] = Field(
+        default_factory=lambda: {"take_screenshot": 60.0, "drag_mouse": 60.0, "batch": 120.0},
+        description="Per-action request timeout overrides in seconds, keyed by snake_case action name",
+    )
+    ws_enabled: bool = Field(default=True, description="Prefer the persistent WebSocket action channel to tool servers, falling back to HTTP")
+    ws_retry_interval: float = Field(default=60.0, description="Seconds before retrying the action channel of an endpoint where it was unavailable")
+    circuit_failure_threshold: int = Field(default=5, gt=0, description="Consecutive failed requests to a tool server after which its circuit opens and requests fail immediately")
+    circuit_open_seconds: float = Field(default=30.0, gt=0, description="Seconds a circuit stays open before half-open probe requests are let through")
+    circuit_half_open_probes: int = Field(default=1, gt=0, description="Concurrent probe requests of a half-open circuit")
+    retry_attempts: int = Field(default=2, ge=0, description="Extra attempts of idempotent observations after connection errors, 5xx and 429")
+    retry_backoff: float = Field(default=0.2, gt=0, description="Base retry backoff in seconds, doubled per attempt with full jitter")
+    retry_backoff_max: float = Field(default=2.0, gt=0, description="Maximum retry backoff in seconds")
+    retry_input_actions: bool = Field(default=False, description="Also retry input actions and delta screenshots, only safe against tool servers with the idempotency cache")
+    hedge_enabled: bool = Field(default=False, description="Send a second take_screenshot/get_cursor_position request when the first is slower than the endpoint's p95 latency")
+    hedge_min_samples: int = Field(default=20, gt=0, description="Latency samples of an endpoint and action needed before requests are hedged")
+    hedge_window: int = Field(default=200, gt=0, description="Recent latency samples per endpoint and action the p95 is computed from")
+
+    # Node registry configuration (MCP gateway side)
+    nodes: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description='Tool server nodes known to the gateway: [{"name": ..., "endpoint": ..., "labels": {...}}]',
+    )
+    node_heartbeat_interval: float = Field(default=10.0, gt=0, description="Seconds between health checks of registered nodes")
+    node_heartbeat_timeout: float = Field(default=3.0, gt=0, description="Timeout of a node health check in seconds")
+    node_unhealthy_after: int = Field(default=2, gt=0, description="Consecutive failed health checks after which a node is unhealthy")
+    placement_auto: bool = Field(default=True, description="Lease the least loaded idle node for a session whose tool call has no endpoint")
+    placement_idle_timeout: float = Field(default=600.0, gt=0, description="Seconds without a tool call after which a session's node lease is released")
+    fanout_concurrency: int = Field(default=16, gt=0, description="Nodes a broadcast_action calls at once")
+    fanout_timeout: float = Field(default=30.0, gt=0, description="Seconds a broadcast_action waits for each node")
+    fanout_tile_width: int = Field(default=320, gt=0, description="Width of each node's screenshot in the broadcast_action contact sheet")
+
+    # Node self-registration configuration (tool server side)
+    gateway_url: str = Field(default="", description="Base URL of the MCP gateway to register this tool server with on startup, empty disables")
+    node_name: str = Field(default="", description="Name this tool server registers under, defaults to the host name")
+    node_endpoint: str = Field(default="", description="URL the gateway reaches this tool server at, defaults to http://<host name>:<port>")
+    node_labels: Dict[str, str] = Field(default_factory=dict, description="Labels this tool server registers with")
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
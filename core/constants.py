@@ -13,9 +13,26 @@ from src.computer.schema import (
     TakeScreenshotRequest,
     GetCursorPositionRequest,
     GetScreenSizeRequest,
+    InvalidateCacheRequest,
+    WaitForScreenChangeRequest,
+    WaitUntilStableRequest,
+    LocateImageRequest,
+    GetPixelsRequest,
+    WaitForPixelsRequest,
 )
 
 
+# Header carrying the client's remaining time budget for a request in milliseconds,
+# the tool server aborts the action when it runs out
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+
+# Header carrying the scheduling priority of a request, higher runs first among waiting requests
+PRIORITY_HEADER = "X-Priority"
+
+# Header carrying the client's key of a logical action, retries of the action reuse it
+# and get the stored result instead of running the action again
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
 # Request model mapping with camelCase keys
 # Maps action names (camelCase) to their corresponding Pydantic request models
 REQUEST_MODELS: Dict[str, type] = {
@@ -28,8 +45,14 @@ REQUEST_MODELS: Dict[str, type] = {
     "press_key": PressKeyRequest,
     "type_text": TypeTextRequest,
     "wait": WaitRequest,
+    "wait_for_screen_change": WaitForScreenChangeRequest,
+    "wait_until_stable": WaitUntilStableRequest,
+    "wait_for_pixels": WaitForPixelsRequest,
     "take_screenshot": TakeScreenshotRequest,
     "get_cursor_position": GetCursorPositionRequest,
     "get_screen_size": GetScreenSizeRequest,
+    "locate_image": LocateImageRequest,
+    "get_pixels": GetPixelsRequest,
+    "invalidate_cache": InvalidateCacheRequest,
 }
 
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastmcp import FastMCP
 from starlette.requests import Request
 from starlette.responses import JSONResponse
@@ -7,10 +8,27 @@ import uvicorn
 # Register computer control tools
 from mcp_server.register import register_computer_tools_with_client
 from middleware.auth import MCPAPIKeyMiddleware
+from src.computer.connection import connection_manager
+from src.computer.channel import channel_manager
+from mcp_server.nodes import node_registry, list_nodes_route, register_node_route, deregister_node_route
+from mcp_server.placement import placement, placement_route
+
+@asynccontextmanager
+async def mcp_lifespan(server: FastMCP):
+    """Check node health and expire node leases while running, release pooled tool server connections on shutdown"""
+    node_registry.start()
+    placement.start()
+    try:
+        yield {}
+    finally:
+        await placement.stop()
+        await node_registry.stop()
+        await channel_manager.aclose()
+        await connection_manager.aclose()
 
 def create_mcp_server() -> FastMCP:
     """Create MCP server and register tools"""
-    mcp = FastMCP(settings.title)
+    mcp = FastMCP(settings.title, lifespan=mcp_lifespan)
     # Register computer control tools
     register_computer_tools_with_client(mcp)
     return mcp
@@ -37,6 +55,12 @@ def start_mcp_server():
             "transport": "http",
         })
     app.add_route("/health", health, methods=["GET"])
+    # Node registry, tool servers register themselves on startup
+    app.add_route("/nodes", list_nodes_route, methods=["GET"])
+    app.add_route("/nodes", register_node_route, methods=["POST"])
+    app.add_route("/nodes/{name}", deregister_node_route, methods=["DELETE"])
+    # Node leases of MCP sessions
+    app.add_route("/placement", placement_route, methods=["GET"])
     
     return app
 
@@ -0,0 +1,98 @@
+"""Run one action on many tool server nodes concurrently"""
+import asyncio
+import time
+from io import BytesIO
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+from PIL import Image
+from core.config import settings
+from src.computer.imaging import contact_sheet, encode_image
+from src.computer.session import current_session_id
+from .nodes import Node, node_registry
+from .placement import placement
+
+
+class NodeOutcome(NamedTuple):
+    """Result of an action on one node"""
+    node: Node
+    result: Any
+    error: Optional[str]
+    elapsed: float
+
+
+def select_nodes(names: List[str] = None, labels: Dict[str, str] = None, include_leased: bool = False) -> List[Node]:
+    """
+    Nodes addressed by a fan-out
+
+    Args:
+        names: Node names, all registered nodes by default
+        labels: Only nodes having all of these label values
+        include_leased: Also nodes leased by other sessions
+
+    Raises:
+        ValueError: If a name is not registered or no node is selected
+    """
+    if names:
+        unknown = [name for name in names if node_registry.get(name) is None]
+        if unknown:
+            raise ValueError(f"Unknown nodes: {', '.join(unknown)}")
+        nodes = [node_registry.get(name) for name in dict.fromkeys(names)]
+        if labels:
+            nodes = [node for node in nodes if node.matches(labels)]
+    else:
+        nodes = node_registry.nodes(labels)
+    if not include_leased:
+        session_id = current_session_id()
+        nodes = [node for node in nodes if placement.holder(node.name) in (None, session_id)]
+    if not nodes:
+        raise ValueError("No nodes selected")
+    return nodes
+
+
+async def fan_out(
+        nodes: List[Node],
+        call: Callable[[Node], Awaitable[Any]],
+        concurrency: int = None,
+        timeout: float = None,
+) -> List[NodeOutcome]:
+    """
+    Run a call against every node, at most concurrency at a time
+
+    A node failing or exceeding the timeout does not affect the others, its
+    outcome carries the error instead.
+
+    Args:
+        nodes: Target nodes
+        call: The action on one node
+        concurrency: Maximum nodes called at once, defaults to settings.fanout_concurrency
+        timeout: Seconds per node, defaults to settings.fanout_timeout
+
+    Returns:
+        One outcome per node, in the order of nodes
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.fanout_concurrency)
+    timeout = timeout or settings.fanout_timeout
+
+    async def run(node: Node) -> NodeOutcome:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(call(node), timeout)
+            except asyncio.TimeoutError:
+                return NodeOutcome(node, None, f"Timed out after {timeout}s", time.perf_counter() - start)
+            except Exception as e:
+                return NodeOutcome(node, None, str(e) or type(e).__name__, time.perf_counter() - start)
+            return NodeOutcome(node, result, None, time.perf_counter() - start)
+
+    return await asyncio.gather(*(run(node) for node in nodes))
+
+
+def screenshot_sheet(outcomes: List[NodeOutcome]) -> bytes:
+    """JPEG contact sheet of the screenshots of a fan-out, captioned with the node names"""
+    tiles = []
+    for outcome in outcomes:
+        image = None
+        if outcome.result is not None:
+            image = Image.open(BytesIO(outcome.result.data))
+        tiles.append((outcome.node.name if outcome.error is None else f"{outcome.node.name}: failed", image))
+    sheet = contact_sheet(tiles, settings.fanout_tile_width)
+    return encode_image(sheet, "jpeg", settings.screenshot_thumbnail_quality)
@@ -0,0 +1,225 @@
+"""Registry of the tool server nodes behind the MCP gateway"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+import httpx
+from pydantic import Field, ValidationError
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from core.config import settings
+from core.logger import logger
+from middleware.auth import check_api_key
+from src.common import MBaseModel
+from src.computer.connection import connection_manager
+from src.computer.resilience import resilience
+
+
+class NodeRegistration(MBaseModel):
+    """A tool server node, from settings.nodes or registered by the tool server itself"""
+    name: str = Field(min_length=1, description="unique node name", alias="Name")
+    endpoint: str = Field(min_length=1, description="base URL of the tool server", alias="Endpoint")
+    labels: Dict[str, str] = Field(default_factory=dict, description="labels for selecting nodes", alias="Labels")
+
+
+class Node:
+    """A tool server node and its last observed health"""
+
+    def __init__(self, registration: NodeRegistration, source: str):
+        self.name = registration.name
+        self.endpoint = registration.endpoint.rstrip("/")
+        self.labels = dict(registration.labels)
+        # "config" or "registered"
+        self.source = source
+        self.registered_at = time.time()
+        # None until the first probe finished
+        self.healthy: Optional[bool] = None
+        self.failures = 0
+        self.latency: Optional[float] = None
+        # Actions running or queued on the node at the last probe
+        self.load: Optional[int] = None
+        self.last_seen: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled connection to the node, shared with the tool calls against it"""
+        return connection_manager.get_async_client(self.endpoint)
+
+    def matches(self, labels: Dict[str, str]) -> bool:
+        """Whether the node has every given label value"""
+        return all(self.labels.get(key) == value for key, value in labels.items())
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "endpoint": self.endpoint,
+            "labels": self.labels,
+            "source": self.source,
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 1),
+            "load": self.load,
+            "circuit": resilience.state(self.endpoint),
+            "last_seen": self.last_seen,
+            "last_error": self.last_error,
+        }
+
+
+class NodeRegistry:
+    """
+    Named tool server nodes with background health checks.
+
+    Nodes come from settings.nodes and from tool servers registering
+    themselves on startup. A heartbeat probes /health of every node over its
+    pooled connection, so tool calls can address a node by name and the
+    gateway knows which nodes are up and how fast they answer.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[str, Node] = {}
+        self._task: Optional[asyncio.Task] = None
+        for config in settings.nodes:
+            registration = NodeRegistration.model_validate(config)
+            self._nodes[registration.name] = Node(registration, "config")
+
+    def register(self, registration: NodeRegistration, source: str = "registered") -> Node:
+        """Add a node or replace the node of the same name"""
+        node = Node(registration, source)
+        previous = self._nodes.get(node.name)
+        if previous is not None and previous.endpoint == node.endpoint:
+            # Re-registration of a running node keeps its health
+            node.healthy, node.failures, node.latency, node.load = previous.healthy, previous.failures, previous.latency, previous.load
+            node.last_seen, node.last_error = previous.last_seen, previous.last_error
+        self._nodes[node.name] = node
+        logger.info("Node {} registered at {} with labels {}", node.name, node.endpoint, node.labels)
+        if self._task is not None:
+            asyncio.create_task(self.probe(node))
+        return node
+
+    def deregister(self, name: str) -> bool:
+        """Remove a node, returns whether it was registered"""
+        node = self._nodes.pop(name, None)
+        if node is not None:
+            logger.info("Node {} deregistered", name)
+        return node is not None
+
+    def get(self, name: str) -> Optional[Node]:
+        return self._nodes.get(name)
+
+    def nodes(self, labels: Dict[str, str] = None) -> List[Node]:
+        """Registered nodes, optionally only those having every given label value"""
+        return [node for node in self._nodes.values() if not labels or node.matches(labels)]
+
+    def resolve(self, endpoint: str) -> str:
+        """
+        Resolve the endpoint argument of a tool call
+
+        Args:
+            endpoint: A registered node name or a tool server URL
+
+        Returns:
+            The tool server URL
+
+        Raises:
+            ValueError: If the argument is neither a registered node nor a URL
+        """
+        if not endpoint:
+            return endpoint
+        node = self._nodes.get(endpoint)
+        if node is not None:
+            return node.endpoint
+        if "://" not in endpoint:
+            raise ValueError(f"Unknown node {endpoint}, registered nodes: {', '.join(self._nodes) or 'none'}")
+        return endpoint
+
+    async def probe(self, node: Node):
+        """Check the health of a node and record its latency and load"""
+        start = time.perf_counter()
+        try:
+            response = await node.client.get(f"{node.endpoint}/health", timeout=settings.node_heartbeat_timeout)
+            response.raise_for_status()
+            health = response.json()
+        except Exception as e:
+            node.failures += 1
+            node.last_error = str(e) or type(e).__name__
+            if node.failures >= settings.node_unhealthy_after and node.healthy is not False:
+                logger.warning("Node {} is unhealthy: {}", node.name, node.last_error)
+                node.healthy = False
+            return
+        if node.healthy is False:
+            logger.info("Node {} is healthy again", node.name)
+        node.latency = time.perf_counter() - start
+        node.load = int(health.get("load", 0)) if isinstance(health, dict) else 0
+        node.last_seen = time.time()
+        node.failures = 0
+        node.last_error = None
+        node.healthy = True
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.gather(*(self.probe(node) for node in list(self._nodes.values())))
+            await asyncio.sleep(settings.node_heartbeat_interval)
+
+    def start(self):
+        """Start the background heartbeat, from the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self):
+        """Stop the background heartbeat"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [node.info() for node in self._nodes.values()]
+
+
+def auth_error(request: Request) -> Optional[JSONResponse]:
+    """Check the API key of a node management request when authentication is enabled"""
+    if not settings.api_key_enabled:
+        return None
+    error = check_api_key(request.headers.get("X-API-Key") or request.headers.get("Authorization"), request.url.path)
+    if error is None:
+        return None
+    status_code, detail = error
+    return JSONResponse({"error": detail}, status_code=status_code)
+
+
+async def list_nodes_route(request: Request) -> JSONResponse:
+    """GET /nodes, the registered nodes and their health"""
+    error = auth_error(request)
+    if error is not None:
+        return error
+    return JSONResponse({"nodes": node_registry.status()})
+
+
+async def register_node_route(request: Request) -> JSONResponse:
+    """POST /nodes, called by tool servers on startup"""
+    error = auth_error(request)
+    if error is not None:
+        return error
+    try:
+        registration = NodeRegistration.model_validate(await request.json())
+    except (ValueError, ValidationError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse(node_registry.register(registration).info())
+
+
+async def deregister_node_route(request: Request) -> JSONResponse:
+    """DELETE /nodes/{name}, called by tool servers on shutdown"""
+    error = auth_error(request)
+    if error is not None:
+        return error
+    name = request.path_params["name"]
+    if not node_registry.deregister(name):
+        return JSONResponse({"error": f"Unknown node {name}"}, status_code=404)
+    return JSONResponse({"name": name, "deregistered": True})
+
+
+# Create global node registry instance
+node_registry = NodeRegistry()
@@ -0,0 +1,243 @@
+"""Placement of MCP sessions on tool server nodes with exclusive leases"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from fastmcp.server.dependencies import get_context
+from core.config import settings
+from core.logger import logger
+from src.computer.session import current_session_id
+from .nodes import Node, node_registry, auth_error
+
+
+class Lease:
+    """Exclusive use of a node by one MCP session"""
+
+    def __init__(self, node: Node, session_id: str):
+        self.node = node
+        self.session_id = session_id
+        self.acquired_at = time.time()
+        self.last_used = time.monotonic()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "node": self.node.name,
+            "endpoint": self.node.endpoint,
+            "session": self.session_id,
+            "acquired_at": self.acquired_at,
+            "idle": round(time.monotonic() - self.last_used, 3),
+        }
+
+
+def _current_session() -> Any:
+    try:
+        return get_context().session
+    except RuntimeError:
+        return None
+
+
+def _on_session_end(callback: Callable[[], None]) -> bool:
+    """
+    Call back when the MCP session of the current tool call closes
+
+    Returns:
+        Whether the callback was registered, False outside of a session
+    """
+    session = _current_session()
+    if session is None:
+        return False
+    # The session closes its exit stack when the client disconnects or ends the session,
+    # the MCP SDK has no public hook for it and FastMCP's own proxy uses the same one
+    exit_stack = getattr(session, "_exit_stack", None)
+    if exit_stack is None:
+        logger.warning(
+            "MCP session has no exit stack, its lease is released after {}s without tool calls",
+            settings.placement_idle_timeout,
+        )
+        return False
+    exit_stack.callback(callback)
+    return True
+
+
+class Placement:
+    """
+    Assign MCP sessions to idle healthy nodes.
+
+    A session leases its node exclusively, so two agents never drive the
+    same desktop. The least loaded node wins, by the queue depth and latency
+    of its last health check. A node addressed by name or URL is leased by
+    the addressing session too. Leases are released explicitly, when the
+    MCP session closes, or after settings.placement_idle_timeout seconds
+    without a tool call, e.g. of a client that vanished without closing it.
+    """
+
+    def __init__(self):
+        # Leases by node name and the default node name by session
+        self._leases: Dict[str, Lease] = {}
+        self._sessions: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def lease(self, session_id: str = None) -> Optional[Lease]:
+        """Lease of the default node of a session, the current one by default"""
+        name = self._sessions.get(session_id or current_session_id())
+        return self._leases.get(name) if name else None
+
+    def holder(self, node_name: str) -> Optional[str]:
+        """Session ID leasing a node, None if it is not leased"""
+        lease = self._leases.get(node_name)
+        return lease.session_id if lease else None
+
+    def acquire(self, labels: Dict[str, str] = None) -> Lease:
+        """
+        Lease the least loaded idle healthy node for the current session
+
+        A session that already holds a lease keeps its node.
+
+        Args:
+            labels: Only consider nodes having all of these label values
+
+        Raises:
+            ValueError: If no idle healthy node matches
+        """
+        session_id = current_session_id()
+        lease = self.lease(session_id)
+        if lease is not None:
+            lease.last_used = time.monotonic()
+            return lease
+        candidates = [
+            node for node in node_registry.nodes(labels)
+            if node.healthy and node.name not in self._leases
+        ]
+        if not candidates:
+            raise ValueError(f"No idle healthy node{f' with labels {labels}' if labels else ''}")
+        node = min(candidates, key=lambda n: (n.load or 0, n.latency if n.latency is not None else float("inf")))
+        return self._grant(node, session_id)
+
+    def claim(self, node: Node) -> Lease:
+        """
+        Lease a node addressed by the current session
+
+        The first node a session leases becomes its default node.
+
+        Raises:
+            ValueError: If another session leases the node
+        """
+        session_id = current_session_id()
+        lease = self._leases.get(node.name)
+        if lease is None:
+            return self._grant(node, session_id)
+        if lease.session_id != session_id:
+            raise ValueError(f"Node {node.name} is leased by another session")
+        lease.last_used = time.monotonic()
+        return lease
+
+    def _grant(self, node: Node, session_id: str) -> Lease:
+        lease = Lease(node, session_id)
+        self._leases[node.name] = lease
+        self._sessions.setdefault(session_id, node.name)
+        _on_session_end(lambda: self._session_ended(lease))
+        logger.info("Session {} leased node {}", session_id, node.name)
+        return lease
+
+    def _session_ended(self, lease: Lease):
+        if self._leases.get(lease.node.name) is lease:
+            logger.info("Session {} ended", lease.session_id)
+            self.release(lease.session_id)
+
+    def _drop(self, lease: Lease):
+        del self._leases[lease.node.name]
+        if self._sessions.get(lease.session_id) == lease.node.name:
+            del self._sessions[lease.session_id]
+        logger.info("Session {} released node {}", lease.session_id, lease.node.name)
+
+    def release(self, session_id: str = None) -> Optional[Lease]:
+        """Release every lease of a session, the current one by default, returns the default node's lease"""
+        session_id = session_id or current_session_id()
+        lease = self.lease(session_id)
+        for held in [held for held in self._leases.values() if held.session_id == session_id]:
+            self._drop(held)
+        return lease
+
+    def resolve(self, endpoint: str) -> str:
+        """
+        Resolve the endpoint argument of a tool call for the current session
+
+        Args:
+            endpoint: A registered node name, a tool server URL, or empty for the
+                session's leased node, which is leased on first use when
+                settings.placement_auto is set. A registered node addressed
+                by name or URL is leased for the session.
+
+        Raises:
+            ValueError: If the node is leased by another session, or none is available
+        """
+        if endpoint:
+            endpoint = node_registry.resolve(endpoint)
+            node = next((node for node in node_registry.nodes() if node.endpoint == endpoint.rstrip("/")), None)
+            if node is not None:
+                self.claim(node)
+            return endpoint
+        lease = self.lease()
+        if lease is None and settings.placement_auto and node_registry.nodes():
+            lease = self.acquire()
+        if lease is None:
+            return endpoint
+        lease.last_used = time.monotonic()
+        return lease.node.endpoint
+
+    def expire(self):
+        """Release leases of idle sessions and of deregistered nodes"""
+        now = time.monotonic()
+        for lease in list(self._leases.values()):
+            if now - lease.last_used > settings.placement_idle_timeout:
+                reason = "idle"
+            else:
+                node = node_registry.get(lease.node.name)
+                if node is not None and node.endpoint == lease.node.endpoint:
+                    # Re-registration replaces the node object, the lease carries over
+                    lease.node = node
+                    continue
+                reason = "node deregistered"
+            logger.info("Lease of node {} by session {} expired: {}", lease.node.name, lease.session_id, reason)
+            self._drop(lease)
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(settings.node_heartbeat_interval)
+            self.expire()
+
+    def start(self):
+        """Start expiring leases in the background, from the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        nodes = node_registry.nodes()
+        return {
+            "nodes": len(nodes),
+            "healthy": sum(1 for node in nodes if node.healthy),
+            "leased": len(self._leases),
+            "leases": [lease.info() for lease in self._leases.values()],
+        }
+
+
+async def placement_route(request: Request) -> JSONResponse:
+    """GET /placement, the current node leases"""
+    error = auth_error(request)
+    if error is not None:
+        return error
+    return JSONResponse(placement.status())
+
+
+# Create global placement instance
+placement = Placement()
@@ -1,23 +1,62 @@
 """Register computer control tools with FastMCP server"""
+import base64
 from pydantic import Field
-from typing import Any
-from src.computer.client import get_computer_use_mcp_client
-from src.computer.base import handle_error
+from typing import Any, Literal
+from src.computer.client import get_async_computer_use_mcp_client
+from src.computer.base import handle_error, camel_to_snake, delta_screenshot_contents
 from mcp import types
 from fastmcp import FastMCP
 from loguru import logger
 from middleware.auth import get_mcp_api_key
-from src.computer.client import ComputerUseMCPClient
+from src.computer.client import AsyncComputerUseMCPClient
+from src.computer.session import get_coordinate_scale, set_coordinate_scale, current_session_id
+from src.computer.frame_store import register_frame_resources, stored_screenshot_contents
+from core.config import settings
+from mcp_server.nodes import node_registry
+from mcp_server.placement import placement
+from mcp_server.fanout import select_nodes, fan_out, screenshot_sheet
+from src.computer.executor import run_encode
+from core.constants import REQUEST_MODELS
+
+# Actions whose coordinates are mapped through the session coordinate scale
+COORDINATE_ACTIONS = {"move_mouse", "click_mouse", "press_mouse", "release_mouse", "drag_mouse", "scroll", "take_screenshot"}
+
+def get_computer_use_mcp_client_with_api_key(endpoint: str) -> AsyncComputerUseMCPClient:
+    return get_async_computer_use_mcp_client(endpoint, api_key=get_mcp_api_key())
+
+async def take_delta_screenshot(
+        client: AsyncComputerUseMCPClient,
+        endpoint: str,
+        format: str,
+        quality: int,
+        compress_level: int,
+        scale: float,
+        max_width: int,
+        max_height: int,
+        region: list[int],
+        keyframe: bool,
+) -> list:
+    """Take a delta screenshot for the current MCP session and build its contents"""
+    response = await client.take_screenshot(
+        format, quality, compress_level, scale, max_width, max_height,
+        region=region, coordinate_scale=get_coordinate_scale(endpoint),
+        delta=True, keyframe=keyframe, session=current_session_id(),
+    )
+    if not response or not response.Result:
+        return handle_error("take_screenshot", "Failed to take screenshot")
+    if not region:
+        # Tiles are in the same image space as the keyframe
+        set_coordinate_scale(endpoint, response.Result.scale)
+    return delta_screenshot_contents(response.Result)
 
-def get_computer_use_mcp_client_with_api_key(endpoint: str) -> ComputerUseMCPClient:
-    api_key = get_mcp_api_key()
-    print(f"API key: {api_key}")
-    return get_computer_use_mcp_client(endpoint, api_key=get_mcp_api_key())
 
 def register_computer_tools_with_client(mcp: FastMCP):
     """Register all computer control tools with the MCP server.
     For remote usage with client
     """
+    # Screenshots returned as resource links are read from here
+    register_frame_resources(mcp)
+
     # ============================================================================
     # Mouse Control Tools
     # ============================================================================
@@ -29,11 +68,12 @@ def register_computer_tools_with_client(mcp: FastMCP):
     async def move_mouse(
         x: int = Field(description="X coordinate (horizontal position)"),
         y: int = Field(description="Y coordinate (vertical position)"),
-        endpoint: str = Field(default=None, description="Endpoint of the Computer Use Tool Server"),
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session"),
     ) -> dict:
         try:
+            endpoint = placement.resolve(endpoint)
             client = get_computer_use_mcp_client_with_api_key(endpoint)
-            response = client.move_mouse(x, y)
+            response = await client.move_mouse(x, y, coordinate_scale=get_coordinate_scale(endpoint))
             if not response:
                 return handle_error("move_mouse", "Failed to move mouse")
             return types.TextContent(
@@ -54,11 +94,12 @@ def register_computer_tools_with_client(mcp: FastMCP):
         button: str = Field(default="left", description="Mouse button: left, right, middle, double_click, double_left"),
         press: bool = Field(default=False, description="Only press without releasing"),
         release: bool = Field(default=False, description="Only release without pressing"),
-        endpoint: str = Field(default=None, description="Endpoint of the Computer Use Tool Server")
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
     ) -> dict:
         try:
+            endpoint = placement.resolve(endpoint)
             client = get_computer_use_mcp_client_with_api_key(endpoint)
-            response = client.click_mouse(x, y, button, press, release)
+            response = await client.click_mouse(x, y, button, press, release, coordinate_scale=get_coordinate_scale(endpoint))
             if not response:
                 return handle_error("click_mouse", "Failed to click mouse")
             return types.TextContent(
@@ -77,11 +118,12 @@ def register_computer_tools_with_client(mcp: FastMCP):
         x: int = Field(default=0, description="X coordinate"),
         y: int = Field(default=0, description="Y coordinate"),
         button: str = Field(default="left", description="Mouse button: left, right, middle"),
-        endpoint: str = Field(default=None, description="Endpoint of the Computer Use Tool Server")
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
     ) -> dict:
         try:
+            endpoint = placement.resolve(endpoint)
             client = get_computer_use_mcp_client_with_api_key(endpoint)
-            response = client.press_mouse(x, y, button)
+            response = await client.press_mouse(x, y, button, coordinate_scale=get_coordinate_scale(endpoint))
             if not response:
                 return handle_error("press_mouse", "Failed to press mouse")
             return types.TextContent(
@@ -97,14 +139,15 @@ def register_computer_tools_with_client(mcp: FastMCP):
         description="Release a mouse button at the specified coordinates"
     )
     async def release_mouse(
-        endpoint: str = Field(default=None, description="Endpoint of the Computer Use Tool Server"),
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session"),
         x: int = Field(default=0, description="X coordinate"),
         y: int = Field(default=0, description="Y coordinate"),
         button: str = Field(default="left", description="Mouse button: left, right, middle")
     ) -> dict:
         try:
+            endpoint = placement.resolve(endpoint)
             client = get_computer_use_mcp_client_with_api_key(endpoint)
-            response = client.release_mouse(x, y, button)
+            response = await client.release_mouse(x, y, button, coordinate_scale=get_coordinate_scale(endpoint))
             if not response:
                 return handle_error("release_mouse", "Failed to release mouse")
             return types.TextContent(
@@ -124,11 +167,18 @@ def register_computer_tools_with_client(mcp: FastMCP):
         source_y: int = Field(description="Source Y coordinate"),
         target_x: int = Field(description="Target X coordinate"),
         target_y: int = Field(description="Target Y coordinate"),
-        endpoint: str = Field(default=None, description="Endpoint of the Computer Use Tool Server")
+        duration: int = Field(default=None, description="Drag duration in milliseconds (default: server setting)"),
+        profile: Literal["linear", "ease", "bezier"] = Field(default=None, description="Motion profile: linear, ease or bezier (curved path)"),
+        fast: bool = Field(default=False, description="Press, nudge, jump to the target and release, for apps that only need the gesture"),
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
     ) -> dict:
         try:
+            endpoint = placement.resolve(endpoint)
             client = get_computer_use_mcp_client_with_api_key(endpoint)
-            response = client.drag_mouse(source_x, source_y, target_x, target_y)
+            response = await client.drag_mouse(
+                source_x, source_y, target_x, target_y, coordinate_scale=get_coordinate_scale(endpoint),
+                duration=duration, profile=profile, fast=fast,
+            )
             if not response:
                 return handle_error("drag_mouse", "Failed to drag mouse")
             return types.TextContent(
@@ -148,11 +198,14 @@ def register_computer_tools_with_client(mcp: FastMCP):
         y: int = Field(default=0, description="Y coordinate"),
         scroll_direction: str = Field(default="up", description="Scroll direction: up, down, left, right"),
         scroll_amount: int = Field(default=1, description="Amount to scroll"),
-        endpoint: str = Field(default=None, description="Endpoint of the Computer Use Tool Server")
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
     ) -> dict:
         try:
+            endpoint = placement.resolve(endpoint)
             client = get_computer_use_mcp_client_with_api_key(endpoint)
-            response = client.scroll(x, y, scroll_direction, scroll_amount)
+            response = await client.scroll(
+                x, y, scroll_direction, scroll_amount, coordinate_scale=get_coordinate_scale(endpoint)
+            )
             if not response:
                 return handle_error("scroll", "Failed to scroll")
             return types.TextContent(
@@ -173,11 +226,12 @@ def register_computer_tools_with_client(mcp: FastMCP):
     )
     async def press_key(
         key: str = Field(description="Key name or key combination (e.g., 'enter', 'ctrl c', 'alt tab')"),
-        endpoint: str = Field(default=None, description="Endpoint of the Computer Use Tool Server"),
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session"),
     ) -> dict:
         try:
+            endpoint = placement.resolve(endpoint)
             client = get_computer_use_mcp_client_with_api_key(endpoint)
-            response = client.press_key(key)
+            response = await client.press_key(key)
             if not response:
                 return handle_error("press_key", "Failed to press key")
             return types.TextContent(
@@ -194,11 +248,12 @@ def register_computer_tools_with_client(mcp: FastMCP):
     )
     async def type_text(
         text: str = Field(description="Text to type"),
-        endpoint: str = Field(default=None, description="Endpoint of the Computer Use Tool Server"),
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session"),
     ) -> dict:
         try:
+            endpoint = placement.resolve(endpoint)
             client = get_computer_use_mcp_client_with_api_key(endpoint)
-            response = client.type_text(text)
+            response = await client.type_text(text)
             if not response:
                 return handle_error("type_text", "Failed to type text")
             return types.TextContent(
@@ -219,11 +274,12 @@ def register_computer_tools_with_client(mcp: FastMCP):
     )
     async def wait(
         duration: int = Field(description="Duration to wait in milliseconds"),
-        endpoint: str = Field(default=None, description="Endpoint of the Computer Use Tool Server")
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
     ) -> dict:
         try:
+            endpoint = placement.resolve(endpoint)
             client = get_computer_use_mcp_client_with_api_key(endpoint)
-            response = client.wait(duration)
+            response = await client.wait(duration)
             if not response:
                 return handle_error("wait", "Failed to wait")
             return types.TextContent(
@@ -234,52 +290,132 @@ def register_computer_tools_with_client(mcp: FastMCP):
             logger.error("Error in wait: {}", e)
             return handle_error("wait", e)
     
+    @mcp.tool(
+        name="wait_for_screen_change",
+        description="Wait until the screen or a region changes, checked on the machine without sending screenshots. Returns whether it changed before the timeout"
+    )
+    async def wait_for_screen_change(
+        region: list[int] = Field(default=None, description="Watch only this area: [left, top, width, height], in the same coordinates as mouse tools"),
+        timeout: int = Field(default=10000, description="Maximum wait in milliseconds"),
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
+    ) -> dict:
+        try:
+            endpoint = placement.resolve(endpoint)
+            client = get_computer_use_mcp_client_with_api_key(endpoint)
+            response = await client.wait_for_screen_change(
+                region, timeout, coordinate_scale=get_coordinate_scale(endpoint)
+            )
+            if not response or not response.Result:
+                return handle_error("wait_for_screen_change", "Failed to wait for a screen change")
+            return types.TextContent(
+                type="text",
+                text=str(response.Result.model_dump())
+            )
+        except Exception as e:
+            logger.error("Error in wait_for_screen_change: {}", e)
+            return handle_error("wait_for_screen_change", e)
+    
+    @mcp.tool(
+        name="wait_until_stable",
+        description="Wait until the screen or a region stopped changing for the given time, e.g. until a page finished loading, checked on the machine without sending screenshots"
+    )
+    async def wait_until_stable(
+        stable: int = Field(default=500, description="Milliseconds the screen must stay unchanged"),
+        region: list[int] = Field(default=None, description="Watch only this area: [left, top, width, height], in the same coordinates as mouse tools"),
+        timeout: int = Field(default=10000, description="Maximum wait in milliseconds"),
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
+    ) -> dict:
+        try:
+            endpoint = placement.resolve(endpoint)
+            client = get_computer_use_mcp_client_with_api_key(endpoint)
+            response = await client.wait_until_stable(
+                stable, region, timeout, coordinate_scale=get_coordinate_scale(endpoint)
+            )
+            if not response or not response.Result:
+                return handle_error("wait_until_stable", "Failed to wait until the screen is stable")
+            return types.TextContent(
+                type="text",
+                text=str(response.Result.model_dump())
+            )
+        except Exception as e:
+            logger.error("Error in wait_until_stable: {}", e)
+            return handle_error("wait_until_stable", e)
+    
     @mcp.tool(
         name="take_screenshot",
         description="Take a screenshot of the current screen"
     )
     async def take_screenshot(
-       endpoint: str = Field(default=None, description="Endpoint of the Computer Use Tool Server")
+       format: Literal["png", "jpeg", "webp"] = Field(default=None, description="Image format: png, jpeg or webp (default: server setting)"),
+       quality: int = Field(default=None, description="JPEG/WebP quality from 1 to 100"),
+       compress_level: int = Field(default=None, description="PNG compression level from 0 (fastest) to 9 (smallest)"),
+       scale: float = Field(default=None, description="Downscale factor in (0, 1], later mouse coordinates are interpreted in the downscaled image"),
+       max_width: int = Field(default=None, description="Maximum image width, the screenshot is downscaled to fit"),
+       max_height: int = Field(default=None, description="Maximum image height, the screenshot is downscaled to fit"),
+       region: list[int] = Field(default=None, description="Capture only this area: [left, top, width, height], in the same coordinates as mouse tools"),
+       delta: bool = Field(default=False, description="Return only the image tiles changed since this session's last delta screenshot, the first one is a full keyframe"),
+       keyframe: bool = Field(default=False, description="With delta, return the full screenshot and use it as the new reference"),
+       inline: bool = Field(default=None, description="Return the full image inline instead of a thumbnail and a screenshot:// resource link (default: server setting)"),
+       endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
     ) -> list[dict[str, Any]]:
         try:
+            endpoint = placement.resolve(endpoint)
             client = get_computer_use_mcp_client_with_api_key(endpoint)
-            # Call synchronous method
-            screenshot_response = client.take_screenshot()
-            if not screenshot_response or not hasattr(screenshot_response, 'Result'):
+            if delta:
+                return await take_delta_screenshot(
+                    client, endpoint, format, quality, compress_level, scale, max_width, max_height, region, keyframe
+                )
+            # Fetch raw image bytes, base64 is only applied for the MCP image content
+            image = await client.take_screenshot_image(
+                format, quality, compress_level, scale, max_width, max_height,
+                region=region, coordinate_scale=get_coordinate_scale(endpoint),
+            )
+            if not image or not image.data:
                 return handle_error("take_screenshot", "Failed to take screenshot")
-            
-            # Extract data
-            result = screenshot_response.model_dump().get('Result')
-            if not result or 'screenshot' not in result:
-                return handle_error("take_screenshot", "Invalid screenshot response")
-            
-            image = result['screenshot']
-            # get screen size
-            screen_size_response = client.get_screen_size()
-            if not screen_size_response or not hasattr(screen_size_response, 'Result'):
-                return handle_error("get_screen_size", "Failed to get screen size")
 
-            screen_result = screen_size_response.model_dump().get('Result')
-            if not screen_result:
-                return handle_error("get_screen_size", "Invalid screen size response")
+            if inline is None:
+                inline = settings.screenshot_inline
 
-            width = screen_result.get('width') or screen_result.get('Width')
-            height = screen_result.get('height') or screen_result.get('Height')
-            logger.info(f"Get screen size, width: {width}, height: {height}")
+            if region:
+                # Partial re-observation, the session coordinate space is unchanged
+                info = {"region": region, "width": image.width, "height": image.height}
+                if not inline:
+                    return await stored_screenshot_contents(image.data, image.format, image.width, image.height, info)
+                return [
+                    types.TextContent(
+                        type="text",
+                        text=str(info)
+                    ),
+                    types.ImageContent(
+                        type="image",
+                        data=base64.b64encode(image.data).decode(),
+                        mimeType=image.mime_type,
+                    )
+                ]
+
+            # Later mouse coordinates of this session refer to this image
+            set_coordinate_scale(endpoint, image.scale)
+            width = image.width or image.screen_width
+            height = image.height or image.screen_height
+            logger.info(f"Get screen size, width: {width}, height: {height}, scale: {image.scale}")
+            info = {
+                "width": width,
+                "height": height,
+            }
+            if image.scale != 1:
+                info.update(scale=image.scale, screen_width=image.screen_width, screen_height=image.screen_height)
+            if not inline:
+                # Thumbnail and resource link, the full image is read from the frame store on demand
+                return await stored_screenshot_contents(image.data, image.format, width, height, info)
             return [
                 types.TextContent(
                     type="text",
-                    text=str(
-                        {
-                            "width": width,
-                            "height": height,
-                        }
-                    )
+                    text=str(info)
                 ),
                 types.ImageContent(
                     type="image",
-                    data=image,
-                    mimeType="image/png",
+                    data=base64.b64encode(image.data).decode(),
+                    mimeType=image.mime_type,
                 )
             ]
         except Exception as e:
@@ -291,23 +427,333 @@ def register_computer_tools_with_client(mcp: FastMCP):
         description="Get the current mouse cursor position"
     )
     async def get_cursor_position(
-        endpoint: str = Field(default=None, description="Endpoint of the Computer Use Tool Server")
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
     ) -> dict:
         try:
+            endpoint = placement.resolve(endpoint)
             client = get_computer_use_mcp_client_with_api_key(endpoint)
-            response = client.get_cursor_position()
+            response = await client.get_cursor_position()
             if not response:
                 return handle_error("get_cursor_position", "Failed to get cursor position")
+            # Report the position in the coordinate space of the session's last screenshot
+            scale = get_coordinate_scale(endpoint)
             return types.TextContent(
                 type="text",
                 text=str(
                     {
-                        "x": response.Result.x,
-                        "y": response.Result.y
+                        "x": round(response.Result.x * scale),
+                        "y": round(response.Result.y * scale)
                     }
                 )
             )
         except Exception as e:
             logger.error("Error in get_cursor_position: {}", e)
             return handle_error("get_cursor_position", e)
-    
\ No newline at end of file
+    
+    @mcp.tool(
+        name="locate_image",
+        description="Find a known image (icon, button) on the screen without taking a screenshot. Returns the match boxes and centers, best first"
+    )
+    async def locate_image(
+        template: str = Field(description="Base64-encoded png, jpeg or webp image to find, e.g. cut from an earlier screenshot"),
+        region: list[int] = Field(default=None, description="Search only this area: [left, top, width, height], in the same coordinates as mouse tools"),
+        confidence: float = Field(default=0.9, description="Minimum match confidence from 0 to 1"),
+        limit: int = Field(default=10, description="Maximum number of matches"),
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
+    ) -> dict:
+        try:
+            endpoint = placement.resolve(endpoint)
+            client = get_computer_use_mcp_client_with_api_key(endpoint)
+            response = await client.locate_image(
+                template, region, confidence, limit, coordinate_scale=get_coordinate_scale(endpoint)
+            )
+            if not response or not response.Result:
+                return handle_error("locate_image", "Failed to locate image")
+            return types.TextContent(
+                type="text",
+                text=str(response.Result.model_dump())
+            )
+        except Exception as e:
+            logger.error("Error in locate_image: {}", e)
+            return handle_error("locate_image", e)
+    
+    @mcp.tool(
+        name="get_pixels",
+        description="Read the RGB colours of a few points or small areas, e.g. whether a checkbox is ticked or a status light is green, without taking a screenshot"
+    )
+    async def get_pixels(
+        pixels: list[list[int]] = Field(description="Points [x, y] or areas [x, y, width, height] (mean colour), in the same coordinates as mouse tools"),
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
+    ) -> dict:
+        try:
+            endpoint = placement.resolve(endpoint)
+            client = get_computer_use_mcp_client_with_api_key(endpoint)
+            response = await client.get_pixels(pixels, coordinate_scale=get_coordinate_scale(endpoint))
+            if not response or not response.Result:
+                return handle_error("get_pixels", "Failed to get pixels")
+            return types.TextContent(
+                type="text",
+                text=str(response.Result.model_dump(exclude_none=True))
+            )
+        except Exception as e:
+            logger.error("Error in get_pixels: {}", e)
+            return handle_error("get_pixels", e)
+    
+    @mcp.tool(
+        name="wait_for_pixels",
+        description="Wait until points or small areas of the screen have the expected colours, checked on the machine without sending screenshots"
+    )
+    async def wait_for_pixels(
+        pixels: list[list[int]] = Field(description="Points [x, y] or areas [x, y, width, height] (mean colour), in the same coordinates as mouse tools"),
+        colors: list[list[int]] = Field(description="Expected [r, g, b] colour of each pixel"),
+        tolerance: int = Field(default=16, description="Maximum difference per RGB channel"),
+        mode: Literal["all", "any"] = Field(default="all", description="Whether all or any pixel must match"),
+        timeout: int = Field(default=10000, description="Maximum wait in milliseconds"),
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
+    ) -> dict:
+        try:
+            endpoint = placement.resolve(endpoint)
+            client = get_computer_use_mcp_client_with_api_key(endpoint)
+            response = await client.wait_for_pixels(
+                pixels, colors, tolerance, mode, timeout, coordinate_scale=get_coordinate_scale(endpoint)
+            )
+            if not response or not response.Result:
+                return handle_error("wait_for_pixels", "Failed to wait for pixels")
+            return types.TextContent(
+                type="text",
+                text=str(response.Result.model_dump())
+            )
+        except Exception as e:
+            logger.error("Error in wait_for_pixels: {}", e)
+            return handle_error("wait_for_pixels", e)
+    
+    @mcp.tool(
+        name="get_screen_size",
+        description="Get the screen size (resolution)"
+    )
+    async def get_screen_size(
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
+    ) -> dict:
+        try:
+            endpoint = placement.resolve(endpoint)
+            client = get_computer_use_mcp_client_with_api_key(endpoint)
+            response = await client.get_screen_size()
+            if not response:
+                return handle_error("get_screen_size", "Failed to get screen size")
+            return types.TextContent(
+                type="text",
+                text=str(
+                    {
+                        "width": response.Result.width,
+                        "height": response.Result.height
+                    }
+                )
+            )
+        except Exception as e:
+            logger.error("Error in get_screen_size: {}", e)
+            return handle_error("get_screen_size", e)
+
+    @mcp.tool(
+        name="invalidate_cache",
+        description=(
+            "Drop cached observations on the Computer Use Tool Server so the next screenshot and cursor position "
+            "are captured afresh. Input actions invalidate the cache automatically, use this after changes made "
+            "without input, e.g. when waiting for an application to finish loading."
+        )
+    )
+    async def invalidate_cache(
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
+    ) -> dict:
+        try:
+            endpoint = placement.resolve(endpoint)
+            client = get_computer_use_mcp_client_with_api_key(endpoint)
+            response = await client.invalidate_cache()
+            if not response:
+                return handle_error("invalidate_cache", "Failed to invalidate cache")
+            return types.TextContent(
+                type="text",
+                text="Operation successful"
+            )
+        except Exception as e:
+            logger.error("Error in invalidate_cache: {}", e)
+            return handle_error("invalidate_cache", e)
+
+    @mcp.tool(
+        name="batch_actions",
+        description=(
+            "Execute an ordered sequence of actions on the Computer Use Tool Server in one round trip. "
+            "Each step is an object with 'action' (e.g. move_mouse, click_mouse, type_text, press_key, take_screenshot), "
+            "'params' (the same parameters as the single action tool) and an optional 'delay' in milliseconds after the step."
+        )
+    )
+    async def batch_actions(
+        actions: list[dict[str, Any]] = Field(description="Ordered steps: [{'action': 'click_mouse', 'params': {'x': 100, 'y': 200}, 'delay': 100}]"),
+        delay: int = Field(default=0, description="Delay in milliseconds between steps"),
+        stop_on_error: bool = Field(default=True, description="Stop at the first failed step"),
+        endpoint: str = Field(default=None, description="Endpoint URL or registered node name of the Computer Use Tool Server, defaults to the node leased by this session")
+    ) -> list[dict[str, Any]]:
+        try:
+            endpoint = placement.resolve(endpoint)
+            client = get_computer_use_mcp_client_with_api_key(endpoint)
+            # Coordinates refer to the last screenshot of the session, like the single action tools
+            coordinate_scale = get_coordinate_scale(endpoint)
+            actions = [
+                {**step, "params": {"coordinate_scale": coordinate_scale, **(step.get("params") or {})}}
+                if camel_to_snake(str(step.get("action", ""))) in COORDINATE_ACTIONS else step
+                for step in actions
+            ]
+            response = await client.batch_actions(actions, delay, stop_on_error)
+            if not response or not response.Result:
+                return handle_error("batch_actions", "Failed to execute batch")
+
+            # Screenshots are returned as images, everything else is summarised as text
+            summary = []
+            images = []
+            for step in response.Result.steps:
+                item = {"index": step.index, "action": step.action}
+                if step.error is not None:
+                    item["error"] = step.error
+                elif isinstance(step.result, dict) and "screenshot" in step.result:
+                    item["result"] = f"image {len(images)}"
+                    # Region captures keep the session coordinate space
+                    if not (actions[step.index].get("params") or {}).get("region"):
+                        set_coordinate_scale(endpoint, step.result.get("scale", 1.0))
+                    images.append(
+                        types.ImageContent(
+                            type="image",
+                            data=step.result["screenshot"],
+                            mimeType=f"image/{step.result.get('format', 'png')}",
+                        )
+                    )
+                else:
+                    item["result"] = step.result
+                summary.append(item)
+            return [
+                types.TextContent(
+                    type="text",
+                    text=str(
+                        {
+                            "completed": response.Result.completed,
+                            "failed": response.Result.failed,
+                            "steps": summary,
+                        }
+                    )
+                ),
+                *images,
+            ]
+        except Exception as e:
+            logger.error("Error in batch_actions: {}", e)
+            return handle_error("batch_actions", e)
+
+    # ============================================================================
+    # Node Tools
+    # ============================================================================
+
+    @mcp.tool(
+        name="list_nodes",
+        description="List the registered Computer Use Tool Server nodes with their labels and health, any tool accepts a node name as endpoint"
+    )
+    async def list_nodes(
+        labels: dict[str, str] = Field(default=None, description="Only nodes having all of these label values"),
+    ) -> dict:
+        try:
+            return types.TextContent(
+                type="text",
+                text=str([node.info() for node in node_registry.nodes(labels)])
+            )
+        except Exception as e:
+            logger.error("Error in list_nodes: {}", e)
+            return handle_error("list_nodes", e)
+
+    @mcp.tool(
+        name="acquire_node",
+        description="Lease the least loaded idle healthy node for this session, later tool calls without endpoint use it and no other session can use it until it is released"
+    )
+    async def acquire_node(
+        labels: dict[str, str] = Field(default=None, description="Only consider nodes having all of these label values"),
+    ) -> dict:
+        try:
+            return types.TextContent(
+                type="text",
+                text=str(placement.acquire(labels).info())
+            )
+        except Exception as e:
+            logger.error("Error in acquire_node: {}", e)
+            return handle_error("acquire_node", e)
+
+    @mcp.tool(
+        name="release_node",
+        description="Release the nodes leased by this session"
+    )
+    async def release_node() -> dict:
+        try:
+            lease = placement.release()
+            return types.TextContent(
+                type="text",
+                text=str({"released": lease.node.name if lease else None})
+            )
+        except Exception as e:
+            logger.error("Error in release_node: {}", e)
+            return handle_error("release_node", e)
+
+    @mcp.tool(
+        name="broadcast_action",
+        description=(
+            "Run one action on many nodes concurrently, e.g. take a screenshot of every node or press ctrl s everywhere. "
+            "Returns the result of each node, and a contact sheet image for take_screenshot"
+        )
+    )
+    async def broadcast_action(
+        action: str = Field(description="Action name, e.g. take_screenshot, press_key, type_text, click_mouse"),
+        params: dict[str, Any] = Field(default=None, description="Parameters of the action, coordinates are screen pixels of each node"),
+        nodes: list[str] = Field(default=None, description="Node names, all registered nodes by default"),
+        labels: dict[str, str] = Field(default=None, description="Only nodes having all of these label values"),
+        concurrency: int = Field(default=None, description="Maximum nodes called at once (default: server setting)"),
+        timeout: float = Field(default=None, description="Seconds to wait for each node (default: server setting)"),
+        include_leased: bool = Field(default=False, description="Also run on nodes leased by other sessions"),
+    ) -> list[dict[str, Any]]:
+        try:
+            action = camel_to_snake(action)
+            if action not in REQUEST_MODELS:
+                return handle_error("broadcast_action", f"Unknown action {action}")
+            params = params or {}
+            targets = select_nodes(nodes, labels, include_leased)
+            screenshot = action == "take_screenshot"
+
+            async def call(node):
+                client = get_computer_use_mcp_client_with_api_key(node.endpoint)
+                if screenshot:
+                    # Only a contact sheet cell is needed from each node
+                    return await client.take_screenshot_image(
+                        "jpeg", max_width=settings.fanout_tile_width, region=params.get("region")
+                    )
+                return (await client.run_action(action, params)).Result
+
+            outcomes = await fan_out(targets, call, concurrency, timeout)
+            results = []
+            for outcome in outcomes:
+                item = {"node": outcome.node.name, "elapsed_ms": round(outcome.elapsed * 1000, 1)}
+                if outcome.error is not None:
+                    item["error"] = outcome.error
+                elif screenshot:
+                    item["result"] = {"screen_width": outcome.result.screen_width, "screen_height": outcome.result.screen_height}
+                else:
+                    item["result"] = outcome.result
+                results.append(item)
+            failed = sum(1 for outcome in outcomes if outcome.error is not None)
+            contents = [
+                types.TextContent(
+                    type="text",
+                    text=str({"action": action, "succeeded": len(outcomes) - failed, "failed": failed, "results": results})
+                )
+            ]
+            if screenshot and failed < len(outcomes):
+                # One image for the whole fleet, cells in the order of results
+                sheet = await run_encode(screenshot_sheet, outcomes)
+                contents.append(
+                    types.ImageContent(type="image", data=base64.b64encode(sheet).decode(), mimeType="image/jpeg")
+                )
+            return contents
+        except Exception as e:
+            logger.error("Error in broadcast_action: {}", e)
+            return handle_error("broadcast_action", e)
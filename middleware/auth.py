@@ -6,6 +6,55 @@ from core.config import settings
 from core.logger import logger
 from middleware.request_id import get_request_id
 from contextvars import ContextVar
+from typing import Optional, Tuple
+
+
+def check_api_key(api_key: Optional[str], path: str = "") -> Optional[Tuple[int, str]]:
+    """
+    Validate a service-to-service API key
+
+    Args:
+        api_key: Value of the X-API-Key or Authorization header, "Bearer <key>" is accepted
+        path: Request path, used for logging only
+
+    Returns:
+        None if the key is valid, otherwise a (status_code, detail) tuple
+    """
+    request_id = get_request_id()
+    if not api_key:
+        logger.warning(
+            "API key missing in request",
+            extra={"request_id": request_id, "path": path}
+        )
+        return (
+            status.HTTP_401_UNAUTHORIZED,
+            "API key is required. Please provide X-API-Key header or Authorization header with Bearer token.",
+        )
+    
+    # Extract key from "Bearer <key>" format if using Authorization header
+    if api_key.startswith("Bearer "):
+        api_key = api_key[7:]
+    
+    # Check if API key is configured
+    if not settings.api_key:
+        logger.error(
+            "API key authentication is enabled but no API key is configured",
+            extra={"request_id": request_id}
+        )
+        return status.HTTP_500_INTERNAL_SERVER_ERROR, "API key authentication is misconfigured"
+    
+    # Check if API key matches configured key
+    if api_key != settings.api_key:
+        logger.warning(
+            "Invalid API key provided",
+            extra={
+                "request_id": request_id,
+                "path": path,
+                "provided_key_prefix": api_key[:8] + "..." if len(api_key) > 8 else "***"
+            }
+        )
+        return status.HTTP_403_FORBIDDEN, "Invalid API key"
+    return None
 
 
 class APIKeyMiddleware(BaseHTTPMiddleware):
@@ -65,52 +114,14 @@ class APIKeyMiddleware(BaseHTTPMiddleware):
             
             # Get API key from request header
             api_key = request.headers.get("X-API-Key") or request.headers.get("Authorization")
-            if not api_key:
-                request_id = get_request_id()
-                logger.warning(
-                    "API key missing in request",
-                    extra={"request_id": request_id, "path": request.url.path}
-                )
-                return self._create_error_response(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="API key is required. Please provide X-API-Key header or Authorization header with Bearer token.",
-                    request_id=request_id,
-                    headers={"WWW-Authenticate": "ApiKey"}
-                )
-            
-            # Extract key from "Bearer <key>" format if using Authorization header
-            if api_key and api_key.startswith("Bearer "):
-                api_key = api_key[7:]
-            
-            # Check if API key is configured
-            if not settings.api_key:
-                request_id = get_request_id()
-                logger.error(
-                    "API key authentication is enabled but no API key is configured",
-                    extra={"request_id": request_id}
-                )
-                return self._create_error_response(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="API key authentication is misconfigured",
-                    request_id=request_id
-                )
-            
-            # Check if API key matches configured key
-            if api_key != settings.api_key:
-                request_id = get_request_id()
-                logger.warning(
-                    "Invalid API key provided",
-                    extra={
-                        "request_id": request_id,
-                        "path": request.url.path,
-                        "provided_key_prefix": api_key[:8] + "..." if len(api_key) > 8 else "***"
-                    }
-                )
+            error = check_api_key(api_key, request_path)
+            if error is not None:
+                status_code, detail = error
                 return self._create_error_response(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Invalid API key",
-                    request_id=request_id,
-                    headers={"WWW-Authenticate": "ApiKey"}
+                    status_code=status_code,
+                    detail=detail,
+                    request_id=get_request_id(),
+                    headers={"WWW-Authenticate": "ApiKey"} if status_code != status.HTTP_500_INTERNAL_SERVER_ERROR else None
                 )
             
             # API key is valid, proceed with request
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import functools
 from typing import Tuple
 import re
 from src.common import BaseResult, BaseError
@@ -15,8 +16,22 @@ from .schema import (
     TakeScreenshotRequest,
     GetCursorPositionRequest,
     GetScreenSizeRequest,
+    InvalidateCacheRequest,
+    WaitForScreenChangeRequest,
+    WaitUntilStableRequest,
+    ScreenWaitResource,
+    LocateImageRequest,
+    LocateImageResource,
+    GetPixelsRequest,
+    PixelsResource,
+    WaitForPixelsRequest,
+    PixelsWaitResource,
     ScreenshotResponse,
+    ScreenshotResource,
+    ScreenshotImage,
 )
+from .executor import run_input
+from .observation import observation_cache
 from core.logger import logger
 from mcp import types
 
@@ -57,10 +72,34 @@ class IComputerTool(ABC):
     def wait(self, request: WaitRequest):
         pass
 
+    @abstractmethod
+    async def wait_for_screen_change(self, request: WaitForScreenChangeRequest) -> ScreenWaitResource:
+        pass
+
+    @abstractmethod
+    async def wait_until_stable(self, request: WaitUntilStableRequest) -> ScreenWaitResource:
+        pass
+
+    @abstractmethod
+    async def get_pixels(self, request: GetPixelsRequest) -> PixelsResource:
+        pass
+
+    @abstractmethod
+    async def wait_for_pixels(self, request: WaitForPixelsRequest) -> PixelsWaitResource:
+        pass
+
+    @abstractmethod
+    async def locate_image(self, request: LocateImageRequest) -> LocateImageResource:
+        pass
+
     @abstractmethod
     def take_screenshot(self, request: TakeScreenshotRequest) -> ScreenshotResponse:
         pass
 
+    @abstractmethod
+    def capture_screenshot(self, request: TakeScreenshotRequest) -> ScreenshotImage:
+        pass
+
     @abstractmethod
     def get_cursor_position(self, request: GetCursorPositionRequest) -> Tuple[int, int]:
         pass
@@ -69,20 +108,29 @@ class IComputerTool(ABC):
     def get_screen_size(self, request: GetScreenSizeRequest) -> Tuple[int, int]:
         pass
 
+    @abstractmethod
+    def invalidate_cache(self, request: InvalidateCacheRequest):
+        pass
+
 
 
 def wrap_pyautogui_async(fn):
+    """Run a blocking input method on the input thread, keeping the event loop free"""
+    @functools.wraps(fn)
     async def wrapper(*args, **kwargs):
+        # Input invalidates cached observations, also those read while it runs. The second
+        # bump follows the job itself, which goes on on the input thread if the request is cancelled
+        observation_cache.bump()
         try:
-            result = fn(*args, **kwargs)
-            if isinstance(result, (BaseResult, BaseError)):
-                return result
-            elif result is None:
-                return BaseResult(output="", error="")
-            else:
-                return BaseResult(output=f"{result}", error="")
+            result = await run_input(fn, *args, on_done=observation_cache.bump, **kwargs)
         except Exception as e:
             raise BaseError(f"pyautogui error: {e}")
+        if isinstance(result, (BaseResult, BaseError)):
+            return result
+        elif result is None:
+            return BaseResult(output="", error="")
+        else:
+            return BaseResult(output=f"{result}", error="")
 
     return wrapper
 
@@ -130,3 +178,30 @@ def handle_error(action_name, error=None):
     }
 
     return handlers[error is not None]()
+
+
+def delta_screenshot_contents(screenshot: ScreenshotResource) -> list:
+    """Build MCP contents for a delta screenshot: a description followed by one image per changed tile
+
+    Args:
+        screenshot: Result of a TakeScreenshot request in delta mode
+
+    Returns:
+        A list of TextContent and ImageContent objects
+    """
+    mime_type = f"image/{screenshot.format}"
+    info = {"width": screenshot.width, "height": screenshot.height, "keyframe": screenshot.keyframe}
+    if screenshot.keyframe:
+        return [
+            types.TextContent(type="text", text=str(info)),
+            types.ImageContent(type="image", data=screenshot.screenshot, mimeType=mime_type),
+        ]
+    tiles = screenshot.tiles or []
+    if not tiles:
+        info["unchanged"] = True
+        return [types.TextContent(type="text", text=str(info))]
+    # Tile images follow in the same order as their [left, top, width, height] boxes
+    info["tiles"] = [[tile.left, tile.top, tile.width, tile.height] for tile in tiles]
+    return [types.TextContent(type="text", text=str(info))] + [
+        types.ImageContent(type="image", data=tile.screenshot, mimeType=mime_type) for tile in tiles
+    ]
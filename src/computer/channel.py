@@ -0,0 +1,196 @@
+"""Persistent WebSocket action channel to Computer Use Tool Servers"""
+import asyncio
+import itertools
+import json
+import time
+from typing import Dict, Any, Optional, Tuple
+from websockets.asyncio.client import connect, ClientConnection
+from websockets.exceptions import ConnectionClosed
+from core.logger import logger
+from core.config import settings
+from .connection import connection_manager
+
+
+class ChannelError(Exception):
+    """Raised when a request could not be completed over the action channel"""
+
+    def __init__(self, message: str, sent: bool = False):
+        super().__init__(message)
+        # Whether the request frame reached the socket, the action may have run on the node
+        self.sent = sent
+
+
+class ChannelRequestError(Exception):
+    """Raised when the tool server answered a channel request with an error status"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class ActionChannel:
+    """
+    One multiplexed WebSocket connection to a tool server.
+
+    Requests are framed as JSON with an id and may be in flight concurrently,
+    a single reader task correlates the replies back to their waiters.
+    """
+
+    def __init__(self, connection: ClientConnection, endpoint: str):
+        self.endpoint = endpoint
+        self._connection = connection
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._reader = asyncio.create_task(self._read_loop())
+
+    @property
+    def closed(self) -> bool:
+        return self._reader.done()
+
+    async def _read_loop(self):
+        try:
+            async for message in self._connection:
+                try:
+                    reply = json.loads(message)
+                except ValueError:
+                    logger.warning("Invalid frame from action channel {}", self.endpoint)
+                    continue
+                future = self._pending.pop(str(reply.get("id")), None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except ConnectionClosed:
+            pass
+        finally:
+            logger.info("Action channel to {} closed", self.endpoint)
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ChannelError("Action channel closed", sent=True))
+            self._pending.clear()
+
+    async def request(self, action: str, params: Dict[str, Any], timeout: float, idempotency_key: str = None) -> Dict[str, Any]:
+        """
+        Send one action and wait for its reply
+
+        Args:
+            action: Action name
+            params: Parameters for the action
+            timeout: Seconds to wait for the reply
+            idempotency_key: Key shared by the retries of one logical action
+
+        Returns:
+            Response envelope from the server
+
+        Raises:
+            ChannelError: If the channel failed, see ChannelError.sent
+            ChannelRequestError: If the server answered with an error status
+        """
+        if self.closed:
+            raise ChannelError("Action channel closed")
+        frame_id = str(next(self._ids))
+        future = asyncio.get_running_loop().create_future()
+        self._pending[frame_id] = future
+        try:
+            # timeout_ms lets the server abort the action once nobody waits for it
+            frame = {
+                "id": frame_id,
+                "action": action,
+                "params": params,
+                "timeout_ms": int(timeout * 1000),
+            }
+            if idempotency_key:
+                frame["idempotency_key"] = idempotency_key
+            await self._connection.send(json.dumps(frame))
+        except ConnectionClosed as e:
+            self._pending.pop(frame_id, None)
+            raise ChannelError(f"Action channel closed: {e}") from e
+        try:
+            reply = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError as e:
+            raise ChannelError(f"Timed out waiting for {action} after {timeout}s", sent=True) from e
+        finally:
+            self._pending.pop(frame_id, None)
+        status_code = reply.pop("Status", 200)
+        reply.pop("id", None)
+        if status_code >= 400:
+            result = reply.get("Result") or {}
+            raise ChannelRequestError(status_code, str(result.get("error")))
+        return reply
+
+    async def aclose(self):
+        await self._connection.close()
+        await asyncio.gather(self._reader, return_exceptions=True)
+
+
+class ChannelManager:
+    """
+    Keep one action channel per (tool server endpoint, api key).
+
+    Endpoints whose channel cannot be opened, e.g. tool servers without the
+    WebSocket route, are skipped for ws_retry_interval seconds so callers fall
+    back to HTTP without paying a failed handshake on every action.
+    """
+
+    def __init__(self):
+        self._channels: Dict[Tuple[str, str], ActionChannel] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._unavailable_until: Dict[Tuple[str, str], float] = {}
+
+    @staticmethod
+    def _ws_url(endpoint: str) -> str:
+        url = connection_manager.computer_url(endpoint, "ws")
+        if url.startswith("https://"):
+            return "wss://" + url[len("https://"):]
+        if url.startswith("http://"):
+            return "ws://" + url[len("http://"):]
+        return url
+
+    async def get_channel(self, endpoint: str, api_key: Optional[str] = None) -> Optional[ActionChannel]:
+        """
+        Get an open channel to an endpoint, connecting if needed
+
+        Returns:
+            The channel, or None if the endpoint has no usable channel right now
+        """
+        if not settings.ws_enabled or not endpoint:
+            return None
+        key = (endpoint.rstrip("/"), api_key or "")
+        channel = self._channels.get(key)
+        if channel is not None and not channel.closed:
+            return channel
+        if self._unavailable_until.get(key, 0) > time.monotonic():
+            return None
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            channel = self._channels.get(key)
+            if channel is not None and not channel.closed:
+                return channel
+            if self._unavailable_until.get(key, 0) > time.monotonic():
+                return None
+            headers = {"X-API-Key": api_key} if api_key else None
+            try:
+                connection = await connect(
+                    self._ws_url(endpoint),
+                    additional_headers=headers,
+                    open_timeout=settings.http_connect_timeout,
+                    max_size=None,
+                )
+            except Exception as e:
+                logger.warning("Action channel to {} unavailable, using HTTP: {}", endpoint, e)
+                self._unavailable_until[key] = time.monotonic() + settings.ws_retry_interval
+                return None
+            channel = ActionChannel(connection, key[0])
+            self._channels[key] = channel
+            logger.info("Action channel to {} opened", key[0])
+            return channel
+
+    async def aclose(self):
+        """Close all channels"""
+        channels = list(self._channels.values())
+        self._channels.clear()
+        for channel in channels:
+            await channel.aclose()
+
+
+# Create global channel manager instance
+channel_manager = ChannelManager()
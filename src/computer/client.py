@@ -1,7 +1,17 @@
-from typing import Dict, Any, Literal
+import base64
+import time
+from functools import lru_cache
+from uuid import uuid4
+from typing import Dict, Any, Literal, List, Tuple
 import httpx
-from loguru import logger 
+from core.logger import logger
 from core.config import settings
+from src.computer.connection import connection_manager
+from src.computer.channel import channel_manager, ChannelError
+from src.computer.base import snake_to_camel, camel_to_snake
+from src.computer.resilience import resilience, is_retryable, HEDGED_ACTIONS
+from src.computer.scheduler import READ_ACTIONS
+from core.constants import IDEMPOTENCY_KEY_HEADER
 
 from src.computer.schema import (
     MoveMouseRequest,
@@ -16,14 +26,76 @@ from src.computer.schema import (
     TakeScreenshotRequest,
     GetCursorPositionRequest,
     GetScreenSizeRequest,
+    InvalidateCacheRequest,
+    WaitForScreenChangeRequest,
+    WaitUntilStableRequest,
+    LocateImageRequest,
+    GetPixelsRequest,
+    WaitForPixelsRequest,
+    PixelProbe,
+    BatchActionsRequest,
     BaseResponse,
 )
 from src.computer.schema import (
     CursorPositionResponse,
     ScreenSizeResponse,
     ScreenshotResponse,
+    ScreenWaitResponse,
+    LocateImageResponse,
+    PixelsResponse,
+    PixelsWaitResponse,
+    BatchActionsResponse,
+    ScreenshotImage,
 )
 
+def screenshot_image_from_response(response: httpx.Response) -> ScreenshotImage:
+    """Build a ScreenshotImage from a binary screenshot response"""
+    headers = response.headers
+    return ScreenshotImage(
+        data=response.content,
+        format=headers.get("X-Screenshot-Format", "png"),
+        width=int(headers.get("X-Screenshot-Width", 0)),
+        height=int(headers.get("X-Screenshot-Height", 0)),
+        screen_width=int(headers.get("X-Screen-Width", 0)),
+        screen_height=int(headers.get("X-Screen-Height", 0)),
+        scale=float(headers.get("X-Screenshot-Scale", 1.0)),
+        left=int(headers.get("X-Screenshot-Left", 0)),
+        top=int(headers.get("X-Screenshot-Top", 0)),
+        captured_at=int(headers.get("X-Screenshot-Captured-At", 0)),
+    )
+
+def screenshot_query_params(request: TakeScreenshotRequest) -> Dict[str, Any]:
+    """Build the query parameters of the binary screenshot endpoint"""
+    params = request.model_dump(by_alias=True, exclude_none=True, exclude={"region", "delta", "keyframe", "session"})
+    if request.region is not None:
+        params["Region"] = ",".join(str(v) for v in request.region.as_tuple())
+    return params
+
+def template_string(template: bytes | str) -> str:
+    """Base64 form of a template image, strings are passed through as already encoded"""
+    if isinstance(template, bytes):
+        return base64.b64encode(template).decode()
+    return template
+
+def pixel_probes(pixels: List[Any], colors: List[Tuple[int, int, int]] = None) -> List[PixelProbe]:
+    """
+    Build pixel probes from (x, y) or (x, y, width, height) sequences
+
+    Args:
+        pixels: Points or small areas
+        colors: Expected RGB colour of each probe, for wait_for_pixels
+
+    Raises:
+        ValueError: If the number of colours does not match the number of pixels
+    """
+    probes = [PixelProbe.model_validate(pixel) for pixel in pixels]
+    if colors is not None:
+        if len(colors) != len(probes):
+            raise ValueError("One color is needed per pixel")
+        for probe, color in zip(probes, colors):
+            probe.color = list(color)
+    return probes
+
 class ComputerUseMCPClient:
     def __init__(self, base_url: str, api_key: str = None):
         """
@@ -46,6 +118,11 @@ class ComputerUseMCPClient:
         """
         Make a request to the Computer Use Tool Server
         
+        Every attempt carries the same idempotency key, so the tool server runs
+        the action at most once. Idempotent observations, and input actions
+        when settings.retry_input_actions is set, are retried after connection
+        errors, 5xx and 429.
+        
         Args:
             action: Action to perform
             params: Parameters for the action
@@ -53,33 +130,46 @@ class ComputerUseMCPClient:
         Returns:
             Response from the server
         """
-        url = self.base_url + "/api/computer/" + action
-        
-        # Use existing client if available (from context manager), otherwise create a new one
-        try:
-            with httpx.Client() as client:
-                response = client.post(url, json=params, headers=self.headers)
+        url = connection_manager.computer_url(self.base_url, action)
+        timeout = connection_manager.get_timeout(action, params)
+        headers = {
+            **self.headers,
+            **connection_manager.deadline_headers(timeout),
+            IDEMPOTENCY_KEY_HEADER: uuid4().hex,
+        }
+        name = camel_to_snake(action)
+        # Delta screenshots advance the session's reference frame, they are not idempotent
+        retry = (name in READ_ACTIONS and not (params or {}).get("Delta")) or settings.retry_input_actions
+        attempts = 1 + (settings.retry_attempts if retry else 0)
+
+        for attempt in range(attempts):
+            # Reuse the pooled keep-alive client of this endpoint
+            try:
+                client = connection_manager.get_client(self.base_url)
+                response = client.post(url, json=params, headers=headers, timeout=timeout)
                 response.raise_for_status()
                 return response.json()
-        except httpx.RequestError as e:
-            logger.error(f"Error making request to {url}: {str(e)}")
-            raise e
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Error making request to {url}: {str(e)}")
-            raise e
+            except (httpx.RequestError, httpx.HTTPStatusError) as e:
+                if attempt == attempts - 1 or not is_retryable(e):
+                    logger.error(f"Error making request to {url}: {str(e)}")
+                    raise e
+                delay = resilience.backoff(attempt)
+                logger.warning(f"Retrying request to {url} in {delay:.2f}s after: {str(e)}")
+                time.sleep(delay)
 
-    def move_mouse(self, x: int, y: int) -> BaseResponse:
+    def move_mouse(self, x: int, y: int, coordinate_scale: float = 1.0) -> BaseResponse:
         """
         Move the mouse to the specified position
         
         Args:
             x: X position
             y: Y position
+            coordinate_scale: Scale of the screenshot the coordinates refer to
             
         Returns:
             Response from the server
         """
-        request = MoveMouseRequest(PositionX=x, PositionY=y)
+        request = MoveMouseRequest(PositionX=x, PositionY=y, coordinate_scale=coordinate_scale)
         response_data = self._make_request("MoveMouse", request.model_dump(by_alias=True))
         return BaseResponse(**response_data)
 
@@ -89,7 +179,8 @@ class ComputerUseMCPClient:
             y: int,
             button: Literal["left", "right", "middle", "double_click", "double_left"] = "left",
             press: bool = False,
-            release: bool = False
+            release: bool = False,
+            coordinate_scale: float = 1.0
     ) -> BaseResponse:
         """
         Click the mouse at the specified position
@@ -100,6 +191,7 @@ class ComputerUseMCPClient:
             button: Mouse button to click
             press: Whether to press the mouse button
             release: Whether to release the mouse button
+            coordinate_scale: Scale of the screenshot the coordinates refer to
             
         Returns:
             Response from the server
@@ -109,7 +201,8 @@ class ComputerUseMCPClient:
             PositionY=y,
             button=button,
             press=press,
-            release=release
+            release=release,
+            coordinate_scale=coordinate_scale
         )
         response_data = self._make_request("ClickMouse", request.model_dump(by_alias=True))
         return BaseResponse(**response_data)
@@ -118,7 +211,8 @@ class ComputerUseMCPClient:
             self,
             x: int,
             y: int,
-            button: Literal["left", "right", "middle"] = "left"
+            button: Literal["left", "right", "middle"] = "left",
+            coordinate_scale: float = 1.0
     ) -> BaseResponse:
         """
         Press the mouse button at the specified position
@@ -127,6 +221,7 @@ class ComputerUseMCPClient:
             x: X position
             y: Y position
             button: Mouse button to press
+            coordinate_scale: Scale of the screenshot the coordinates refer to
             
         Returns:
             Response from the server
@@ -134,7 +229,8 @@ class ComputerUseMCPClient:
         request = PressMouseRequest(
             PositionX=x,
             PositionY=y,
-            button=button
+            button=button,
+            coordinate_scale=coordinate_scale
         )
         response_data = self._make_request("PressMouse", request.model_dump(by_alias=True))
         return BaseResponse(**response_data)
@@ -143,7 +239,8 @@ class ComputerUseMCPClient:
             self,
             x: int,
             y: int,
-            button: Literal["left", "right", "middle"] = "left"
+            button: Literal["left", "right", "middle"] = "left",
+            coordinate_scale: float = 1.0
     ) -> BaseResponse:
         """
         Release the mouse button at the specified position
@@ -152,6 +249,7 @@ class ComputerUseMCPClient:
             x: X position
             y: Y position
             button: Mouse button to release
+            coordinate_scale: Scale of the screenshot the coordinates refer to
             
         Returns:
             Response from the server
@@ -159,7 +257,8 @@ class ComputerUseMCPClient:
         request = ReleaseMouseRequest(
             PositionX=x,
             PositionY=y,
-            button=button
+            button=button,
+            coordinate_scale=coordinate_scale
         )
         response_data = self._make_request("ReleaseMouse", request.model_dump(by_alias=True))
         return BaseResponse(**response_data)
@@ -169,7 +268,11 @@ class ComputerUseMCPClient:
             source_x: int,
             source_y: int,
             target_x: int,
-            target_y: int
+            target_y: int,
+            coordinate_scale: float = 1.0,
+            duration: int = None,
+            profile: Literal["linear", "ease", "bezier"] = None,
+            fast: bool = False
     ) -> BaseResponse:
         """
         Drag the mouse from source to target position
@@ -179,6 +282,10 @@ class ComputerUseMCPClient:
             source_y: Source Y position
             target_x: Target X position
             target_y: Target Y position
+            coordinate_scale: Scale of the screenshot the coordinates refer to
+            duration: Drag duration in milliseconds, defaults to the server setting
+            profile: Motion profile: linear, ease or bezier
+            fast: Minimal intermediate points
             
         Returns:
             Response from the server
@@ -187,7 +294,11 @@ class ComputerUseMCPClient:
             source_x=source_x,
             source_y=source_y,
             target_x=target_x,
-            target_y=target_y
+            target_y=target_y,
+            coordinate_scale=coordinate_scale,
+            duration=duration,
+            profile=profile,
+            fast=fast,
         )
         response_data = self._make_request("DragMouse", request.model_dump(by_alias=True))
         return BaseResponse(**response_data)
@@ -197,7 +308,8 @@ class ComputerUseMCPClient:
             x: int,
             y: int,
             scroll_direction: Literal["up", "down", "left", "right"] = "up",
-            scroll_amount: int = 1
+            scroll_amount: int = 1,
+            coordinate_scale: float = 1.0
     ) -> BaseResponse:
         """
         Scroll at the specified position
@@ -207,6 +319,7 @@ class ComputerUseMCPClient:
             y: Y position
             scroll_direction: Direction to scroll
             scroll_amount: Amount to scroll
+            coordinate_scale: Scale of the screenshot the coordinates refer to
             
         Returns:
             Response from the server
@@ -215,7 +328,8 @@ class ComputerUseMCPClient:
             PositionX=x,
             PositionY=y,
             scroll_direction=scroll_direction,
-            scroll_amount=scroll_amount
+            scroll_amount=scroll_amount,
+            coordinate_scale=coordinate_scale
         )
         response_data = self._make_request("Scroll", request.model_dump(by_alias=True))
         return BaseResponse(**response_data)
@@ -262,17 +376,120 @@ class ComputerUseMCPClient:
         response_data = self._make_request("Wait", request.model_dump(by_alias=True))
         return BaseResponse(**response_data)
 
-    def take_screenshot(self) -> ScreenshotResponse:
+    def take_screenshot(
+            self,
+            format: Literal["png", "jpeg", "webp"] = None,
+            quality: int = None,
+            compress_level: int = None,
+            scale: float = None,
+            max_width: int = None,
+            max_height: int = None,
+            region: Tuple[int, int, int, int] = None,
+            coordinate_scale: float = 1.0,
+            delta: bool = False,
+            keyframe: bool = False,
+            session: str = None,
+            after: int = None
+    ) -> ScreenshotResponse:
         """
         Take a screenshot
         
+        Args:
+            format: Image format, defaults to the server setting
+            quality: JPEG/WebP quality (1-100)
+            compress_level: PNG compression level (0-9)
+            scale: Downscale factor in (0, 1]
+            max_width: Maximum image width, the screenshot is downscaled to fit
+            max_height: Maximum image height, the screenshot is downscaled to fit
+            region: Capture only this (left, top, width, height) screen area
+            coordinate_scale: Scale of the screenshot the region refers to
+            delta: Return only the tiles changed since the last delta screenshot of the session
+            keyframe: In delta mode, return the full frame and make it the new reference
+            session: Session the delta reference frame is kept for
+            after: Unix time in milliseconds, use the first frame captured at or after it
+            
         Returns:
             Response from the server with screenshot data
         """
-        request = TakeScreenshotRequest()
+        request = TakeScreenshotRequest(
+            format=format,
+            quality=quality,
+            compress_level=compress_level,
+            scale=scale,
+            max_width=max_width,
+            max_height=max_height,
+            region=region,
+            coordinate_scale=coordinate_scale,
+            delta=delta,
+            keyframe=keyframe,
+            session=session,
+            after=after,
+        )
         response_data = self._make_request("TakeScreenshot", request.model_dump(by_alias=True))
         return ScreenshotResponse(**response_data)
 
+    def take_screenshot_image(
+            self,
+            format: Literal["png", "jpeg", "webp"] = None,
+            quality: int = None,
+            compress_level: int = None,
+            scale: float = None,
+            max_width: int = None,
+            max_height: int = None,
+            region: Tuple[int, int, int, int] = None,
+            coordinate_scale: float = 1.0,
+            after: int = None
+    ) -> ScreenshotImage:
+        """
+        Take a screenshot through the binary screenshot endpoint
+        
+        Avoids the base64 and JSON overhead of take_screenshot, the image bytes
+        are transferred as-is and the metadata is read from the response headers.
+        
+        Args:
+            format: Image format, defaults to the server setting
+            quality: JPEG/WebP quality (1-100)
+            compress_level: PNG compression level (0-9)
+            scale: Downscale factor in (0, 1]
+            max_width: Maximum image width, the screenshot is downscaled to fit
+            max_height: Maximum image height, the screenshot is downscaled to fit
+            region: Capture only this (left, top, width, height) screen area
+            coordinate_scale: Scale of the screenshot the region refers to
+            after: Unix time in milliseconds, use the first frame captured at or after it
+            
+        Returns:
+            Encoded screenshot bytes with their metadata
+        """
+        request = TakeScreenshotRequest(
+            format=format,
+            quality=quality,
+            compress_level=compress_level,
+            scale=scale,
+            max_width=max_width,
+            max_height=max_height,
+            region=region,
+            coordinate_scale=coordinate_scale,
+            after=after,
+        )
+        url = connection_manager.computer_url(self.base_url, "screenshot")
+        try:
+            client = connection_manager.get_client(self.base_url)
+            timeout = connection_manager.get_timeout("TakeScreenshot")
+            response = client.get(
+                url,
+                params=screenshot_query_params(request),
+                headers={**self.headers, **connection_manager.deadline_headers(timeout), "Accept": "image/*"},
+                timeout=timeout,
+            )
+            response.raise_for_status()
+            return screenshot_image_from_response(response)
+        except httpx.RequestError as e:
+            logger.error(f"Error making request to {url}: {str(e)}")
+            raise e
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error making request to {url}: {str(e)}")
+            raise e
+
     def get_cursor_position(self) -> CursorPositionResponse:
         """
         Get the current cursor position
@@ -295,6 +512,580 @@ class ComputerUseMCPClient:
         response_data = self._make_request("GetScreenSize", request.model_dump(by_alias=True))
         return ScreenSizeResponse(**response_data)
 
+    def invalidate_cache(self) -> BaseResponse:
+        """
+        Drop cached observations on the server, the next reads capture afresh
+        
+        Returns:
+            Response from the server
+        """
+        request = InvalidateCacheRequest()
+        response_data = self._make_request("InvalidateCache", request.model_dump(by_alias=True))
+        return BaseResponse(**response_data)
+
+    def wait_for_screen_change(
+            self,
+            region: Tuple[int, int, int, int] = None,
+            timeout: int = 10000,
+            interval: int = None,
+            coordinate_scale: float = 1.0
+    ) -> ScreenWaitResponse:
+        """
+        Wait on the server until the screen changes
+        
+        Args:
+            region: Watch only this (left, top, width, height) screen area
+            timeout: Maximum wait in milliseconds
+            interval: Milliseconds between checks, defaults to the server setting
+            coordinate_scale: Scale of the screenshot the region refers to
+            
+        Returns:
+            Response with Result.changed, or Result.timed_out if the screen did not change in time
+        """
+        request = WaitForScreenChangeRequest(
+            region=region, timeout=timeout, interval=interval, coordinate_scale=coordinate_scale
+        )
+        response_data = self._make_request("WaitForScreenChange", request.model_dump(by_alias=True))
+        return ScreenWaitResponse(**response_data)
+
+    def wait_until_stable(
+            self,
+            stable: int = 500,
+            region: Tuple[int, int, int, int] = None,
+            timeout: int = 10000,
+            interval: int = None,
+            coordinate_scale: float = 1.0
+    ) -> ScreenWaitResponse:
+        """
+        Wait on the server until the screen stops changing
+        
+        Args:
+            stable: Milliseconds the screen must stay unchanged
+            region: Watch only this (left, top, width, height) screen area
+            timeout: Maximum wait in milliseconds
+            interval: Milliseconds between checks, defaults to the server setting
+            coordinate_scale: Scale of the screenshot the region refers to
+            
+        Returns:
+            Response with Result.stable, or Result.timed_out if the screen kept changing
+        """
+        request = WaitUntilStableRequest(
+            stable=stable, region=region, timeout=timeout, interval=interval, coordinate_scale=coordinate_scale
+        )
+        response_data = self._make_request("WaitUntilStable", request.model_dump(by_alias=True))
+        return ScreenWaitResponse(**response_data)
+
+    def locate_image(
+            self,
+            template: bytes | str,
+            region: Tuple[int, int, int, int] = None,
+            confidence: float = 0.9,
+            limit: int = 10,
+            coordinate_scale: float = 1.0
+    ) -> LocateImageResponse:
+        """
+        Find a template image on the screen
+        
+        Args:
+            template: Encoded template image bytes, or the base64 string of them
+            region: Search only this (left, top, width, height) screen area
+            confidence: Minimum match confidence from 0 to 1
+            limit: Maximum number of matches
+            coordinate_scale: Scale of the screenshot the template and region were taken from
+            
+        Returns:
+            Response containing the match boxes in Result.matches, best first
+        """
+        request = LocateImageRequest(
+            template=template_string(template),
+            region=region,
+            confidence=confidence,
+            limit=limit,
+            coordinate_scale=coordinate_scale,
+        )
+        response_data = self._make_request("LocateImage", request.model_dump(by_alias=True))
+        return LocateImageResponse(**response_data)
+
+    def get_pixels(self, pixels: List[Any], coordinate_scale: float = 1.0) -> PixelsResponse:
+        """
+        Sample pixel colours from one capture
+        
+        Args:
+            pixels: (x, y) points or (x, y, width, height) areas, areas report their mean colour
+            coordinate_scale: Scale of the screenshot the coordinates refer to
+            
+        Returns:
+            Response containing the RGB colours in Result.pixels, in request order
+        """
+        request = GetPixelsRequest(pixels=pixel_probes(pixels), coordinate_scale=coordinate_scale)
+        response_data = self._make_request("GetPixels", request.model_dump(by_alias=True))
+        return PixelsResponse(**response_data)
+
+    def wait_for_pixels(
+            self,
+            pixels: List[Any],
+            colors: List[Tuple[int, int, int]],
+            tolerance: int = 16,
+            mode: Literal["all", "any"] = "all",
+            timeout: int = 10000,
+            interval: int = None,
+            coordinate_scale: float = 1.0
+    ) -> PixelsWaitResponse:
+        """
+        Wait on the server until pixel colours match
+        
+        Args:
+            pixels: (x, y) points or (x, y, width, height) areas
+            colors: Expected RGB colour of each pixel
+            tolerance: Maximum difference per RGB channel
+            mode: Whether all or any pixel must match
+            timeout: Maximum wait in milliseconds
+            interval: Milliseconds between checks, defaults to the server setting
+            coordinate_scale: Scale of the screenshot the coordinates refer to
+            
+        Returns:
+            Response with Result.matched, or Result.timed_out, and the last sampled colours
+        """
+        request = WaitForPixelsRequest(
+            pixels=pixel_probes(pixels, colors),
+            tolerance=tolerance,
+            mode=mode,
+            timeout=timeout,
+            interval=interval,
+            coordinate_scale=coordinate_scale,
+        )
+        response_data = self._make_request("WaitForPixels", request.model_dump(by_alias=True))
+        return PixelsWaitResponse(**response_data)
+
+    def batch_actions(
+            self,
+            actions: List[Dict[str, Any]],
+            delay: int = 0,
+            stop_on_error: bool = True
+    ) -> BatchActionsResponse:
+        """
+        Execute an ordered sequence of actions in one round trip
+        
+        Args:
+            actions: Steps, each with "action", optional "params" and optional "delay" in milliseconds
+            delay: Delay in milliseconds between steps
+            stop_on_error: Whether to stop at the first failed step
+            
+        Returns:
+            Response containing per-step results in Result.steps
+        """
+        request = BatchActionsRequest(actions=actions, delay=delay, stop_on_error=stop_on_error)
+        response_data = self._make_request("batch", request.model_dump(by_alias=True))
+        return BatchActionsResponse(**response_data)
+
+    def run_action(self, action: str, params: Dict[str, Any] = None) -> BaseResponse:
+        """
+        Run an action by its name with raw parameters
+        
+        Args:
+            action: Action name, snake_case or CamelCase
+            params: Request parameters of the action
+            
+        Returns:
+            Response of the action
+        """
+        response_data = self._make_request(snake_to_camel(camel_to_snake(action)), params or {})
+        return BaseResponse(**response_data)
+
+class AsyncComputerUseMCPClient:
+    def __init__(self, base_url: str, api_key: str = None):
+        """
+        Initialize the asynchronous Computer Use SDK client
+
+        Mirrors ComputerUseMCPClient, but never blocks the event loop so many
+        MCP sessions can overlap their requests against many nodes.
+
+        Args:
+            base_url: Base URL of the Computer Use Tool Server
+            api_key: Optional API key for authentication
+        """
+        self.base_url = base_url
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+        # Add API key to headers if provided
+        if api_key:
+            self.headers["X-API-Key"] = api_key
+
+    async def _make_request(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Make a request to the Computer Use Tool Server
+
+        The request goes through the circuit breaker of the endpoint, idempotent
+        observations are retried and, if enabled, hedged. Every attempt carries
+        the same idempotency key, so with settings.retry_input_actions input
+        actions are retried too and the tool server still runs them at most once.
+
+        Args:
+            action: Action to perform
+            params: Parameters for the action
+
+        Returns:
+            Response from the server
+        """
+        name = camel_to_snake(action)
+        key = uuid4().hex
+        # Delta screenshots advance the session's reference frame, they are not idempotent
+        idempotent = name in READ_ACTIONS and not (params or {}).get("Delta")
+        return await resilience.call(
+            self.base_url, name, lambda: self._send_request(action, params, key),
+            idempotent=idempotent or settings.retry_input_actions, hedge=name in HEDGED_ACTIONS,
+        )
+
+    async def _send_request(self, action: str, params: Dict[str, Any], idempotency_key: str = None) -> Dict[str, Any]:
+        """Send one request to the Computer Use Tool Server"""
+        url = connection_manager.computer_url(self.base_url, action)
+        timeout = connection_manager.get_timeout(action, params)
+
+        # Prefer the persistent action channel, fall back to HTTP if the request never left
+        channel = await channel_manager.get_channel(self.base_url, self.headers.get("X-API-Key"))
+        if channel is not None:
+            try:
+                return await channel.request(action, params, timeout.read, idempotency_key)
+            except ChannelError as e:
+                if e.sent:
+                    logger.error(f"Error making request to {url} over action channel: {str(e)}")
+                    raise ConnectionError(str(e)) from e
+                logger.warning(f"Action channel to {self.base_url} failed, falling back to HTTP: {str(e)}")
+
+        # Reuse the pooled keep-alive client of this endpoint
+        try:
+            client = connection_manager.get_async_client(self.base_url)
+            headers = {**self.headers, **connection_manager.deadline_headers(timeout)}
+            if idempotency_key:
+                headers[IDEMPOTENCY_KEY_HEADER] = idempotency_key
+            response = await client.post(url, json=params, headers=headers, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+        except httpx.RequestError as e:
+            logger.error(f"Error making request to {url}: {str(e)}")
+            raise e
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error making request to {url}: {str(e)}")
+            raise e
+
+    async def move_mouse(self, x: int, y: int, coordinate_scale: float = 1.0) -> BaseResponse:
+        """Move the mouse to the specified position"""
+        request = MoveMouseRequest(PositionX=x, PositionY=y, coordinate_scale=coordinate_scale)
+        response_data = await self._make_request("MoveMouse", request.model_dump(by_alias=True))
+        return BaseResponse(**response_data)
+
+    async def click_mouse(
+            self,
+            x: int,
+            y: int,
+            button: Literal["left", "right", "middle", "double_click", "double_left"] = "left",
+            press: bool = False,
+            release: bool = False,
+            coordinate_scale: float = 1.0
+    ) -> BaseResponse:
+        """Click the mouse at the specified position"""
+        request = ClickMouseRequest(
+            PositionX=x,
+            PositionY=y,
+            button=button,
+            press=press,
+            release=release,
+            coordinate_scale=coordinate_scale
+        )
+        response_data = await self._make_request("ClickMouse", request.model_dump(by_alias=True))
+        return BaseResponse(**response_data)
+
+    async def press_mouse(
+            self,
+            x: int,
+            y: int,
+            button: Literal["left", "right", "middle"] = "left",
+            coordinate_scale: float = 1.0
+    ) -> BaseResponse:
+        """Press the mouse button at the specified position"""
+        request = PressMouseRequest(
+            PositionX=x,
+            PositionY=y,
+            button=button,
+            coordinate_scale=coordinate_scale
+        )
+        response_data = await self._make_request("PressMouse", request.model_dump(by_alias=True))
+        return BaseResponse(**response_data)
+
+    async def release_mouse(
+            self,
+            x: int,
+            y: int,
+            button: Literal["left", "right", "middle"] = "left",
+            coordinate_scale: float = 1.0
+    ) -> BaseResponse:
+        """Release the mouse button at the specified position"""
+        request = ReleaseMouseRequest(
+            PositionX=x,
+            PositionY=y,
+            button=button,
+            coordinate_scale=coordinate_scale
+        )
+        response_data = await self._make_request("ReleaseMouse", request.model_dump(by_alias=True))
+        return BaseResponse(**response_data)
+
+    async def drag_mouse(
+            self,
+            source_x: int,
+            source_y: int,
+            target_x: int,
+            target_y: int,
+            coordinate_scale: float = 1.0,
+            duration: int = None,
+            profile: Literal["linear", "ease", "bezier"] = None,
+            fast: bool = False
+    ) -> BaseResponse:
+        """Drag the mouse from source to target position"""
+        request = DragMouseRequest(
+            source_x=source_x,
+            source_y=source_y,
+            target_x=target_x,
+            target_y=target_y,
+            coordinate_scale=coordinate_scale,
+            duration=duration,
+            profile=profile,
+            fast=fast,
+        )
+        response_data = await self._make_request("DragMouse", request.model_dump(by_alias=True))
+        return BaseResponse(**response_data)
+
+    async def scroll(
+            self,
+            x: int,
+            y: int,
+            scroll_direction: Literal["up", "down", "left", "right"] = "up",
+            scroll_amount: int = 1,
+            coordinate_scale: float = 1.0
+    ) -> BaseResponse:
+        """Scroll at the specified position"""
+        request = ScrollRequest(
+            PositionX=x,
+            PositionY=y,
+            scroll_direction=scroll_direction,
+            scroll_amount=scroll_amount,
+            coordinate_scale=coordinate_scale
+        )
+        response_data = await self._make_request("Scroll", request.model_dump(by_alias=True))
+        return BaseResponse(**response_data)
+
+    async def press_key(self, key: str) -> BaseResponse:
+        """Press the specified key"""
+        request = PressKeyRequest(key=key)
+        response_data = await self._make_request("PressKey", request.model_dump(by_alias=True))
+        return BaseResponse(**response_data)
+
+    async def type_text(self, text: str) -> BaseResponse:
+        """Type the specified text"""
+        request = TypeTextRequest(text=text)
+        response_data = await self._make_request("TypeText", request.model_dump(by_alias=True))
+        return BaseResponse(**response_data)
+
+    async def wait(self, duration: int) -> BaseResponse:
+        """Wait for the specified duration in milliseconds"""
+        request = WaitRequest(duration=duration)
+        response_data = await self._make_request("Wait", request.model_dump(by_alias=True))
+        return BaseResponse(**response_data)
+
+    async def take_screenshot(
+            self,
+            format: Literal["png", "jpeg", "webp"] = None,
+            quality: int = None,
+            compress_level: int = None,
+            scale: float = None,
+            max_width: int = None,
+            max_height: int = None,
+            region: Tuple[int, int, int, int] = None,
+            coordinate_scale: float = 1.0,
+            delta: bool = False,
+            keyframe: bool = False,
+            session: str = None,
+            after: int = None
+    ) -> ScreenshotResponse:
+        """Take a screenshot"""
+        request = TakeScreenshotRequest(
+            format=format,
+            quality=quality,
+            compress_level=compress_level,
+            scale=scale,
+            max_width=max_width,
+            max_height=max_height,
+            region=region,
+            coordinate_scale=coordinate_scale,
+            delta=delta,
+            keyframe=keyframe,
+            session=session,
+            after=after,
+        )
+        response_data = await self._make_request("TakeScreenshot", request.model_dump(by_alias=True))
+        return ScreenshotResponse(**response_data)
+
+    async def take_screenshot_image(
+            self,
+            format: Literal["png", "jpeg", "webp"] = None,
+            quality: int = None,
+            compress_level: int = None,
+            scale: float = None,
+            max_width: int = None,
+            max_height: int = None,
+            region: Tuple[int, int, int, int] = None,
+            coordinate_scale: float = 1.0,
+            after: int = None
+    ) -> ScreenshotImage:
+        """Take a screenshot through the binary screenshot endpoint"""
+        request = TakeScreenshotRequest(
+            format=format,
+            quality=quality,
+            compress_level=compress_level,
+            scale=scale,
+            max_width=max_width,
+            max_height=max_height,
+            region=region,
+            coordinate_scale=coordinate_scale,
+            after=after,
+        )
+        return await resilience.call(
+            self.base_url, "take_screenshot", lambda: self._send_screenshot_request(request),
+            idempotent=True, hedge=True,
+        )
+
+    async def _send_screenshot_request(self, request: TakeScreenshotRequest) -> ScreenshotImage:
+        """Send one request to the binary screenshot endpoint"""
+        url = connection_manager.computer_url(self.base_url, "screenshot")
+        try:
+            client = connection_manager.get_async_client(self.base_url)
+            timeout = connection_manager.get_timeout("TakeScreenshot")
+            response = await client.get(
+                url,
+                params=screenshot_query_params(request),
+                headers={**self.headers, **connection_manager.deadline_headers(timeout), "Accept": "image/*"},
+                timeout=timeout,
+            )
+            response.raise_for_status()
+            return screenshot_image_from_response(response)
+        except httpx.RequestError as e:
+            logger.error(f"Error making request to {url}: {str(e)}")
+            raise e
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error making request to {url}: {str(e)}")
+            raise e
+
+    async def get_cursor_position(self) -> CursorPositionResponse:
+        """Get the current cursor position"""
+        request = GetCursorPositionRequest()
+        response_data = await self._make_request("GetCursorPosition", request.model_dump(by_alias=True))
+        return CursorPositionResponse(**response_data)
+
+    async def get_screen_size(self) -> ScreenSizeResponse:
+        """Get the screen size"""
+        request = GetScreenSizeRequest()
+        response_data = await self._make_request("GetScreenSize", request.model_dump(by_alias=True))
+        return ScreenSizeResponse(**response_data)
+
+    async def invalidate_cache(self) -> BaseResponse:
+        """Drop cached observations on the server, the next reads capture afresh"""
+        request = InvalidateCacheRequest()
+        response_data = await self._make_request("InvalidateCache", request.model_dump(by_alias=True))
+        return BaseResponse(**response_data)
+
+    async def wait_for_screen_change(
+            self,
+            region: Tuple[int, int, int, int] = None,
+            timeout: int = 10000,
+            interval: int = None,
+            coordinate_scale: float = 1.0
+    ) -> ScreenWaitResponse:
+        """Wait on the server until the screen changes"""
+        request = WaitForScreenChangeRequest(
+            region=region, timeout=timeout, interval=interval, coordinate_scale=coordinate_scale
+        )
+        response_data = await self._make_request("WaitForScreenChange", request.model_dump(by_alias=True))
+        return ScreenWaitResponse(**response_data)
+
+    async def wait_until_stable(
+            self,
+            stable: int = 500,
+            region: Tuple[int, int, int, int] = None,
+            timeout: int = 10000,
+            interval: int = None,
+            coordinate_scale: float = 1.0
+    ) -> ScreenWaitResponse:
+        """Wait on the server until the screen stops changing"""
+        request = WaitUntilStableRequest(
+            stable=stable, region=region, timeout=timeout, interval=interval, coordinate_scale=coordinate_scale
+        )
+        response_data = await self._make_request("WaitUntilStable", request.model_dump(by_alias=True))
+        return ScreenWaitResponse(**response_data)
+
+    async def locate_image(
+            self,
+            template: bytes | str,
+            region: Tuple[int, int, int, int] = None,
+            confidence: float = 0.9,
+            limit: int = 10,
+            coordinate_scale: float = 1.0
+    ) -> LocateImageResponse:
+        """Find a template image on the screen"""
+        request = LocateImageRequest(
+            template=template_string(template),
+            region=region,
+            confidence=confidence,
+            limit=limit,
+            coordinate_scale=coordinate_scale,
+        )
+        response_data = await self._make_request("LocateImage", request.model_dump(by_alias=True))
+        return LocateImageResponse(**response_data)
+
+    async def get_pixels(self, pixels: List[Any], coordinate_scale: float = 1.0) -> PixelsResponse:
+        """Sample pixel colours from one capture"""
+        request = GetPixelsRequest(pixels=pixel_probes(pixels), coordinate_scale=coordinate_scale)
+        response_data = await self._make_request("GetPixels", request.model_dump(by_alias=True))
+        return PixelsResponse(**response_data)
+
+    async def wait_for_pixels(
+            self,
+            pixels: List[Any],
+            colors: List[Tuple[int, int, int]],
+            tolerance: int = 16,
+            mode: Literal["all", "any"] = "all",
+            timeout: int = 10000,
+            interval: int = None,
+            coordinate_scale: float = 1.0
+    ) -> PixelsWaitResponse:
+        """Wait on the server until pixel colours match"""
+        request = WaitForPixelsRequest(
+            pixels=pixel_probes(pixels, colors),
+            tolerance=tolerance,
+            mode=mode,
+            timeout=timeout,
+            interval=interval,
+            coordinate_scale=coordinate_scale,
+        )
+        response_data = await self._make_request("WaitForPixels", request.model_dump(by_alias=True))
+        return PixelsWaitResponse(**response_data)
+
+    async def batch_actions(
+            self,
+            actions: List[Dict[str, Any]],
+            delay: int = 0,
+            stop_on_error: bool = True
+    ) -> BatchActionsResponse:
+        """Execute an ordered sequence of actions in one round trip"""
+        request = BatchActionsRequest(actions=actions, delay=delay, stop_on_error=stop_on_error)
+        response_data = await self._make_request("batch", request.model_dump(by_alias=True))
+        return BatchActionsResponse(**response_data)
+
+    async def run_action(self, action: str, params: Dict[str, Any] = None) -> BaseResponse:
+        """Run an action by its snake_case or CamelCase name with raw parameters"""
+        response_data = await self._make_request(snake_to_camel(camel_to_snake(action)), params or {})
+        return BaseResponse(**response_data)
+
 def get_computer_use_mcp_client(base_url: str = None, api_key: str = None) -> ComputerUseMCPClient:
     """
     Get the Computer Use MCP client
@@ -304,8 +1095,29 @@ def get_computer_use_mcp_client(base_url: str = None, api_key: str = None) -> Co
         api_key: Optional API key for authentication. If not provided, uses settings.api_key
     """
     try:
-        print(f"API key: {api_key}")
-        return ComputerUseMCPClient(base_url, api_key=api_key)
+        return _get_cached_client(base_url, api_key)
     except  Exception as e:
-        _local_client = ComputerUseMCPClient(base_url, api_key=api_key)
         raise ConnectionError(f"Cannot connect to tool server at {base_url}: {str(e)}") from e
+
+@lru_cache(maxsize=256)
+def _get_cached_client(base_url: str, api_key: str) -> ComputerUseMCPClient:
+    """Share one client per (endpoint, api key), its connections are pooled by connection_manager"""
+    return ComputerUseMCPClient(base_url, api_key=api_key)
+
+def get_async_computer_use_mcp_client(base_url: str = None, api_key: str = None) -> AsyncComputerUseMCPClient:
+    """
+    Get the asynchronous Computer Use MCP client
+
+    Args:
+        base_url: Base URL of the Computer Use Tool Server
+        api_key: Optional API key for authentication
+    """
+    try:
+        return _get_cached_async_client(base_url, api_key)
+    except  Exception as e:
+        raise ConnectionError(f"Cannot connect to tool server at {base_url}: {str(e)}") from e
+
+@lru_cache(maxsize=256)
+def _get_cached_async_client(base_url: str, api_key: str) -> AsyncComputerUseMCPClient:
+    """Share one async client per (endpoint, api key), its connections are pooled by connection_manager"""
+    return AsyncComputerUseMCPClient(base_url, api_key=api_key)
@@ -1,13 +1,32 @@
+import asyncio
 import base64
+import binascii
+import threading
 import time
 from fastapi import HTTPException
 import pyautogui
-from src.common import BaseError
+from src.common import BaseResult, BaseError
 from .schema import *
 from .base import IComputerTool, wrap_pyautogui_async, camel_to_snake
+from .imaging import encode_image, resize_image
+from .delta import delta_tracker
+from .executor import run_capture, call_capture, run_encode
+from .singleflight import screenshot_flights
+from .observation import observation_cache
+from .frames import frame_grabber, Frame
+from .motion import motion_points
+from .watch import screen_fingerprint, screen_changed
+from .locate import template_cache, locate
+from .pixels import mean_colors, colors_match, rounded
 from core.logger import logger
 from core.config import settings
 
+def to_screen(value: int, scale: float) -> int:
+    """Map a coordinate of a screenshot taken at the given scale back to screen coordinates"""
+    if not scale or scale == 1:
+        return value
+    return round(value / scale)
+
 class PyAutoGUIComputerTool(IComputerTool):
     def __init__(self):
         super().__init__()
@@ -15,23 +34,24 @@ class PyAutoGUIComputerTool(IComputerTool):
 
     @wrap_pyautogui_async
     def move_mouse(self, r: MoveMouseRequest):
-        return pyautogui.moveTo(r.x, r.y)
+        return pyautogui.moveTo(to_screen(r.x, r.coordinate_scale), to_screen(r.y, r.coordinate_scale))
 
     @wrap_pyautogui_async
     def click_mouse(self, r: ClickMouseRequest):
         button = r.button
         press = r.press
         release = r.release
-        x, y = r.x, r.y
+        x, y = to_screen(r.x, r.coordinate_scale), to_screen(r.y, r.coordinate_scale)
         if button is None or button == "":
             button = "left"
         button = camel_to_snake(button)
         if button not in ["left", "right", "middle", "double_left"]:
             raise HTTPException(status_code=400, detail=f"Invalid button")
+        # Already on the input thread, call the backend directly instead of the async methods
         if press and not release:
-            return self.press_mouse(PressMouseRequest(x=x, y=y, button=button))
+            return pyautogui.mouseDown(x, y, button=button.upper())
         elif release and not press:
-            return self.release_mouse(ReleaseMouseRequest(x=x, y=y, button=button))
+            return pyautogui.mouseUp(x, y, button=button.upper())
         else:
             clicks = 1
             if button == "double_click" or button == "double_left":
@@ -41,32 +61,60 @@ class PyAutoGUIComputerTool(IComputerTool):
 
     @wrap_pyautogui_async
     def press_mouse(self, r: PressMouseRequest):
-        return pyautogui.mouseDown(r.x, r.y, button=r.button.upper())
+        return pyautogui.mouseDown(to_screen(r.x, r.coordinate_scale), to_screen(r.y, r.coordinate_scale), button=r.button.upper())
 
     @wrap_pyautogui_async
     def release_mouse(self, r: ReleaseMouseRequest):
-        return pyautogui.mouseUp(r.x, r.y, button=r.button.upper())
+        return pyautogui.mouseUp(to_screen(r.x, r.coordinate_scale), to_screen(r.y, r.coordinate_scale), button=r.button.upper())
 
     async def drag_mouse(self, r: DragMouseRequest):
-        drag_path = gen_path(r.source_x, r.source_y, r.target_x, r.target_y)
-        if drag_path is None or len(drag_path) < 2:
-            raise BaseError(f"drag_path is required for drag")
-        for loc in drag_path:
-            if len(loc) != 2:
-                raise BaseError(f"drag_path location must be x, y")
-
-        await self.press_mouse(PressMouseRequest(x=drag_path[0][0], y=drag_path[0][1], button="left"))
-        for loc in drag_path:
-            time.sleep(settings.mouse_operate_interval)
-            await self.move_mouse(MoveMouseRequest(x=loc[0], y=loc[1]))
-        time.sleep(settings.mouse_operate_interval)
-        return await self.release_mouse(ReleaseMouseRequest(x=drag_path[-1][0], y=drag_path[-1][1], button="left"))
+        scale = r.coordinate_scale
+        source = (to_screen(r.source_x, scale), to_screen(r.source_y, scale))
+        target = (to_screen(r.target_x, scale), to_screen(r.target_y, scale))
+        duration = r.duration / 1000 if r.duration is not None else settings.drag_duration
+        try:
+            points = motion_points(source, target, r.profile or settings.drag_profile, duration, r.fast)
+        except ValueError as e:
+            raise BaseError(str(e))
+        hold = 1 / settings.drag_rate if r.fast else settings.mouse_operate_interval
+        cancelled = threading.Event()
+        try:
+            return await self._drag(source, points, hold, cancelled)
+        except asyncio.CancelledError:
+            # The input thread notices, stops moving and releases the button
+            cancelled.set()
+            raise
+
+    @wrap_pyautogui_async
+    def _drag(self, source, points, hold: float, cancelled: threading.Event):
+        """
+        Press, move along the scheduled points and release as one input job
+
+        Moves are timed against the start of the motion, a point whose slot has
+        already passed is skipped when the next one is also due. The button is
+        always released, also when the drag is cancelled.
+        """
+        pyautogui.mouseDown(source[0], source[1], button="LEFT")
+        try:
+            if cancelled.wait(hold):
+                return None
+            start = time.monotonic()
+            for index, (offset, x, y) in enumerate(points):
+                elapsed = time.monotonic() - start
+                if index < len(points) - 1 and points[index + 1][0] <= elapsed:
+                    continue
+                if offset > elapsed and cancelled.wait(offset - elapsed):
+                    return None
+                pyautogui.moveTo(x, y, _pause=False)
+            cancelled.wait(hold)
+        finally:
+            pyautogui.mouseUp(button="LEFT")
 
     @wrap_pyautogui_async
     def scroll(self, r: ScrollRequest):
         scroll_direction = r.scroll_direction
         scroll_amount = r.scroll_amount
-        x, y = r.x, r.y
+        x, y = to_screen(r.x, r.coordinate_scale), to_screen(r.y, r.coordinate_scale)
         scroll_amount = int(scroll_amount) * settings.scroll_scale
         self.logger.info("scroll in windows, amount: {}, direction: {}", scroll_amount, scroll_direction)
         if scroll_direction == "up":
@@ -95,32 +143,366 @@ class PyAutoGUIComputerTool(IComputerTool):
     def type_text(self, r: TypeTextRequest):
         return paste(r.text)
 
-    @wrap_pyautogui_async
-    def wait(self, r: WaitRequest):
+    async def wait(self, r: WaitRequest):
+        """Sleep on the event loop, neither the loop nor the input thread is held and it can be cancelled"""
         duration = r.duration
         if isinstance(duration, str):
             duration = int(duration)
-        return time.sleep(duration / 1000)
+        await asyncio.sleep(duration / 1000)
+        return BaseResult(output="", error="")
+
+    async def wait_for_screen_change(self, r: WaitForScreenChangeRequest):
+        """Block until the screen (or a region) differs from when the wait started, or the timeout passes"""
+        interval = r.interval / 1000 if r.interval is not None else settings.screen_watch_interval
+        start = time.monotonic()
+        reference = await self._screen_fingerprint(r)
+        checks = 1
+        while True:
+            remaining = r.timeout / 1000 - (time.monotonic() - start)
+            if remaining <= 0:
+                return ScreenWaitResource(timed_out=True, elapsed=self._elapsed_ms(start), checks=checks)
+            await asyncio.sleep(min(interval, remaining))
+            fingerprint = await self._screen_fingerprint(r)
+            checks += 1
+            if screen_changed(reference, fingerprint):
+                return ScreenWaitResource(changed=True, elapsed=self._elapsed_ms(start), checks=checks)
+
+    async def wait_until_stable(self, r: WaitUntilStableRequest):
+        """Block until the screen (or a region) stayed unchanged for r.stable milliseconds, or the timeout passes"""
+        interval = r.interval / 1000 if r.interval is not None else settings.screen_watch_interval
+        start = time.monotonic()
+        last = await self._screen_fingerprint(r)
+        last_change = start
+        changed = False
+        checks = 1
+        while True:
+            now = time.monotonic()
+            if now - last_change >= r.stable / 1000:
+                return ScreenWaitResource(changed=changed, stable=True, elapsed=self._elapsed_ms(start), checks=checks)
+            remaining = r.timeout / 1000 - (now - start)
+            if remaining <= 0:
+                return ScreenWaitResource(changed=changed, timed_out=True, elapsed=self._elapsed_ms(start), checks=checks)
+            await asyncio.sleep(min(interval, remaining, r.stable / 1000 - (now - last_change)))
+            fingerprint = await self._screen_fingerprint(r)
+            checks += 1
+            if screen_changed(last, fingerprint):
+                # Compared against the previous frame, so the screen settles once it stops moving
+                last_change = time.monotonic()
+                changed = True
+            last = fingerprint
+
+    async def _screen_fingerprint(self, r: WaitForScreenChangeRequest):
+        """Capture a fresh frame of the watched area and fingerprint it on the encode pool"""
+        # A frame captured from now on, never a cached one
+        request = TakeScreenshotRequest(
+            region=r.region, coordinate_scale=r.coordinate_scale, after=round(time.time() * 1000)
+        )
+        try:
+            image, _, _, _ = await self._grab(request)
+        except Exception as e:
+            raise BaseError(f"Failed to capture the screen: {e}")
+        return await run_encode(screen_fingerprint, image)
+
+    @staticmethod
+    def _elapsed_ms(start: float) -> int:
+        return round((time.monotonic() - start) * 1000)
+
+    async def get_pixels(self, r: GetPixelsRequest):
+        """Sample the colours of points or small areas, all from one capture"""
+        colors = await self._sample_pixels(r)
+        return PixelsResource(pixels=self._pixel_resources(r, colors))
+
+    async def wait_for_pixels(self, r: WaitForPixelsRequest):
+        """Sample the pixels until their colours match the expected ones within the tolerance, or the timeout passes"""
+        if any(p.color is None for p in r.pixels):
+            raise BaseError("Every pixel needs an expected Color")
+        expected = [p.color for p in r.pixels]
+        interval = r.interval / 1000 if r.interval is not None else settings.screen_watch_interval
+        start = time.monotonic()
+        checks = 0
+        while True:
+            # A frame captured from now on, the previous check already saw the older ones
+            colors = await self._sample_pixels(r, after=round(time.time() * 1000))
+            checks += 1
+            matches = colors_match(colors, expected, r.tolerance)
+            matched = bool(matches.all() if r.mode == "all" else matches.any())
+            remaining = r.timeout / 1000 - (time.monotonic() - start)
+            if matched or remaining <= 0:
+                return PixelsWaitResource(
+                    pixels=self._pixel_resources(r, colors, matches),
+                    matched=matched,
+                    timed_out=not matched,
+                    elapsed=self._elapsed_ms(start),
+                    checks=checks,
+                )
+            await asyncio.sleep(min(interval, remaining))
+
+    async def _sample_pixels(self, r: GetPixelsRequest, after: int = None):
+        """
+        Capture the bounding box of all probes once and sample every probe from it
+
+        One capture serves every probe. For probes scattered across the screen
+        the box is close to a full-screen capture, but only the probes
+        themselves are converted and averaged.
+        """
+        scale = r.coordinate_scale
+        boxes = [
+            (to_screen(p.x, scale), to_screen(p.y, scale), max(to_screen(p.width, scale), 1), max(to_screen(p.height, scale), 1))
+            for p in r.pixels
+        ]
+        left, top = min(b[0] for b in boxes), min(b[1] for b in boxes)
+        right, bottom = max(b[0] + b[2] for b in boxes), max(b[1] + b[3] for b in boxes)
+        request = TakeScreenshotRequest(
+            region=ScreenRegion(left=left, top=top, width=right - left, height=bottom - top), after=after
+        )
+        try:
+            image, _, box, _ = await self._grab(request)
+        except BaseError:
+            raise
+        except Exception as e:
+            raise BaseError(f"Failed to capture the screen: {e}")
+        relative = []
+        for probe, (x, y, width, height) in zip(r.pixels, boxes):
+            x, y = x - box[0], y - box[1]
+            if x + width > image.width or y + height > image.height:
+                raise BaseError(f"Pixel ({probe.x}, {probe.y}) is outside of the screen")
+            relative.append((x, y, width, height))
+        return await run_encode(mean_colors, image, relative)
+
+    @staticmethod
+    def _pixel_resources(r: GetPixelsRequest, colors, matches=None):
+        return [
+            PixelResource(
+                x=p.x,
+                y=p.y,
+                width=p.width,
+                height=p.height,
+                color=color,
+                matched=bool(matches[i]) if matches is not None else None,
+            )
+            for i, (p, color) in enumerate(zip(r.pixels, rounded(colors)))
+        ]
+
+    async def locate_image(self, r: LocateImageRequest):
+        """Find a template image on the screen, match boxes are in the coordinates of the mouse actions"""
+        try:
+            data = base64.b64decode(r.template, validate=True)
+        except (binascii.Error, ValueError):
+            raise BaseError("Template is not valid base64")
+        try:
+            image, _, box, _ = await self._grab(TakeScreenshotRequest(region=r.region, coordinate_scale=r.coordinate_scale))
+        except Exception as e:
+            raise BaseError(f"Failed to capture the screen: {e}")
+        try:
+            matches = await run_encode(self._locate_image, r, data, image)
+        except ValueError as e:
+            raise BaseError(str(e))
+        scale = r.coordinate_scale
+        left, top = round(box[0] * scale), round(box[1] * scale)
+        return LocateImageResource(matches=[
+            ImageMatchResource(
+                left=left + m.left,
+                top=top + m.top,
+                width=m.width,
+                height=m.height,
+                center_x=left + m.left + m.width // 2,
+                center_y=top + m.top + m.height // 2,
+                confidence=m.confidence,
+            )
+            for m in matches
+        ])
+
+    @staticmethod
+    def _locate_image(r: LocateImageRequest, data: bytes, image):
+        """Decode (or reuse) the template and match it on the encode pool"""
+        template = template_cache.get(data)
+        # The template was cut from a screenshot at this scale, match at the same scale
+        image = resize_image(image, r.coordinate_scale)
+        return locate(image, template, r.confidence, r.limit)
 
     async def take_screenshot(self, r: TakeScreenshotRequest):
-        """Capture screenshot and return base64-encoded PNG"""
+        """Capture screenshot and return the base64-encoded image"""
+        if r.delta:
+            return await self._take_delta_screenshot(r)
+        image = await self.capture_screenshot(r)
+        return ScreenshotResource(
+            screenshot=base64.b64encode(image.data).decode(),
+            format=image.format,
+            scale=image.scale,
+            left=image.left,
+            top=image.top,
+            width=image.width,
+            height=image.height,
+            screen_width=image.screen_width,
+            screen_height=image.screen_height,
+            captured_at=image.captured_at,
+        )
+
+    async def capture_screenshot(self, r: TakeScreenshotRequest) -> ScreenshotImage:
+        """
+        Capture screenshot and return the encoded image bytes
+
+        Served from the observation cache while no input happened, identical
+        concurrent requests share one capture. With the background frame
+        grabber running the image comes from the buffered frames.
+        """
+        key = r.model_dump_json(exclude={"delta", "keyframe", "session"})
+        return await observation_cache.get_or_load(
+            ("screenshot", key),
+            lambda: screenshot_flights.do(key, lambda: self._capture_screenshot(r)),
+            settings.observation_cache_ttl,
+        )
+
+    async def _capture_screenshot(self, r: TakeScreenshotRequest) -> ScreenshotImage:
         try:
-            # Capture screenshot directly to memory and return base64-encoded PNG
-            image = pyautogui.screenshot()
-            from io import BytesIO
-            buffer = BytesIO()
-            image.save(buffer, format="PNG")
-            buffer.seek(0)
-            return ScreenshotResource(screenshot=base64.b64encode(buffer.read()).decode())
+            image, screen_size, box, captured_at = await self._grab(r)
+            return await run_encode(self._encode_screenshot, r, image, screen_size, box, captured_at)
+        except Exception as e:
+            error_msg = str(e)
+            raise BaseError(f"Failed to take screenshot: {error_msg}")
+
+    async def _take_delta_screenshot(self, r: TakeScreenshotRequest) -> ScreenshotResource:
+        """Capture screenshot and return only the tiles changed since the session's last delta screenshot"""
+        try:
+            image, screen_size, box, captured_at = await self._grab(r)
+            return await run_encode(self._encode_delta_screenshot, r, image, screen_size, box, captured_at)
         except Exception as e:
             error_msg = str(e)
             raise BaseError(f"Failed to take screenshot: {error_msg}")
 
-    # @wrap_pyautogui
+    async def _grab(self, r: TakeScreenshotRequest):
+        """Get the image of a screenshot: a buffered frame of the background grabber or a fresh capture"""
+        after = r.after / 1000 if r.after is not None else None
+        frame = await frame_grabber.frame(after)
+        if frame is not None:
+            return self._frame_screenshot(r, frame)
+        if after is not None and after > time.time():
+            # Capturing now would show the screen before the requested time
+            await asyncio.sleep(after - time.time())
+        return await run_capture(self._grab_screenshot, r)
+
+    def _frame_screenshot(self, r: TakeScreenshotRequest, frame: Frame):
+        """Cut the requested area out of a buffered full-screen frame"""
+        screen_width, screen_height = frame.screen_size
+        left, top, width, height = 0, 0, screen_width, screen_height
+        image = frame.image
+        if r.region is not None:
+            left, top, width, height = self._screen_region(r.region, r.coordinate_scale, screen_width, screen_height)
+            image = image.crop((left, top, left + width, top + height))
+        return image, frame.screen_size, (left, top, width, height), round(frame.captured_at * 1000)
+
+    def grab_frame(self):
+        """Capture a full-screen frame for the background frame grabber, returns the image and the screen size"""
+        return call_capture(self._grab_frame)
+
+    @staticmethod
+    def _grab_frame():
+        screen_size = pyautogui.size()
+        return pyautogui.screenshot(), (screen_size[0], screen_size[1])
+
+    def _grab_screenshot(self, r: TakeScreenshotRequest):
+        """
+        Capture a screenshot on the input thread, returns the image, the screen size,
+        the captured screen box and the capture time in unix milliseconds
+        """
+        captured_at = round(time.time() * 1000)
+        # Capture screenshot directly to memory
+        screen_width, screen_height = pyautogui.size()
+        left, top, width, height = 0, 0, screen_width, screen_height
+        if r.region is not None:
+            left, top, width, height = self._screen_region(r.region, r.coordinate_scale, screen_width, screen_height)
+            # Let the backend grab only the region instead of cropping a full frame
+            image = pyautogui.screenshot(region=(left, top, width, height))
+        else:
+            image = pyautogui.screenshot()
+        return image, (screen_width, screen_height), (left, top, width, height), captured_at
+
+    @staticmethod
+    def _resize_screenshot(r: TakeScreenshotRequest, image):
+        return resize_image(
+            image,
+            r.scale,
+            r.max_width if r.max_width is not None else settings.screenshot_max_width,
+            r.max_height if r.max_height is not None else settings.screenshot_max_height,
+        )
+
+    def _encode_screenshot(self, r: TakeScreenshotRequest, image, screen_size, box, captured_at: int) -> ScreenshotImage:
+        """Downscale and encode a captured screenshot on the encode pool"""
+        image = self._resize_screenshot(r, image)
+        image_format = r.format or settings.screenshot_format
+        return ScreenshotImage(
+            data=encode_image(image, image_format, r.quality, r.compress_level),
+            format=image_format,
+            width=image.width,
+            height=image.height,
+            screen_width=screen_size[0],
+            screen_height=screen_size[1],
+            scale=round(image.width / box[2], 6) if box[2] else 1.0,
+            left=box[0],
+            top=box[1],
+            captured_at=captured_at,
+        )
+
+    def _encode_delta_screenshot(self, r: TakeScreenshotRequest, image, screen_size, box, captured_at: int) -> ScreenshotResource:
+        """Downscale, diff and encode a captured screenshot on the encode pool"""
+        image = self._resize_screenshot(r, image)
+        image_format = r.format or settings.screenshot_format
+        resource = ScreenshotResource(
+            screenshot="",
+            format=image_format,
+            scale=round(image.width / box[2], 6) if box[2] else 1.0,
+            left=box[0],
+            top=box[1],
+            width=image.width,
+            height=image.height,
+            screen_width=screen_size[0],
+            screen_height=screen_size[1],
+            captured_at=captured_at,
+        )
+        boxes = delta_tracker.diff(r.session or "", image, box, r.keyframe)
+        if boxes is None:
+            resource.screenshot = base64.b64encode(
+                encode_image(image, image_format, r.quality, r.compress_level)
+            ).decode()
+            return resource
+        resource.keyframe = False
+        resource.tiles = []
+        for left, top, width, height in boxes:
+            tile = image.crop((left, top, left + width, top + height))
+            resource.tiles.append(ScreenshotTile(
+                left=left,
+                top=top,
+                width=width,
+                height=height,
+                screenshot=base64.b64encode(encode_image(tile, image_format, r.quality, r.compress_level)).decode(),
+            ))
+        return resource
+
+    @staticmethod
+    def _screen_region(region: ScreenRegion, scale: float, screen_width: int, screen_height: int):
+        """Map a region to screen coordinates and clip it to the screen"""
+        left = min(max(to_screen(region.left, scale), 0), screen_width)
+        top = min(max(to_screen(region.top, scale), 0), screen_height)
+        right = min(to_screen(region.left + region.width, scale), screen_width)
+        bottom = min(to_screen(region.top + region.height, scale), screen_height)
+        if right <= left or bottom <= top:
+            raise BaseError(f"Region {region.as_tuple()} is outside of the screen")
+        return left, top, right - left, bottom - top
+
     async def get_cursor_position(self, r: GetCursorPositionRequest):
-        x, y = pyautogui.position()
+        x, y = await observation_cache.get_or_load(
+            "cursor_position", lambda: run_capture(pyautogui.position), settings.observation_cache_ttl
+        )
         return {"PositionX": x, "PositionY": y}
 
     async def get_screen_size(self, r: GetScreenSizeRequest):
-        x, y = pyautogui.size()
+        # The resolution does not change with input, only the TTL bounds it
+        x, y = await observation_cache.get_or_load(
+            "screen_size", lambda: run_capture(pyautogui.size), settings.screen_size_cache_ttl, track_input=False
+        )
         return {"Width": x, "Height": y}
+
+    async def invalidate_cache(self, r: InvalidateCacheRequest):
+        """Drop cached observations, the next reads capture afresh"""
+        observation_cache.invalidate()
+        return BaseResult(output="", error="")
@@ -0,0 +1,119 @@
+"""Process-wide pooled HTTP connections to Computer Use Tool Servers"""
+import importlib.util
+import threading
+from typing import Dict
+import httpx
+from core.logger import logger
+from core.config import settings
+from core.constants import REQUEST_TIMEOUT_HEADER
+from src.computer.base import camel_to_snake
+
+
+class ConnectionManager:
+    """
+    Keep one pooled keep-alive HTTP client per tool server endpoint.
+
+    Clients are created lazily on first use and shared by every tool handler in
+    the process, so consecutive actions against the same node reuse the already
+    established TCP/TLS connections instead of paying a new handshake each time.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+        self._http2 = self._resolve_http2()
+
+    @staticmethod
+    def _resolve_http2() -> bool:
+        """Enable HTTP/2 only when configured and the h2 package is installed"""
+        if not settings.http2_enabled:
+            return False
+        if importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 is enabled but the h2 package is not installed, falling back to HTTP/1.1")
+            return False
+        return True
+
+    @staticmethod
+    def _normalize(endpoint: str) -> str:
+        return (endpoint or "").rstrip("/")
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        )
+
+    def get_timeout(self, action: str, params: Dict = None) -> httpx.Timeout:
+        """
+        Get the timeout for an action
+
+        Args:
+            action: Action name, either camelCase or snake_case
+            params: Request parameters, used to extend the timeout of long actions
+
+        Returns:
+            Timeout with the configured connect timeout and per-action read timeout
+        """
+        action = camel_to_snake(action)
+        timeout = settings.http_action_timeouts.get(action, settings.http_timeout)
+        # wait and drag_mouse block on the server for their whole duration
+        if action in ("wait", "drag_mouse") and params:
+            timeout += int(params.get("Duration", params.get("duration", 0)) or 0) / 1000
+        # Screen waits block on the server up to their timeout
+        if action in ("wait_for_screen_change", "wait_until_stable", "wait_for_pixels") and params:
+            timeout += int(params.get("Timeout", params.get("timeout", 0)) or 0) / 1000
+        return httpx.Timeout(timeout, connect=settings.http_connect_timeout)
+
+    @staticmethod
+    def computer_url(endpoint: str, path: str) -> str:
+        """URL of a computer route of a tool server, under settings.api_prefix"""
+        return endpoint.rstrip("/") + settings.api_prefix + "/computer/" + path
+
+    @staticmethod
+    def deadline_headers(timeout: httpx.Timeout) -> Dict[str, str]:
+        """Headers telling the tool server how long the caller waits, so it can abort late work"""
+        return {REQUEST_TIMEOUT_HEADER: str(int(timeout.read * 1000))}
+
+    def get_client(self, endpoint: str) -> httpx.Client:
+        """Get the pooled synchronous client for an endpoint"""
+        key = self._normalize(endpoint)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None or client.is_closed:
+                    logger.debug("Creating pooled HTTP client for {}", key)
+                    client = httpx.Client(limits=self._limits(), http2=self._http2)
+                    self._clients[key] = client
+        return client
+
+    def get_async_client(self, endpoint: str) -> httpx.AsyncClient:
+        """Get the pooled asynchronous client for an endpoint"""
+        key = self._normalize(endpoint)
+        client = self._async_clients.get(key)
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._async_clients.get(key)
+                if client is None or client.is_closed:
+                    logger.debug("Creating pooled async HTTP client for {}", key)
+                    client = httpx.AsyncClient(limits=self._limits(), http2=self._http2)
+                    self._async_clients[key] = client
+        return client
+
+    async def aclose(self):
+        """Close all pooled clients"""
+        with self._lock:
+            clients = list(self._clients.values())
+            async_clients = list(self._async_clients.values())
+            self._clients.clear()
+            self._async_clients.clear()
+        for client in clients:
+            client.close()
+        for client in async_clients:
+            await client.aclose()
+
+
+# Create global connection manager instance
+connection_manager = ConnectionManager()
@@ -0,0 +1,53 @@
+"""Executors of the tool server backend work, kept off the event loop"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from core.config import settings
+
+# One thread owns the X display and performs all input, so input calls run in submission
+# order and never interleave. pyautogui shares one Xlib connection that is not thread safe,
+# so observations (screen grabs, cursor position, screen size) run on it as well
+input_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="computer-input")
+
+# Pillow and zlib release the GIL while resizing and encoding, threads give real parallelism
+encode_executor = ThreadPoolExecutor(
+    max_workers=settings.encode_workers or min(4, os.cpu_count() or 1),
+    thread_name_prefix="screenshot-encode",
+)
+
+
+async def run_input(fn: Callable, *args, on_done: Callable[[], None] = None, **kwargs) -> Any:
+    """
+    Run a blocking input call (pyautogui, clipboard) on the input thread
+
+    Args:
+        on_done: Called on the event loop once the call finished on the input thread,
+            also when the awaiting request was cancelled while it ran
+    """
+    loop = asyncio.get_running_loop()
+    job = input_executor.submit(functools.partial(fn, *args, **kwargs))
+    if on_done is not None:
+        def done(_):
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(on_done)
+        job.add_done_callback(done)
+    return await asyncio.wrap_future(job)
+
+
+async def run_capture(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking observation call on the input thread, the only one touching the display"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(input_executor, functools.partial(fn, *args, **kwargs))
+
+
+def call_capture(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking observation call on the input thread from another thread and wait for it"""
+    return input_executor.submit(fn, *args, **kwargs).result()
+
+
+async def run_encode(fn: Callable, *args, **kwargs) -> Any:
+    """Run CPU bound image work (resize, encode, hashing) on the encode pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(encode_executor, functools.partial(fn, *args, **kwargs))
@@ -0,0 +1,217 @@
+"""Recent screenshots kept on the MCP server and served as MCP resources"""
+import base64
+import threading
+import uuid
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, Dict, NamedTuple, Optional
+from PIL import Image
+from mcp import types
+from fastmcp import FastMCP
+from core.config import settings
+from .executor import run_encode
+
+# Formats of stored screenshots, one resource template each
+FRAME_FORMATS = ("png", "jpeg", "webp")
+
+
+class StoredFrame(NamedTuple):
+    """Encoded screenshot with the metadata needed to serve variants of it"""
+    data: bytes
+    format: str
+    width: int
+    height: int
+
+
+def frame_uri(frame_id: str, format: str) -> str:
+    """Resource URI of a stored screenshot"""
+    return f"screenshot://{frame_id}.{format}"
+
+
+class FrameStore:
+    """
+    Encoded screenshots by ID with LRU eviction under a memory budget.
+
+    Tool results carry a resource URI and a small thumbnail instead of the
+    full image, so a screenshot the conversation refers to again is only
+    transferred when a client reads the resource.
+    """
+
+    def __init__(self):
+        self._frames: "OrderedDict[str, StoredFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def put(self, data: bytes, format: str, width: int, height: int) -> str:
+        """
+        Store an encoded screenshot
+
+        The newest screenshot is always kept, even when it alone exceeds the budget.
+
+        Returns:
+            The frame ID
+        """
+        frame_id = uuid.uuid4().hex
+        budget = settings.frame_store_max_mb * 1024 * 1024
+        with self._lock:
+            self._frames[frame_id] = StoredFrame(data, format, width, height)
+            self.size += len(data)
+            while self.size > budget and len(self._frames) > 1:
+                _, frame = self._frames.popitem(last=False)
+                self.size -= len(frame.data)
+                self.evicted += 1
+        return frame_id
+
+    def get(self, frame_id: str) -> Optional[StoredFrame]:
+        """Get a stored screenshot, None if it was never stored or has been evicted"""
+        with self._lock:
+            frame = self._frames.get(frame_id)
+            if frame is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._frames.move_to_end(frame_id)
+            return frame
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._frames),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+        }
+
+
+def _encode(image: Image.Image, format: str, quality: int) -> bytes:
+    buffer = BytesIO()
+    if format == "png":
+        image.save(buffer, format="PNG", compress_level=settings.screenshot_png_compress_level)
+    else:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.save(buffer, format=format.upper(), quality=quality)
+    return buffer.getvalue()
+
+
+def thumbnail(frame: StoredFrame) -> bytes:
+    """Encode a JPEG preview of a stored screenshot, settings.screenshot_thumbnail_width wide"""
+    image = Image.open(BytesIO(frame.data))
+    width = settings.screenshot_thumbnail_width
+    image = image.resize((width, max(round(frame.height * width / frame.width), 1)), Image.BILINEAR)
+    return _encode(image, "jpeg", settings.screenshot_thumbnail_quality)
+
+
+def variant(
+        frame: StoredFrame,
+        left: int = None,
+        top: int = None,
+        width: int = None,
+        height: int = None,
+        scale: float = None,
+) -> bytes:
+    """
+    Crop and downscale a stored screenshot, re-encoded in its own format
+
+    Args:
+        frame: Stored screenshot
+        left, top, width, height: Crop box in screenshot pixels, clipped to the image
+        scale: Downscale factor in (0, 1] applied after cropping
+
+    Returns:
+        The stored bytes unchanged when neither a crop nor a scale is requested
+    """
+    crop = any(value is not None for value in (left, top, width, height))
+    if not crop and (scale is None or scale >= 1):
+        return frame.data
+    if scale is not None and not 0 < scale <= 1:
+        raise ValueError("scale must be in (0, 1]")
+    image = Image.open(BytesIO(frame.data))
+    if crop:
+        x0 = min(max(left or 0, 0), frame.width - 1)
+        y0 = min(max(top or 0, 0), frame.height - 1)
+        x1 = frame.width if width is None else min(x0 + max(width, 1), frame.width)
+        y1 = frame.height if height is None else min(y0 + max(height, 1), frame.height)
+        image = image.crop((x0, y0, x1, y1))
+    if scale is not None and scale < 1:
+        image = image.resize((max(round(image.width * scale), 1), max(round(image.height * scale), 1)), Image.BILINEAR)
+    return _encode(image, frame.format, settings.screenshot_quality)
+
+
+async def stored_screenshot_contents(data: bytes, format: str, width: int, height: int, info: dict) -> list:
+    """
+    Store a screenshot and build its MCP contents
+
+    Args:
+        data: Encoded screenshot bytes
+        format: Image format
+        width, height: Image size in pixels
+        info: Description of the screenshot, extended with the resource URI
+
+    Returns:
+        A TextContent with the description, an ImageContent with the full image when it
+        is not wider than a thumbnail or a JPEG thumbnail otherwise, and a ResourceLink
+        to the full resolution screenshot
+    """
+    frame = StoredFrame(data, format, width, height)
+    frame_id = frame_store.put(data, format, width, height)
+    uri = frame_uri(frame_id, format)
+    info = {**info, "uri": uri}
+    if width > settings.screenshot_thumbnail_width:
+        image_data, mime_type = await run_encode(thumbnail, frame), "image/jpeg"
+        info["thumbnail_scale"] = round(settings.screenshot_thumbnail_width / width, 4)
+        info["note"] = (
+            "The image is a thumbnail preview, mouse coordinates refer to the full screenshot, "
+            "thumbnail positions divided by thumbnail_scale. "
+            "Read the uri for full resolution, crop with ?left=&top=&width=&height="
+        )
+    else:
+        image_data, mime_type = data, f"image/{format}"
+    return [
+        types.TextContent(type="text", text=str(info)),
+        types.ImageContent(type="image", data=base64.b64encode(image_data).decode(), mimeType=mime_type),
+        types.ResourceLink(
+            type="resource_link",
+            name=f"screenshot-{frame_id}",
+            uri=uri,
+            mimeType=f"image/{format}",
+            size=len(data),
+        ),
+    ]
+
+
+def register_frame_resources(mcp: FastMCP):
+    """Register the resource templates serving stored screenshots and their crops"""
+    for format in FRAME_FORMATS:
+        _register_frame_resource(mcp, format)
+
+
+def _register_frame_resource(mcp: FastMCP, format: str):
+    @mcp.resource(
+        f"screenshot://{{frame_id}}.{format}{{?left,top,width,height,scale}}",
+        name=f"screenshot_{format}",
+        description=(
+            "Full resolution screenshot returned by take_screenshot, "
+            "optionally cropped to left, top, width, height and downscaled by scale"
+        ),
+        mime_type=f"image/{format}",
+    )
+    async def read_screenshot(
+        frame_id: str,
+        left: int | None = None,
+        top: int | None = None,
+        width: int | None = None,
+        height: int | None = None,
+        scale: float | None = None,
+    ) -> bytes:
+        frame = frame_store.get(frame_id)
+        if frame is None or frame.format != format:
+            raise ValueError(f"Screenshot {frame_id} is not available, take a new screenshot")
+        return await run_encode(variant, frame, left, top, width, height, scale)
+
+
+# Create global frame store instance
+frame_store = FrameStore()
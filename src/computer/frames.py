@@ -0,0 +1,163 @@
+"""Background screen capture into a ring buffer of recent frames"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from core.config import settings
+from core.logger import logger
+from .observation import observation_cache
+
+
+class Frame(NamedTuple):
+    """Raw captured frame"""
+    # Unix time in seconds when the capture started
+    captured_at: float
+    # Input epoch at the start of the capture
+    epoch: int
+    # Whether no input happened while the frame was captured
+    settled: bool
+    image: Any
+    screen_size: Tuple[int, int]
+
+
+class FrameGrabber:
+    """
+    Capture full-screen frames at a fixed rate on a background thread.
+
+    The newest settings.frame_buffer_size raw (unencoded) frames are kept,
+    so a screenshot is served from memory instead of waiting for a capture,
+    and the frame taken right after an action is still available after
+    later frames replaced the newest one.
+    """
+
+    def __init__(self):
+        self._frames: deque = deque(maxlen=max(settings.frame_buffer_size, 1))
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.captured = 0
+        self.discarded = 0
+        self.errors = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def interval(self) -> float:
+        return 1 / settings.frame_grabber_fps
+
+    def start(self, grab: Callable[[], Tuple[Any, Tuple[int, int]]]):
+        """
+        Start the capture thread
+
+        Args:
+            grab: Blocking full-screen capture returning the image and the screen size
+        """
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(grab,), name="frame-grabber", daemon=True)
+        self._thread.start()
+        logger.info("Frame grabber started at {} fps, keeping {} frames", settings.frame_grabber_fps, self._frames.maxlen)
+
+    def stop(self):
+        """Stop the capture thread and drop the buffered frames"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            self._frames.clear()
+
+    def _run(self, grab: Callable[[], Tuple[Any, Tuple[int, int]]]):
+        while not self._stop.is_set():
+            start = time.monotonic()
+            epoch = observation_cache.epoch
+            captured_at = time.time()
+            try:
+                image, screen_size = grab()
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Frame grabber capture failed: {}", e)
+            else:
+                frame = Frame(captured_at, epoch, observation_cache.epoch == epoch, image, screen_size)
+                with self._lock:
+                    if len(self._frames) == self._frames.maxlen:
+                        self.discarded += 1
+                    self._frames.append(frame)
+                    waiters, self._waiters = self._waiters, []
+                self.captured += 1
+                for loop, future in waiters:
+                    loop.call_soon_threadsafe(_resolve, future)
+            self._stop.wait(max(self.interval - (time.monotonic() - start), 0))
+
+    def _find(self, after: Optional[float]) -> Optional[Frame]:
+        with self._lock:
+            if after is not None:
+                # The first frame at or after the time shows what happened right after it
+                return next((frame for frame in self._frames if frame.captured_at >= after), None)
+            # The newest frame captured entirely after the last input
+            epoch = observation_cache.epoch
+            return next((frame for frame in reversed(self._frames) if frame.settled and frame.epoch == epoch), None)
+
+    async def frame(self, after: Optional[float] = None) -> Optional[Frame]:
+        """
+        Get a buffered frame, waiting for the next capture if none qualifies yet
+
+        Args:
+            after: Unix time in seconds, return the first frame captured at or after it.
+                By default the newest frame captured after the last input is returned.
+
+        Returns:
+            The frame, or None if the grabber is not running or no frame arrived in time,
+            in which case the caller captures on demand
+        """
+        if not self.running:
+            return None
+        # A frame is due within one interval, allow for one slow capture
+        timeout = 2 * self.interval
+        if after is not None:
+            timeout += max(after - time.time(), 0)
+        deadline = time.monotonic() + timeout
+        while True:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            with self._lock:
+                self._waiters.append((loop, future))
+            frame = self._find(after)
+            if frame is not None:
+                self.hits += 1
+                return frame
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.running:
+                self.misses += 1
+                return None
+            try:
+                await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "buffered": len(self._frames),
+            "captured": self.captured,
+            "discarded": self.discarded,
+            "errors": self.errors,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+# Create global frame grabber instance
+frame_grabber = FrameGrabber()
@@ -0,0 +1,145 @@
+"""Results of recent actions by idempotency key, so retried requests are not executed twice"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from core.config import settings
+
+# Wraps the action job of a request, marking when it leaves the scheduler queue
+Starter = Callable[[Callable[[], Awaitable[Any]]], Callable[[], Awaitable[Any]]]
+
+
+class _Entry:
+    """Outcome of one keyed action, pending while the action runs"""
+
+    def __init__(self):
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.stored_at = time.monotonic()
+        # Whether the action job started, after that its outcome is stored whatever happens to the request
+        self.started = False
+
+    def start(self, job: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+        async def run_job():
+            self.started = True
+            return await job()
+        return run_job
+
+
+class IdempotencyCache:
+    """
+    Bounded TTL cache of action outcomes by client idempotency key.
+
+    A client sends the same key with every retry of one logical action. The
+    first request runs the action, a retry arriving while it runs waits for
+    its outcome and a retry arriving later gets the stored outcome, for up to
+    settings.idempotency_cache_ttl seconds. Once the action job left the
+    scheduler queue it runs to completion even if its request is aborted,
+    the input may already have reached the screen. Only an action that never
+    started, e.g. one rejected or aborted while queued, is forgotten and runs
+    again on retry. At most settings.idempotency_cache_size outcomes are
+    kept, the oldest are evicted first.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.joined = 0
+        self.stored = 0
+        self.evicted = 0
+
+    def _expire(self):
+        deadline = time.monotonic() - settings.idempotency_cache_ttl
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if not entry.future.done() or entry.stored_at > deadline:
+                break
+            del self._entries[key]
+            self.evicted += 1
+
+    async def run(self, key: Optional[Hashable], call: Callable[[Starter], Awaitable[Any]]) -> Any:
+        """
+        Run an action once per key
+
+        Args:
+            key: Idempotency key of the request, None to always run the call
+            call: Schedules the action, given a starter that it wraps the action job with,
+                e.g. lambda started: schedule(action, started(job))
+
+        Returns:
+            Result of the call, or of the earlier call with the same key
+        """
+        if key is None or settings.idempotency_cache_size <= 0:
+            return await call(lambda job: job)
+        while True:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is None:
+                break
+            if entry.future.done():
+                self.hits += 1
+                return entry.future.result()
+            self.joined += 1
+            try:
+                return await asyncio.shield(entry.future)
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
+                # The first request was aborted before its action started, run the action for this one
+
+        entry = self._entries[key] = _Entry()
+        # The action runs in its own task, so aborting the request does not lose its outcome
+        task = asyncio.ensure_future(call(entry.start))
+        task.add_done_callback(lambda done: self._finished(key, entry, done))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not entry.started:
+                # Still waiting in the scheduler queue, the action never runs
+                task.cancel()
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                entry.future.cancel()
+            raise
+
+    def _finished(self, key: Hashable, entry: _Entry, task: asyncio.Task):
+        if entry.future.done():
+            # Forgotten when the request was aborted before the action started
+            if not task.cancelled():
+                task.exception()
+            return
+        current = self._entries.get(key) is entry
+        if task.cancelled() or (task.exception() is not None and not entry.started):
+            if current:
+                del self._entries[key]
+            if task.cancelled():
+                entry.future.cancel()
+            else:
+                entry.future.set_exception(task.exception())
+                # Retrieved here, waiting retries re-raise it
+                entry.future.exception()
+            return
+        if task.exception() is not None:
+            entry.future.set_exception(task.exception())
+            entry.future.exception()
+        else:
+            entry.future.set_result(task.result())
+        if current:
+            entry.stored_at = time.monotonic()
+            self._entries.move_to_end(key)
+            self.stored += 1
+            while len(self._entries) > settings.idempotency_cache_size:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "joined": self.joined,
+            "stored": self.stored,
+            "evicted": self.evicted,
+        }
+
+
+# Create global idempotency cache instance
+idempotency_cache = IdempotencyCache()
@@ -0,0 +1,113 @@
+"""Screenshot image encoding and layout"""
+import math
+from io import BytesIO
+from typing import Literal, Optional, Sequence, Tuple
+from PIL import Image, ImageDraw
+from core.config import settings
+
+ImageFormat = Literal["png", "jpeg", "webp"]
+
+# PIL format name of each supported screenshot format
+PIL_FORMATS = {
+    "png": "PNG",
+    "jpeg": "JPEG",
+    "webp": "WEBP",
+}
+
+
+def encode_image(
+        image: Image.Image,
+        format: ImageFormat = None,
+        quality: int = None,
+        compress_level: int = None,
+) -> bytes:
+    """
+    Encode an image to bytes
+
+    Args:
+        image: Image to encode
+        format: png, jpeg or webp, defaults to settings.screenshot_format
+        quality: JPEG/WebP quality 1-100, defaults to settings.screenshot_quality
+        compress_level: PNG zlib level 0-9, defaults to settings.screenshot_png_compress_level
+
+    Returns:
+        Encoded image bytes
+    """
+    format = (format or settings.screenshot_format).lower()
+    if format not in PIL_FORMATS:
+        raise ValueError(f"Unsupported image format: {format}")
+    quality = quality if quality is not None else settings.screenshot_quality
+    compress_level = compress_level if compress_level is not None else settings.screenshot_png_compress_level
+
+    buffer = BytesIO()
+    if format == "png":
+        image.save(buffer, format="PNG", compress_level=compress_level)
+    else:
+        # JPEG has no alpha channel and lossy encoders want plain RGB
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buffer, format=PIL_FORMATS[format], quality=quality)
+    return buffer.getvalue()
+
+
+def resize_image(
+        image: Image.Image,
+        scale: float = None,
+        max_width: int = None,
+        max_height: int = None,
+) -> Image.Image:
+    """
+    Downscale an image by a factor and/or to fit a bounding size, never upscales
+
+    Args:
+        image: Image to resize
+        scale: Resize factor in (0, 1]
+        max_width: Maximum output width, 0 or None for no limit
+        max_height: Maximum output height, 0 or None for no limit
+
+    Returns:
+        The resized image, or the original image if no downscaling is needed
+    """
+    factor = scale if scale else 1.0
+    if max_width:
+        factor = min(factor, max_width / image.width)
+    if max_height:
+        factor = min(factor, max_height / image.height)
+    if factor >= 1.0:
+        return image
+    size = (max(1, round(image.width * factor)), max(1, round(image.height * factor)))
+    # reducing_gap first shrinks by an integer factor, much faster on large frames
+    return image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+
+def contact_sheet(
+        tiles: Sequence[Tuple[str, Optional[Image.Image]]],
+        tile_width: int,
+        caption_height: int = 16,
+) -> Image.Image:
+    """
+    Lay out labelled thumbnails in a grid, e.g. one screenshot per node
+
+    Args:
+        tiles: (caption, image) pairs, a None image leaves a gray cell
+        tile_width: Width of every cell, images are downscaled to fit
+        caption_height: Height of the caption bar above each cell
+
+    Returns:
+        RGB image with ceil(sqrt(n)) columns
+    """
+    thumbnails = [(caption, resize_image(image, max_width=tile_width) if image is not None else None) for caption, image in tiles]
+    tile_height = max((image.height for _, image in thumbnails if image is not None), default=tile_width * 9 // 16)
+    columns = max(math.ceil(math.sqrt(len(thumbnails))), 1)
+    rows = max(math.ceil(len(thumbnails) / columns), 1)
+    cell_height = caption_height + tile_height
+    sheet = Image.new("RGB", (columns * tile_width, rows * cell_height), (32, 32, 32))
+    draw = ImageDraw.Draw(sheet)
+    for index, (caption, image) in enumerate(thumbnails):
+        left, top = (index % columns) * tile_width, (index // columns) * cell_height
+        if image is None:
+            draw.rectangle((left, top + caption_height, left + tile_width - 1, top + cell_height - 1), fill=(96, 96, 96))
+        else:
+            sheet.paste(image.convert("RGB"), (left, top + caption_height))
+        draw.text((left + 4, top + 2), caption, fill=(255, 255, 255))
+    return sheet
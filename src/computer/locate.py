@@ -0,0 +1,235 @@
+"""Template matching on screen frames with normalised cross-correlation"""
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, Dict, List, NamedTuple, Tuple
+import numpy as np
+from PIL import Image
+from core.config import settings
+
+# Windows whose gray level variance is below this are flat, they match nothing
+_FLAT_VARIANCE = 1e-3
+
+
+class Template(NamedTuple):
+    """Decoded template, one zero-mean gray image per pyramid level"""
+    levels: List[np.ndarray]
+    norms: List[float]
+    width: int
+    height: int
+
+
+class Match(NamedTuple):
+    """Match box in the searched image"""
+    left: int
+    top: int
+    width: int
+    height: int
+    confidence: float
+
+
+def _pyramid_depth(width: int, height: int) -> int:
+    """Number of halvings that keep the template at least settings.locate_min_template_size"""
+    depth = 0
+    while depth < settings.locate_pyramid_levels and min(width, height) >> (depth + 1) >= settings.locate_min_template_size:
+        depth += 1
+    return depth
+
+
+def _gray_levels(image: Image.Image, depth: int) -> List[np.ndarray]:
+    """
+    Gray pyramid of an image, level n is 2**n times smaller
+
+    Bilinear downscaling blurs before subsampling, so a template that is not
+    aligned to the level's pixel grid still correlates well at coarse levels.
+    """
+    image = image.convert("L")
+    levels = [np.asarray(image, dtype=np.float64)]
+    for level in range(1, depth + 1):
+        size = (max(image.width >> level, 1), max(image.height >> level, 1))
+        levels.append(np.asarray(image.resize(size, Image.BILINEAR), dtype=np.float64))
+    return levels
+
+
+def _fast_length(n: int) -> int:
+    """Smallest length >= n with only the prime factors 2, 3 and 5, which FFTs handle fastest"""
+    while True:
+        m = n
+        for p in (2, 3, 5):
+            while m % p == 0:
+                m //= p
+        if m == 1:
+            return n
+        n += 1
+
+
+def _window_sums(values: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Sum of every height x width window, from an integral image"""
+    integral = np.zeros((values.shape[0] + 1, values.shape[1] + 1))
+    integral[1:, 1:] = values.cumsum(0).cumsum(1)
+    return integral[height:, width:] - integral[:-height, width:] - integral[height:, :-width] + integral[:-height, :-width]
+
+
+def ncc_map(image: np.ndarray, template: np.ndarray, norm: float) -> np.ndarray:
+    """
+    Normalised cross-correlation of a zero-mean template at every position of an image
+
+    The correlation is one FFT product, the per-window normalisation comes from
+    integral images of the image and its square, so the cost does not depend
+    on the template size.
+
+    Args:
+        image: Gray image
+        template: Zero-mean gray template, not larger than the image
+        norm: Euclidean norm of the template
+
+    Returns:
+        Scores in [-1, 1] of shape (image rows - template rows + 1, image columns - template columns + 1)
+    """
+    height, width = template.shape
+    rows, cols = image.shape
+    shape = (_fast_length(rows + height - 1), _fast_length(cols + width - 1))
+    spectrum = np.fft.rfft2(image, shape) * np.fft.rfft2(template[::-1, ::-1], shape)
+    correlation = np.fft.irfft2(spectrum, shape)[height - 1:rows, width - 1:cols]
+    count = height * width
+    sums = _window_sums(image, height, width)
+    variance = _window_sums(image * image, height, width) - sums * sums / count
+    denominator = np.sqrt(np.maximum(variance, 0)) * norm
+    scores = np.zeros_like(correlation)
+    np.divide(correlation, denominator, out=scores, where=variance > _FLAT_VARIANCE * count)
+    return scores
+
+
+def _peaks(scores: np.ndarray, threshold: float, limit: int, height: int, width: int) -> List[Tuple[int, int, float]]:
+    """Best positions at or above the threshold, suppressing positions overlapping a better one"""
+    candidates = np.flatnonzero(scores >= threshold)
+    if candidates.size > limit * 64:
+        # Only the best ones can survive the suppression
+        best = np.argpartition(scores.ravel()[candidates], -limit * 64)[-limit * 64:]
+        candidates = candidates[best]
+    candidates = candidates[np.argsort(scores.ravel()[candidates])[::-1]]
+    peaks = []
+    for index in candidates:
+        y, x = divmod(int(index), scores.shape[1])
+        if any(abs(y - py) < height and abs(x - px) < width for py, px, _ in peaks):
+            continue
+        peaks.append((y, x, float(scores[y, x])))
+        if len(peaks) >= limit:
+            break
+    return peaks
+
+
+def locate(image: Image.Image, template: Template, confidence: float = 0.9, limit: int = 10) -> List[Match]:
+    """
+    Find a template in an image
+
+    Matching starts at the coarsest pyramid level both share, with the
+    threshold lowered by settings.locate_pyramid_slack, and every candidate
+    is refined in a small window at full resolution.
+
+    Args:
+        image: Image to search
+        template: Decoded template
+        confidence: Minimum normalised cross-correlation of a match, 0-1
+        limit: Maximum number of matches
+
+    Returns:
+        Non-overlapping matches, best first
+    """
+    if template.width > image.width or template.height > image.height:
+        return []
+    depth = len(template.levels) - 1
+    while depth and (template.width > image.width >> depth or template.height > image.height >> depth):
+        depth -= 1
+    levels = _gray_levels(image, depth)
+    full = levels[0]
+    height, width = template.height, template.width
+    if depth == 0:
+        scores = ncc_map(full, template.levels[0], template.norms[0])
+        return [Match(x, y, width, height, round(score, 4)) for y, x, score in _peaks(scores, confidence, limit, height, width)]
+
+    coarse = template.levels[depth]
+    scores = ncc_map(levels[depth], coarse, template.norms[depth])
+    factor = 1 << depth
+    refined = []
+    for y, x, _ in _peaks(scores, confidence - settings.locate_pyramid_slack, limit * 8, *coarse.shape):
+        top, left = max(y * factor - factor, 0), max(x * factor - factor, 0)
+        bottom = min(y * factor + factor, full.shape[0] - height)
+        right = min(x * factor + factor, full.shape[1] - width)
+        window = ncc_map(full[top:bottom + height, left:right + width], template.levels[0], template.norms[0])
+        wy, wx = np.unravel_index(int(np.argmax(window)), window.shape)
+        if window[wy, wx] >= confidence:
+            refined.append((top + int(wy), left + int(wx), float(window[wy, wx])))
+    refined.sort(key=lambda peak: peak[2], reverse=True)
+    matches = []
+    for y, x, score in refined:
+        if any(abs(y - m.top) < height and abs(x - m.left) < width for m in matches):
+            continue
+        matches.append(Match(x, y, width, height, round(score, 4)))
+        if len(matches) >= limit:
+            break
+    return matches
+
+
+class TemplateCache:
+    """
+    Decoded templates by content hash with LRU eviction.
+
+    Agents send the same icons over and over, decoding and building the
+    pyramid once saves most of the per-request template work.
+    """
+
+    def __init__(self):
+        self._templates: "OrderedDict[str, Template]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, data: bytes) -> Template:
+        """
+        Get the decoded template of encoded image bytes
+
+        Raises:
+            ValueError: If the bytes are not an image or the image has no contrast
+        """
+        key = hashlib.sha1(data).hexdigest()
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self.hits += 1
+                self._templates.move_to_end(key)
+                return template
+        template = self._decode(data)
+        with self._lock:
+            self.misses += 1
+            self._templates[key] = template
+            while len(self._templates) > settings.locate_template_cache_size:
+                self._templates.popitem(last=False)
+        return template
+
+    @staticmethod
+    def _decode(data: bytes) -> Template:
+        try:
+            image = Image.open(BytesIO(data))
+            image.load()
+        except Exception as e:
+            raise ValueError(f"Invalid template image: {e}")
+        levels, norms = [], []
+        for level in _gray_levels(image, _pyramid_depth(image.width, image.height)):
+            level = level - level.mean()
+            norm = float(np.sqrt((level * level).sum()))
+            if norm == 0:
+                if not levels:
+                    raise ValueError("Template image has no contrast")
+                break
+            levels.append(level)
+            norms.append(norm)
+        return Template(levels, norms, image.width, image.height)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._templates)}
+
+
+# Create global template cache instance
+template_cache = TemplateCache()
@@ -0,0 +1,97 @@
+"""Time-driven mouse motion paths"""
+import math
+from typing import Callable, Dict, List, Literal, Tuple
+from core.config import settings
+
+MotionProfile = Literal["linear", "ease", "bezier"]
+
+# (seconds after the start of the motion, x, y)
+MotionPoint = Tuple[float, int, int]
+
+# Pixels of the first move in fast mode, enough to cross common drag start thresholds
+FAST_NUDGE = 8
+
+
+def _linear(t: float) -> float:
+    return t
+
+
+def _ease(t: float) -> float:
+    # Smoothstep: slow start, fast middle, slow end
+    return t * t * (3 - 2 * t)
+
+
+# Progress along the path for a fraction of the duration
+EASINGS: Dict[str, Callable[[float], float]] = {
+    "linear": _linear,
+    "ease": _ease,
+    "bezier": _ease,
+}
+
+
+def _bezier_point(source: Tuple[int, int], target: Tuple[int, int], t: float) -> Tuple[float, float]:
+    """Point of a cubic curve that bows to one side of the straight line, like a hand-drawn drag"""
+    (sx, sy), (tx, ty) = source, target
+    dx, dy = tx - sx, ty - sy
+    # Perpendicular control point offset, 20% of the distance
+    ox, oy = -dy * 0.2, dx * 0.2
+    c1 = (sx + dx * 0.25 + ox, sy + dy * 0.25 + oy)
+    c2 = (sx + dx * 0.75 + ox, sy + dy * 0.75 + oy)
+    u = 1 - t
+    x = u ** 3 * sx + 3 * u * u * t * c1[0] + 3 * u * t * t * c2[0] + t ** 3 * tx
+    y = u ** 3 * sy + 3 * u * u * t * c1[1] + 3 * u * t * t * c2[1] + t ** 3 * ty
+    return x, y
+
+
+def motion_points(
+        source: Tuple[int, int],
+        target: Tuple[int, int],
+        profile: MotionProfile = "linear",
+        duration: float = 0.5,
+        fast: bool = False,
+) -> List[MotionPoint]:
+    """
+    Plan the moves of a motion from source to target, excluding the source
+
+    The number of intermediate points follows the distance (one per drag_step
+    pixels) but never exceeds drag_rate moves per second, and each point is
+    scheduled at a time offset instead of a fixed per-step sleep.
+
+    Args:
+        source: Start position
+        target: End position
+        profile: linear, ease (smoothstep timing) or bezier (curved path with ease timing)
+        duration: Target duration of the motion in seconds
+        fast: Only a short nudge and the target, for apps that just need a drag gesture
+
+    Returns:
+        Scheduled points, the last one is always the target
+    """
+    if profile not in EASINGS:
+        raise ValueError(f"Invalid motion profile: {profile}")
+    (sx, sy), (tx, ty) = source, target
+    distance = math.hypot(tx - sx, ty - sy)
+    if fast or distance == 0:
+        if distance <= FAST_NUDGE:
+            return [(0.0, tx, ty)]
+        nudge = FAST_NUDGE / distance
+        return [
+            (0.0, round(sx + (tx - sx) * nudge), round(sy + (ty - sy) * nudge)),
+            (1 / settings.drag_rate, tx, ty),
+        ]
+
+    duration = max(duration, 0.0)
+    steps = max(1, math.ceil(distance / max(settings.drag_step, 1)))
+    steps = max(1, min(steps, math.ceil(duration * settings.drag_rate)))
+    easing = EASINGS[profile]
+    points = []
+    for i in range(1, steps + 1):
+        t = i / steps
+        progress = easing(t)
+        if profile == "bezier":
+            x, y = _bezier_point(source, target, progress)
+        else:
+            x, y = sx + (tx - sx) * progress, sy + (ty - sy) * progress
+        points.append((duration * t, round(x), round(y)))
+    points[-1] = (points[-1][0], tx, ty)
+    return points
@@ -0,0 +1,80 @@
+"""Observation cache invalidated by input"""
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from core.config import settings
+
+
+class ObservationCache:
+    """
+    Cache observation results (cursor position, screen size, screenshots)
+    for the current input epoch.
+
+    Every input action bumps the epoch before and after it runs, so a read
+    that overlaps an input is never reused. Entries are additionally bounded
+    by a TTL because the screen also changes without input (animations, a
+    user at the machine), and by a maximum entry count.
+    """
+
+    def __init__(self):
+        self.epoch = 0
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def bump(self):
+        """Record that input happened, observations taken before are stale"""
+        self.epoch += 1
+
+    def invalidate(self):
+        """Drop every cached observation"""
+        self.epoch += 1
+        self._entries.clear()
+
+    async def get_or_load(
+            self,
+            key: Hashable,
+            load: Callable[[], Awaitable[Any]],
+            ttl: float,
+            track_input: bool = True,
+    ) -> Any:
+        """
+        Get a cached observation or load and cache it
+
+        Args:
+            key: Observation identity
+            load: Loads the observation on a miss
+            ttl: Maximum age in seconds, 0 disables caching
+            track_input: Whether input invalidates the entry, false for the screen size
+
+        Returns:
+            The observation
+        """
+        if ttl <= 0:
+            return await load()
+        entry = self._entries.get(key)
+        if entry is not None:
+            epoch, loaded_at, value = entry
+            if (not track_input or epoch == self.epoch) and time.monotonic() - loaded_at <= ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+        self.misses += 1
+        # The epoch and time at the start of the read
+        epoch, started_at = self.epoch, time.monotonic()
+        value = await load()
+        if self.epoch != epoch:
+            # Input happened while reading, the value may show the screen before it
+            return value
+        self._entries[key] = (epoch, started_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > settings.observation_cache_max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"epoch": self.epoch, "hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+# Create global observation cache instance
+observation_cache = ObservationCache()
@@ -0,0 +1,50 @@
+"""Pixel colour sampling for cheap state checks"""
+from typing import List, Sequence, Tuple
+import numpy as np
+from PIL import Image
+
+# (left, top, width, height) of a sampled area in image coordinates
+Box = Tuple[int, int, int, int]
+
+
+def mean_colors(image: Image.Image, boxes: Sequence[Box]) -> np.ndarray:
+    """
+    Mean RGB colour of every box of an image
+
+    Every box is cropped out and converted to RGB on its own, so sampling a
+    few points of a large frame never converts the whole frame.
+
+    Args:
+        image: Captured frame
+        boxes: Areas inside the image
+
+    Returns:
+        float array of shape (len(boxes), 3)
+    """
+    colors = np.zeros((len(boxes), 3))
+    for i, (left, top, width, height) in enumerate(boxes):
+        area = image.crop((left, top, left + width, top + height))
+        if area.mode != "RGB":
+            area = area.convert("RGB")
+        colors[i] = np.asarray(area).reshape(-1, 3).mean(axis=0)
+    return colors
+
+
+def colors_match(colors: np.ndarray, expected: Sequence[Sequence[int]], tolerance: int) -> np.ndarray:
+    """
+    Compare sampled colours with expected ones
+
+    Args:
+        colors: Sampled colours, shape (n, 3)
+        expected: Expected RGB colours, one per sampled colour
+        tolerance: Maximum difference per RGB channel
+
+    Returns:
+        bool array of shape (n,)
+    """
+    return (np.abs(colors - np.asarray(expected, dtype=np.float64)) <= tolerance).all(axis=1)
+
+
+def rounded(colors: np.ndarray) -> List[List[int]]:
+    """Colours as lists of ints for responses"""
+    return np.rint(colors).astype(int).tolist()
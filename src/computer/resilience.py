@@ -0,0 +1,270 @@
+"""Circuit breaking, retries and hedging of requests to tool servers"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import httpx
+from core.config import settings
+from core.logger import logger
+from .channel import ChannelRequestError
+
+# Cheap observations worth a second concurrent request when the first is slow
+HEDGED_ACTIONS = {"take_screenshot", "get_cursor_position"}
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of calling an endpoint whose circuit is open"""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Tool server {endpoint} is unavailable (circuit open), retry in {retry_in:.1f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """Status of an error reply over HTTP or the action channel, None if the node did not answer"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    if isinstance(error, ChannelRequestError):
+        return error.status_code
+    return None
+
+
+def is_failure(error: BaseException) -> bool:
+    """Whether an error means the endpoint is unhealthy, not that the request was rejected"""
+    code = status_code(error)
+    if code is not None:
+        return code >= 500
+    return isinstance(error, (httpx.TransportError, ConnectionError, asyncio.TimeoutError)) and not isinstance(error, CircuitOpenError)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an idempotent request may be sent again after the error"""
+    code = status_code(error)
+    if code is not None:
+        # 429: the node's queue is full, it may have room a moment later
+        return code >= 500 or code == 429
+    return is_failure(error)
+
+
+class CircuitBreaker:
+    """
+    Circuit of one endpoint.
+
+    After settings.circuit_failure_threshold consecutive failures the circuit
+    opens and calls fail immediately instead of waiting for a hung node. After
+    settings.circuit_open_seconds it is half-open: up to
+    settings.circuit_half_open_probes calls go through, a success closes the
+    circuit and a failure opens it again.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probes = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < settings.circuit_open_seconds:
+            return "open"
+        return "half_open"
+
+    def before_call(self) -> bool:
+        """
+        Admit a call
+
+        Returns:
+            Whether the call is a half-open probe
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with all probes in flight
+        """
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half_open" and self.probes < settings.circuit_half_open_probes:
+            self.probes += 1
+            return True
+        self.rejected += 1
+        retry_in = max(self.opened_at + settings.circuit_open_seconds - time.monotonic(), 0)
+        raise CircuitOpenError(self.endpoint, retry_in)
+
+    def on_success(self):
+        if self.opened_at is not None:
+            logger.info("Circuit of {} closed", self.endpoint)
+        self.failures = 0
+        self.opened_at = None
+        self.probes = 0
+
+    def on_failure(self):
+        self.failures += 1
+        if self.opened_at is not None:
+            # A failed half-open probe restarts the open period
+            self.opened_at = time.monotonic()
+            self.probes = 0
+        elif self.failures >= settings.circuit_failure_threshold:
+            logger.warning("Circuit of {} opened after {} consecutive failures", self.endpoint, self.failures)
+            self.opened_at = time.monotonic()
+            self.probes = 0
+
+
+class LatencyWindow:
+    """Latencies of the most recent successful requests"""
+
+    def __init__(self):
+        self._samples: deque = deque(maxlen=settings.hedge_window)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The q-th percentile, None until settings.hedge_min_samples were recorded"""
+        if len(self._samples) < settings.hedge_min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)]
+
+
+class Resilience:
+    """
+    Per-endpoint circuit breakers, retries and hedging around tool server requests.
+
+    Every request goes through the circuit of its endpoint. Idempotent
+    observations are retried with jittered exponential backoff, and when
+    hedging is enabled a take_screenshot or get_cursor_position that is
+    slower than the endpoint's p95 latency races a second identical request.
+    Input actions are sent exactly once.
+    """
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[Tuple[str, str], LatencyWindow] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        key = (endpoint or "").rstrip("/")
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(key)
+        return breaker
+
+    def state(self, endpoint: str) -> str:
+        breaker = self._breakers.get((endpoint or "").rstrip("/"))
+        return breaker.state if breaker else "closed"
+
+    def _latency(self, endpoint: str, action: str) -> LatencyWindow:
+        key = ((endpoint or "").rstrip("/"), action)
+        window = self._latencies.get(key)
+        if window is None:
+            window = self._latencies[key] = LatencyWindow()
+        return window
+
+    @staticmethod
+    def backoff(attempt: int) -> float:
+        """Full jitter: uniform up to the exponential backoff of the attempt"""
+        return random.uniform(0, min(settings.retry_backoff * 2 ** attempt, settings.retry_backoff_max))
+
+    async def call(
+            self,
+            endpoint: str,
+            action: str,
+            send: Callable[[], Awaitable[Any]],
+            idempotent: bool = False,
+            hedge: bool = False,
+    ) -> Any:
+        """
+        Send a request through the endpoint's circuit
+
+        Args:
+            endpoint: Tool server base URL
+            action: snake_case action name, keys the latency statistics
+            send: Sends the request once
+            idempotent: Whether the request may be retried
+            hedge: Whether a slow request may be hedged, only for idempotent requests
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        breaker = self.breaker(endpoint)
+        attempts = 1 + (settings.retry_attempts if idempotent else 0)
+        for attempt in range(attempts):
+            probe = breaker.before_call()
+            try:
+                if hedge and idempotent and settings.hedge_enabled:
+                    result = await self._hedged(endpoint, action, send)
+                else:
+                    result = await self._timed(endpoint, action, send)
+            except asyncio.CancelledError:
+                # The caller gave up, the outcome says nothing about the endpoint
+                if probe:
+                    breaker.probes -= 1
+                raise
+            except Exception as e:
+                if not is_failure(e):
+                    # The node answered, it is reachable
+                    breaker.on_success()
+                    if not (idempotent and is_retryable(e)) or attempt == attempts - 1:
+                        raise
+                else:
+                    breaker.on_failure()
+                    if not idempotent or attempt == attempts - 1:
+                        raise
+                self.retries += 1
+                delay = self.backoff(attempt)
+                logger.warning("Retrying {} on {} in {:.2f}s after: {}", action, endpoint, delay, e)
+                await asyncio.sleep(delay)
+                continue
+            breaker.on_success()
+            return result
+
+    async def _timed(self, endpoint: str, action: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        result = await send()
+        self._latency(endpoint, action).add(time.perf_counter() - start)
+        return result
+
+    async def _hedged(self, endpoint: str, action: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        """Send once, and a second time if the first takes longer than the p95 latency"""
+        delay = self._latency(endpoint, action).percentile(95)
+        if delay is None:
+            return await self._timed(endpoint, action, send)
+        first = asyncio.create_task(self._timed(endpoint, action, send))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedges += 1
+                tasks.add(asyncio.create_task(self._timed(endpoint, action, send)))
+            errors = []
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                # Retrieve every exception, also of a request that lost the race
+                errors.extend(task.exception() for task in done if task.exception() is not None)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    if winner is not first:
+                        self.hedge_wins += 1
+                    return winner.result()
+            raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "circuits": {endpoint: breaker.state for endpoint, breaker in self._breakers.items()},
+        }
+
+
+# Create global resilience instance
+resilience = Resilience()
@@ -0,0 +1,157 @@
+"""Per-node scheduling of computer actions: ordered input lane, concurrent read lane"""
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from core.config import settings
+
+# Observations do not change the screen and may run concurrently
+READ_ACTIONS = {"take_screenshot", "capture_screenshot", "get_cursor_position", "get_screen_size", "locate_image", "get_pixels"}
+
+# Pure pauses, screen waits and cache maintenance hold no lane, a wait must not stall other
+# clients' input or occupy a read slot for its whole duration
+UNSCHEDULED_ACTIONS = {"wait", "wait_for_screen_change", "wait_until_stable", "wait_for_pixels", "invalidate_cache"}
+
+
+class SchedulerFullError(Exception):
+    """Raised when a lane queue is full and the request is rejected"""
+
+    def __init__(self, lane: str, limit: int):
+        super().__init__(f"{lane} queue is full ({limit} waiting), retry later")
+        self.lane = lane
+        self.limit = limit
+
+
+class Lane:
+    """
+    Priority gate admitting at most `concurrency` holders at a time.
+
+    Waiters are admitted by descending priority, FIFO within a priority.
+    Waiting is plain awaiting, so a cancelled request (deadline, disconnect)
+    leaves the queue or frees its slot without extra bookkeeping.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _wake(self):
+        while self._waiters and self._running < self.concurrency:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._running += 1
+                future.set_result(None)
+
+    async def _acquire(self, priority: int):
+        if self._running < self.concurrency and not self._waiters:
+            self._running += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerFullError(self.name, self.max_queue)
+        future = asyncio.get_running_loop().create_future()
+        entry = [-priority, next(self._seq), future]
+        heapq.heappush(self._waiters, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted and cancelled in the same step, hand the slot on
+                self._running -= 1
+                self._wake()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def _release(self):
+        self._running -= 1
+        self.completed += 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0):
+        """Hold a slot of the lane, raises SchedulerFullError if the queue is full"""
+        start = time.monotonic()
+        await self._acquire(priority)
+        waited = time.monotonic() - start
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def metrics(self) -> Dict[str, Any]:
+        admitted = self.completed + self._running
+        return {
+            "running": self._running,
+            "queued": len(self._waiters),
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self._wait_total / admitted * 1000, 3) if admitted else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 3),
+        }
+
+
+class ActionScheduler:
+    """
+    Admission control in front of the computer tool of this node.
+
+    Input actions (and whole batches) run one at a time in priority/FIFO
+    order so a drag never interleaves with a click, observations share a
+    concurrent read lane, and both queues are bounded so overload is
+    rejected quickly instead of piling up.
+    """
+
+    def __init__(self):
+        self.input = Lane("input", 1, settings.scheduler_input_queue_size)
+        self.read = Lane("read", settings.scheduler_read_concurrency, settings.scheduler_read_queue_size)
+
+    def lane_for(self, action: str) -> Optional[Lane]:
+        if action in UNSCHEDULED_ACTIONS:
+            return None
+        if action in READ_ACTIONS:
+            return self.read
+        return self.input
+
+    async def run(self, action: str, call: Callable[[], Awaitable[Any]], priority: int = 0) -> Any:
+        """
+        Run an action in its lane
+
+        Args:
+            action: snake_case action name, "batch" for a whole batch
+            call: Starts the action, only invoked once admitted
+            priority: Higher runs first among waiting requests
+
+        Raises:
+            SchedulerFullError: If the lane queue is full
+        """
+        lane = self.lane_for(action)
+        if lane is None:
+            return await call()
+        async with lane.slot(priority):
+            return await call()
+
+    def load(self) -> int:
+        """Actions running or waiting in any lane, reported to the gateway for node placement"""
+        return sum(lane._running + len(lane._waiters) for lane in (self.input, self.read))
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"input": self.input.metrics(), "read": self.read.metrics()}
+
+
+# Create global action scheduler instance
+action_scheduler = ActionScheduler()
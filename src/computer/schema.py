@@ -1,6 +1,5 @@
-from typing import Literal
-from pydantic import  Field
-from core.config import settings
+from typing import Literal, Dict, Any, List
+from pydantic import  Field, model_validator
 from src.common import BaseResponse, MBaseModel
 import pyperclip
 import pyautogui
@@ -8,6 +7,9 @@ import pyautogui
 class MoveMouseRequest(MBaseModel):
     x: int = Field(0, description="x position", alias="PositionX")
     y: int = Field(0, description="y position", alias="PositionY")
+    coordinate_scale: float = Field(
+        1.0, gt=0, description="scale of the screenshot the coordinates refer to", alias="CoordinateScale"
+    )
 
 class ClickMouseRequest(MBaseModel):
     x: int = Field(0, description="x position", alias="PositionX")
@@ -17,6 +19,9 @@ class ClickMouseRequest(MBaseModel):
     )
     press: bool = Field(False, description="press mouse", alias="Press")
     release: bool = Field(False, description="release mouse", alias="Release")
+    coordinate_scale: float = Field(
+        1.0, gt=0, description="scale of the screenshot the coordinates refer to", alias="CoordinateScale"
+    )
 
 class PressMouseRequest(MBaseModel):
     x: int = Field(0, description="x position", alias="PositionX")
@@ -24,6 +29,9 @@ class PressMouseRequest(MBaseModel):
     button: Literal["left", "right", "middle"] = Field(
         "left", alias="Button"
     )
+    coordinate_scale: float = Field(
+        1.0, gt=0, description="scale of the screenshot the coordinates refer to", alias="CoordinateScale"
+    )
 
 class ReleaseMouseRequest(MBaseModel):
     x: int = Field(0, description="x position", alias="PositionX")
@@ -31,12 +39,23 @@ class ReleaseMouseRequest(MBaseModel):
     button: Literal["left", "right", "middle"] = Field(
         "left", alias="Button"
     )
+    coordinate_scale: float = Field(
+        1.0, gt=0, description="scale of the screenshot the coordinates refer to", alias="CoordinateScale"
+    )
 
 class DragMouseRequest(MBaseModel):
     source_x: int = Field(0, description="source x position", alias="SourceX")
     source_y: int = Field(0, description="source y position", alias="SourceY")
     target_x: int = Field(0, description="target x position", alias="TargetX")
     target_y: int = Field(0, description="target y position", alias="TargetY")
+    duration: int | None = Field(None, ge=0, description="drag duration in milliseconds, defaults to the server setting", alias="Duration")
+    profile: Literal["linear", "ease", "bezier"] | None = Field(
+        None, description="motion profile, defaults to the server setting", alias="Profile"
+    )
+    fast: bool = Field(False, description="press, nudge, jump to the target and release with minimal intermediate points", alias="Fast")
+    coordinate_scale: float = Field(
+        1.0, gt=0, description="scale of the screenshot the coordinates refer to", alias="CoordinateScale"
+    )
 
 class ScrollRequest(MBaseModel):
     scroll_direction: Literal["up", "down", "left", "right"] = Field(
@@ -45,6 +64,9 @@ class ScrollRequest(MBaseModel):
     scroll_amount: int = Field(0, description="scroll amount", alias="Amount")
     x: int = Field(0, description="x position", alias="PositionX")
     y: int = Field(0, description="y position", alias="PositionY")
+    coordinate_scale: float = Field(
+        1.0, gt=0, description="scale of the screenshot the coordinates refer to", alias="CoordinateScale"
+    )
 
 class PressKeyRequest(MBaseModel):
     key: str = Field("", description="key", alias="Key")
@@ -56,8 +78,47 @@ class WaitRequest(MBaseModel):
     duration: int = Field(0, description="duration", alias="Duration")
 
 
+class ScreenRegion(MBaseModel):
+    """Rectangular screen area"""
+    left: int = Field(0, ge=0, description="left position", alias="Left")
+    top: int = Field(0, ge=0, description="top position", alias="Top")
+    width: int = Field(gt=0, description="width", alias="Width")
+    height: int = Field(gt=0, description="height", alias="Height")
+
+    @model_validator(mode="before")
+    @classmethod
+    def parse_sequence(cls, data):
+        """Also accept "left,top,width,height" strings and [left, top, width, height] lists"""
+        if isinstance(data, str):
+            data = [v for v in data.split(",") if v.strip()]
+        if isinstance(data, (list, tuple)):
+            if len(data) != 4:
+                raise ValueError("region must be left, top, width, height")
+            return dict(zip(("left", "top", "width", "height"), data))
+        return data
+
+    def as_tuple(self) -> tuple[int, int, int, int]:
+        return self.left, self.top, self.width, self.height
+
 class TakeScreenshotRequest(MBaseModel):
-    pass
+    format: Literal["png", "jpeg", "webp"] | None = Field(
+        None, description="image format, defaults to the server setting", alias="Format"
+    )
+    quality: int | None = Field(None, ge=1, le=100, description="jpeg/webp quality", alias="Quality")
+    compress_level: int | None = Field(None, ge=0, le=9, description="png compression level", alias="CompressLevel")
+    scale: float | None = Field(None, gt=0, le=1, description="downscale factor", alias="Scale")
+    max_width: int | None = Field(None, ge=0, description="maximum image width", alias="MaxWidth")
+    max_height: int | None = Field(None, ge=0, description="maximum image height", alias="MaxHeight")
+    region: ScreenRegion | None = Field(None, description="capture only this screen area", alias="Region")
+    coordinate_scale: float = Field(
+        1.0, gt=0, description="scale of the screenshot the region refers to", alias="CoordinateScale"
+    )
+    delta: bool = Field(False, description="return only the tiles changed since the session's last delta screenshot", alias="Delta")
+    keyframe: bool = Field(False, description="in delta mode, return the full frame and make it the new reference", alias="Keyframe")
+    session: str | None = Field(None, description="session the delta reference frame is kept for", alias="Session")
+    after: int | None = Field(
+        None, ge=0, description="unix time in milliseconds, use the first frame captured at or after it", alias="After"
+    )
 
 
 class GetCursorPositionRequest(MBaseModel):
@@ -67,6 +128,79 @@ class GetCursorPositionRequest(MBaseModel):
 class GetScreenSizeRequest(MBaseModel):
     pass
 
+
+class InvalidateCacheRequest(MBaseModel):
+    pass
+
+
+class WaitForScreenChangeRequest(MBaseModel):
+    region: ScreenRegion | None = Field(None, description="watch only this screen area", alias="Region")
+    coordinate_scale: float = Field(
+        1.0, gt=0, description="scale of the screenshot the region refers to", alias="CoordinateScale"
+    )
+    timeout: int = Field(10000, ge=0, description="maximum wait in milliseconds", alias="Timeout")
+    interval: int | None = Field(None, gt=0, description="milliseconds between checks, defaults to the server setting", alias="Interval")
+
+
+class WaitUntilStableRequest(WaitForScreenChangeRequest):
+    stable: int = Field(500, ge=0, description="milliseconds the screen must stay unchanged", alias="Stable")
+
+
+class PixelProbe(MBaseModel):
+    """Screen point, or small area whose mean colour is sampled"""
+    x: int = Field(ge=0, description="x position", alias="PositionX")
+    y: int = Field(ge=0, description="y position", alias="PositionY")
+    width: int = Field(1, gt=0, description="width of the sampled area", alias="Width")
+    height: int = Field(1, gt=0, description="height of the sampled area", alias="Height")
+    color: List[int] | None = Field(
+        None, min_length=3, max_length=3, description="expected RGB colour, used by wait_for_pixels", alias="Color"
+    )
+
+    @model_validator(mode="before")
+    @classmethod
+    def parse_sequence(cls, data):
+        """Also accept [x, y] and [x, y, width, height] lists"""
+        if isinstance(data, (list, tuple)):
+            if len(data) not in (2, 4):
+                raise ValueError("pixel must be x, y or x, y, width, height")
+            return dict(zip(("x", "y", "width", "height"), data))
+        return data
+
+
+class GetPixelsRequest(MBaseModel):
+    pixels: List[PixelProbe] = Field(min_length=1, max_length=256, description="points or small areas to sample", alias="Pixels")
+    coordinate_scale: float = Field(
+        1.0, gt=0, description="scale of the screenshot the coordinates refer to", alias="CoordinateScale"
+    )
+
+
+class WaitForPixelsRequest(GetPixelsRequest):
+    tolerance: int = Field(16, ge=0, le=255, description="maximum difference per RGB channel", alias="Tolerance")
+    mode: Literal["all", "any"] = Field("all", description="whether all or any pixel must match", alias="Mode")
+    timeout: int = Field(10000, ge=0, description="maximum wait in milliseconds", alias="Timeout")
+    interval: int | None = Field(None, gt=0, description="milliseconds between checks, defaults to the server setting", alias="Interval")
+
+
+class LocateImageRequest(MBaseModel):
+    template: str = Field(description="base64-encoded template image (png, jpeg or webp)", alias="Template")
+    region: ScreenRegion | None = Field(None, description="search only this screen area", alias="Region")
+    coordinate_scale: float = Field(
+        1.0, gt=0, description="scale of the screenshot the template and region were taken from", alias="CoordinateScale"
+    )
+    confidence: float = Field(0.9, ge=0, le=1, description="minimum match confidence", alias="Confidence")
+    limit: int = Field(10, gt=0, le=100, description="maximum number of matches", alias="Limit")
+
+class BatchActionItem(MBaseModel):
+    """Single step of a batch"""
+    action: str = Field(description="action name, camelCase or snake_case", alias="Action")
+    params: Dict[str, Any] = Field(default_factory=dict, description="action parameters", alias="Params")
+    delay: int | None = Field(None, description="delay in milliseconds after this step, overrides the batch delay", alias="Delay")
+
+class BatchActionsRequest(MBaseModel):
+    actions: List[BatchActionItem] = Field(default_factory=list, description="ordered actions", alias="Actions")
+    delay: int = Field(0, description="delay in milliseconds between steps", alias="Delay")
+    stop_on_error: bool = Field(True, description="stop at the first failed step", alias="StopOnError")
+
 # Response models
 class CursorPositionResource(MBaseModel):
     """Resource model for cursor position"""
@@ -86,14 +220,127 @@ class ScreenSizeResponse(BaseResponse):
     """Response model for getting screen size"""
     Result: ScreenSizeResource = None
 
+class ScreenWaitResource(MBaseModel):
+    """Resource model for waiting on the screen"""
+    changed: bool = Field(False, description="whether the screen changed while waiting", alias="Changed")
+    stable: bool = Field(False, description="whether the screen stayed unchanged for the requested time", alias="Stable")
+    timed_out: bool = Field(False, description="whether the timeout passed first", alias="TimedOut")
+    elapsed: int = Field(0, description="waited milliseconds", alias="Elapsed")
+    checks: int = Field(0, description="number of compared frames", alias="Checks")
+
+class ScreenWaitResponse(BaseResponse):
+    """Response model for waiting on the screen"""
+    Result: ScreenWaitResource = None
+
+class PixelResource(MBaseModel):
+    """Resource model for a sampled pixel or area"""
+    x: int = Field(0, description="x position", alias="PositionX")
+    y: int = Field(0, description="y position", alias="PositionY")
+    width: int = Field(1, description="width of the sampled area", alias="Width")
+    height: int = Field(1, description="height of the sampled area", alias="Height")
+    color: List[int] = Field(default_factory=list, description="RGB colour, the mean colour for areas", alias="Color")
+    matched: bool | None = Field(None, description="whether the colour matches the expected one", alias="Matched")
+
+class PixelsResource(MBaseModel):
+    """Resource model for sampled pixels"""
+    pixels: List[PixelResource] = Field(default_factory=list, description="samples in request order", alias="Pixels")
+
+class PixelsResponse(BaseResponse):
+    """Response model for sampling pixels"""
+    Result: PixelsResource = None
+
+class PixelsWaitResource(PixelsResource):
+    """Resource model for waiting on pixel colours"""
+    matched: bool = Field(False, description="whether the pixels matched before the timeout", alias="Matched")
+    timed_out: bool = Field(False, description="whether the timeout passed first", alias="TimedOut")
+    elapsed: int = Field(0, description="waited milliseconds", alias="Elapsed")
+    checks: int = Field(0, description="number of samples taken", alias="Checks")
+
+class PixelsWaitResponse(BaseResponse):
+    """Response model for waiting on pixel colours"""
+    Result: PixelsWaitResource = None
+
+class ImageMatchResource(MBaseModel):
+    """Resource model for a located template"""
+    left: int = Field(0, description="x position", alias="Left")
+    top: int = Field(0, description="y position", alias="Top")
+    width: int = Field(0, description="width", alias="Width")
+    height: int = Field(0, description="height", alias="Height")
+    center_x: int = Field(0, description="x position of the center, e.g. to click the match", alias="CenterX")
+    center_y: int = Field(0, description="y position of the center", alias="CenterY")
+    confidence: float = Field(0.0, description="normalised cross-correlation of the match", alias="Confidence")
+
+class LocateImageResource(MBaseModel):
+    """Resource model for locating a template"""
+    matches: List[ImageMatchResource] = Field(default_factory=list, description="matches, best first", alias="Matches")
+
+class LocateImageResponse(BaseResponse):
+    """Response model for locating a template"""
+    Result: LocateImageResource = None
+
+class ScreenshotTile(MBaseModel):
+    """Changed area of a delta screenshot"""
+    left: int = Field(0, description="x position in the image", alias="Left")
+    top: int = Field(0, description="y position in the image", alias="Top")
+    width: int = Field(0, description="tile width", alias="Width")
+    height: int = Field(0, description="tile height", alias="Height")
+    screenshot: str = Field(alias="Screenshot")
+
 class ScreenshotResource(MBaseModel):
     """Resource model for screenshot"""
     screenshot: str = Field(alias="Screenshot")
+    format: str = Field("png", description="image format", alias="Format")
+    scale: float = Field(1.0, description="image pixels per screen coordinate", alias="Scale")
+    left: int = Field(0, description="screen x position of the image origin", alias="Left")
+    top: int = Field(0, description="screen y position of the image origin", alias="Top")
+    width: int = Field(0, description="image width", alias="Width")
+    height: int = Field(0, description="image height", alias="Height")
+    screen_width: int = Field(0, description="screen width", alias="ScreenWidth")
+    screen_height: int = Field(0, description="screen height", alias="ScreenHeight")
+    captured_at: int = Field(0, description="unix time in milliseconds when the capture started", alias="CapturedAt")
+    keyframe: bool = Field(True, description="whether screenshot holds the full image, false for deltas", alias="Keyframe")
+    tiles: List[ScreenshotTile] | None = Field(
+        None, description="changed tiles of a delta screenshot, empty if the screen is unchanged", alias="Tiles"
+    )
 
 class ScreenshotResponse(BaseResponse):
     """Response model for taking screenshot"""
     Result: ScreenshotResource = None
 
+class ScreenshotImage(MBaseModel):
+    """Encoded screenshot bytes with their metadata, used by the binary screenshot transport"""
+    data: bytes = Field(description="encoded image bytes", repr=False)
+    format: str = Field("png", description="image format")
+    width: int = Field(0, description="image width")
+    height: int = Field(0, description="image height")
+    screen_width: int = Field(0, description="screen width")
+    screen_height: int = Field(0, description="screen height")
+    scale: float = Field(1.0, description="image pixels per screen coordinate, divide image coordinates by it to get screen coordinates")
+    left: int = Field(0, description="screen x position of the image origin, non-zero for region captures")
+    top: int = Field(0, description="screen y position of the image origin, non-zero for region captures")
+    captured_at: int = Field(0, description="unix time in milliseconds when the capture started")
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.format}"
+
+class BatchStepResource(MBaseModel):
+    """Resource model for a single batch step result"""
+    index: int = Field(0, description="step index", alias="Index")
+    action: str = Field("", description="action name", alias="Action")
+    result: Any = Field(None, description="action result", alias="Result")
+    error: str | None = Field(None, description="error message if the step failed", alias="Error")
+
+class BatchActionsResource(MBaseModel):
+    """Resource model for batch execution"""
+    steps: List[BatchStepResource] = Field(default_factory=list, alias="Steps")
+    completed: int = Field(0, description="number of successful steps", alias="Completed")
+    failed: bool = Field(False, description="whether any step failed", alias="Failed")
+
+class BatchActionsResponse(BaseResponse):
+    """Response model for batch execution"""
+    Result: BatchActionsResource = None
+
 
 def chunks(s: str, chunk_size: int) -> list[str]:
     return [s[i: i + chunk_size] for i in range(0, len(s), chunk_size)]
@@ -102,15 +349,3 @@ def paste(foo):
 
     pyperclip.copy(foo)
     pyautogui.hotkey('ctrl', 'v')
-
-def gen_path(source_x, source_y, target_x, target_y):
-    drag_path = [[source_x, source_y]]
-    dx = target_x - source_x
-    dy = target_y - source_y
-    steps = max(abs(int(dx / settings.drag_step)), abs(int(dy / settings.drag_step)))
-    for i in range(steps):
-        x = source_x + int(dx * i / steps)
-        y = source_y + int(dy * i / steps)
-        drag_path.append([x, y])
-    drag_path.append([target_x, target_y])
-    return drag_path
@@ -0,0 +1,43 @@
+"""Per MCP session state of the computer control tools"""
+from collections import OrderedDict
+from typing import Tuple
+from fastmcp.server.dependencies import get_context
+
+# Upper bound of tracked (session, endpoint) pairs, the oldest are evicted first
+MAX_TRACKED_SESSIONS = 10000
+
+# Scale of the last full screenshot each session took of each endpoint
+_coordinate_scales: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+
+
+def current_session_id() -> str:
+    """Get the MCP session ID of the current tool call, "default" outside of a session"""
+    try:
+        return get_context().session_id
+    except RuntimeError:
+        return "default"
+
+
+def get_coordinate_scale(endpoint: str) -> float:
+    """
+    Get the coordinate scale of the current session for an endpoint
+
+    Coordinates passed to mouse tools refer to the last screenshot the session
+    saw, so they are sent with its scale and mapped back to screen pixels on
+    the tool server.
+    """
+    key = (current_session_id(), endpoint or "")
+    scale = _coordinate_scales.get(key)
+    if scale is None:
+        return 1.0
+    _coordinate_scales.move_to_end(key)
+    return scale
+
+
+def set_coordinate_scale(endpoint: str, scale: float):
+    """Remember the scale of the screenshot the current session just received"""
+    key = (current_session_id(), endpoint or "")
+    _coordinate_scales[key] = scale or 1.0
+    _coordinate_scales.move_to_end(key)
+    while len(_coordinate_scales) > MAX_TRACKED_SESSIONS:
+        _coordinate_scales.popitem(last=False)
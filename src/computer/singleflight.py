@@ -0,0 +1,82 @@
+"""Single-flight deduplication of identical concurrent calls"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from core.config import settings
+from .observation import observation_cache
+
+
+class SingleFlight:
+    """
+    Share one execution between concurrent calls with the same key.
+
+    The first caller starts the call, callers arriving while it runs, or up
+    to `window` seconds after it finished, get the same result. The call runs
+    in its own task, so a cancelled caller does not abort it for the others.
+    Failures are shared with the callers already waiting but never cached.
+
+    With an `epoch` source, e.g. the input epoch, a call only joins flights
+    started in the current epoch, so a capture begun before a click is never
+    returned for a request made after it.
+    """
+
+    def __init__(self, window: float = 0.0, epoch: Optional[Callable[[], Hashable]] = None):
+        self.window = window
+        self.epoch = epoch
+        self._flights: Dict[Hashable, Tuple[asyncio.Task, float]] = {}
+        self.started = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a call or join the identical one in flight
+
+        Args:
+            key: Identity of the call, e.g. the normalized request
+            call: Starts the call when no usable flight exists
+
+        Returns:
+            Result of the call
+        """
+        if self.epoch is not None:
+            key = (key, self.epoch())
+        now = time.monotonic()
+        flight = self._flights.get(key)
+        if flight is not None:
+            task, finished_at = flight
+            fresh = not task.done() or (
+                not task.cancelled() and task.exception() is None and now - finished_at <= self.window
+            )
+            if fresh:
+                self.shared += 1
+                return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(call())
+        self._flights[key] = (task, now)
+        self.started += 1
+
+        def finished(done: asyncio.Task):
+            current = self._flights.get(key)
+            if current is None or current[0] is not done:
+                return
+            if done.cancelled() or done.exception() is not None or self.window <= 0:
+                del self._flights[key]
+            else:
+                self._flights[key] = (done, time.monotonic())
+                # Drop the entry once it went stale
+                asyncio.get_running_loop().call_later(self.window, self._expire, key, done)
+
+        task.add_done_callback(finished)
+        return await asyncio.shield(task)
+
+    def _expire(self, key: Hashable, task: asyncio.Task):
+        current = self._flights.get(key)
+        if current is not None and current[0] is task:
+            del self._flights[key]
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"started": self.started, "shared": self.shared, "entries": len(self._flights)}
+
+
+# Create global screenshot single-flight instance, shared by the binary and JSON screenshot routes
+screenshot_flights = SingleFlight(settings.screenshot_coalesce_window, lambda: observation_cache.epoch)
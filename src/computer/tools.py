@@ -1,4 +1,5 @@
-from typing import Dict, Any
+import base64
+from typing import Dict, Any, Literal
 from fastmcp import FastMCP
 from mcp import types
 from src.computer.computer_pyautogui import PyAutoGUIComputerTool
@@ -6,8 +7,12 @@ from src.common import BaseResult
 from core.constants import REQUEST_MODELS
 from core.logger import logger
 from src.computer.computer_pyautogui import PyAutoGUIComputerTool
-from src.computer.base import IComputerTool
+from src.computer.base import IComputerTool, delta_screenshot_contents
 from src.common import handle_error
+from src.computer.session import get_coordinate_scale, set_coordinate_scale, current_session_id
+from src.computer.client import pixel_probes
+from src.computer.frame_store import register_frame_resources, stored_screenshot_contents
+from core.config import settings
 from src.computer.schema import (
     TakeScreenshotRequest,
     GetCursorPositionRequest,
@@ -50,6 +55,8 @@ async def execute_computer_action(method_name: str, request_data: Dict[str, Any]
 
 def register_computer_tools(mcp: FastMCP):
     """Register all computer control tools with the MCP server"""
+    # Screenshots returned as resource links are read from here
+    register_frame_resources(mcp)
     
     # ============================================================================
     # Mouse Control Tools
@@ -72,7 +79,7 @@ def register_computer_tools(mcp: FastMCP):
         Example:
             move_mouse(x=100, y=200)  # Move mouse to position (100, 200)
         """
-        request_data = {"x": x, "y": y}
+        request_data = {"x": x, "y": y, "coordinate_scale": get_coordinate_scale(None)}
         try:
             result = await execute_computer_action("move_mouse", request_data)
             if not result:
@@ -111,7 +118,10 @@ def register_computer_tools(mcp: FastMCP):
             click_mouse(x=100, y=200, button="right")  # Right click at (100, 200)
             click_mouse(x=100, y=200, button="double_left")  # Double click at (100, 200)
         """
-        request_data = {"x": x, "y": y, "button": button, "press": press, "release": release}
+        request_data = {
+            "x": x, "y": y, "button": button, "press": press, "release": release,
+            "coordinate_scale": get_coordinate_scale(None),
+        }
         try:
             result = await execute_computer_action("click_mouse", request_data)
             if not result:
@@ -141,7 +151,7 @@ def register_computer_tools(mcp: FastMCP):
         Example:
             press_mouse(x=100, y=200, button="left")  # Press left button at (100, 200)
         """
-        request_data = {"x": x, "y": y, "button": button}
+        request_data = {"x": x, "y": y, "button": button, "coordinate_scale": get_coordinate_scale(None)}
         try:
             result = await execute_computer_action("press_mouse", request_data)
             if not result:
@@ -173,7 +183,7 @@ def register_computer_tools(mcp: FastMCP):
         Example:
             release_mouse(x=300, y=400, button="left")  # Release left button at (300, 400)
         """
-        request_data = {"x": x, "y": y, "button": button}
+        request_data = {"x": x, "y": y, "button": button, "coordinate_scale": get_coordinate_scale(None)}
         try:
             result = await execute_computer_action("release_mouse", request_data)
             if not result:
@@ -190,7 +200,15 @@ def register_computer_tools(mcp: FastMCP):
         return result
     
     @mcp.tool()
-    async def drag_mouse(source_x: int, source_y: int, target_x: int, target_y: int) -> dict:
+    async def drag_mouse(
+        source_x: int,
+        source_y: int,
+        target_x: int,
+        target_y: int,
+        duration: int | None = None,
+        profile: Literal["linear", "ease", "bezier"] | None = None,
+        fast: bool = False
+    ) -> dict:
         """
         Drag the mouse from source coordinates to target coordinates.
         This performs a complete drag operation: press at source, move to target, then release.
@@ -200,6 +218,9 @@ def register_computer_tools(mcp: FastMCP):
             source_y: The starting y-coordinate
             target_x: The ending x-coordinate
             target_y: The ending y-coordinate
+            duration: Drag duration in milliseconds (default: server setting)
+            profile: Motion profile - "linear", "ease" or "bezier" (curved path)
+            fast: Press, nudge, jump to the target and release, for apps that only need the gesture
         
         Returns:
             dict: Result with output and error fields
@@ -212,7 +233,11 @@ def register_computer_tools(mcp: FastMCP):
             "source_x": source_x,
             "source_y": source_y,
             "target_x": target_x,
-            "target_y": target_y
+            "target_y": target_y,
+            "duration": duration,
+            "profile": profile,
+            "fast": fast,
+            "coordinate_scale": get_coordinate_scale(None),
         }
         try:
             result = await execute_computer_action("drag_mouse", request_data)
@@ -256,7 +281,8 @@ def register_computer_tools(mcp: FastMCP):
             "scroll_direction": scroll_direction,
             "scroll_amount": scroll_amount,
             "x": x,
-            "y": y
+            "y": y,
+            "coordinate_scale": get_coordinate_scale(None),
         }
         try:
             result = await execute_computer_action("scroll", request_data)
@@ -372,41 +398,167 @@ def register_computer_tools(mcp: FastMCP):
             return handle_error("wait", e)
     
     @mcp.tool()
-    async def take_screenshot() -> list[types.Content]:
+    async def wait_for_screen_change(region: list[int] | None = None, timeout: int = 10000) -> dict:
         """
-        Take a screenshot of the entire screen and return it as a base64-encoded PNG image.
+        Wait until the screen (or a region of it) changes, checked on the machine without
+        sending screenshots. Use it after an action whose effect takes a moment to appear.
+        
+        Args:
+            region: Watch only this area, [left, top, width, height] in the same
+                    coordinates as the mouse tools (default: whole screen)
+            timeout: Maximum wait in milliseconds
         
         Returns:
-            dict: Result with output and error fields
-                - output: Base64-encoded PNG image string if successful, None otherwise
-                - error: Error message if any, None otherwise
+            dict: changed, timed_out, elapsed milliseconds and number of checks
+        
+        Example:
+            wait_for_screen_change(timeout=5000)  # Wait up to 5 seconds for anything to change
+        """
+        request_data = {"region": region, "timeout": timeout, "coordinate_scale": get_coordinate_scale(None)}
+        try:
+            result = await execute_computer_action("wait_for_screen_change", request_data)
+            if not result or not result.get("output"):
+                return handle_error("wait_for_screen_change", "Failed to wait for a screen change")
+            return types.TextContent(
+                type="text",
+                text=str(result["output"].model_dump())
+            )
+        except Exception as e:
+            return handle_error("wait_for_screen_change", e)
+    
+    @mcp.tool()
+    async def wait_until_stable(stable: int = 500, region: list[int] | None = None, timeout: int = 10000) -> dict:
+        """
+        Wait until the screen (or a region of it) stopped changing, e.g. until a page finished
+        loading, checked on the machine without sending screenshots.
+        
+        Args:
+            stable: Milliseconds the screen must stay unchanged
+            region: Watch only this area, [left, top, width, height] in the same
+                    coordinates as the mouse tools (default: whole screen)
+            timeout: Maximum wait in milliseconds
+        
+        Returns:
+            dict: stable, changed, timed_out, elapsed milliseconds and number of checks
+        
+        Example:
+            wait_until_stable(stable=1000)  # Wait until nothing changed for 1 second
+        """
+        request_data = {"stable": stable, "region": region, "timeout": timeout, "coordinate_scale": get_coordinate_scale(None)}
+        try:
+            result = await execute_computer_action("wait_until_stable", request_data)
+            if not result or not result.get("output"):
+                return handle_error("wait_until_stable", "Failed to wait until the screen is stable")
+            return types.TextContent(
+                type="text",
+                text=str(result["output"].model_dump())
+            )
+        except Exception as e:
+            return handle_error("wait_until_stable", e)
+    
+    @mcp.tool()
+    async def take_screenshot(
+        format: Literal["png", "jpeg", "webp"] | None = None,
+        quality: int | None = None,
+        compress_level: int | None = None,
+        scale: float | None = None,
+        max_width: int | None = None,
+        max_height: int | None = None,
+        region: list[int] | None = None,
+        delta: bool = False,
+        keyframe: bool = False,
+        inline: bool | None = None
+    ) -> list[types.Content]:
+        """
+        Take a screenshot of the entire screen and return it as a base64-encoded image.
+        
+        Args:
+            format: Image format - "png", "jpeg" or "webp" (default: server setting)
+            quality: JPEG/WebP quality from 1 to 100 (default: server setting)
+            compress_level: PNG compression level from 0 (fastest) to 9 (smallest) (default: server setting)
+            scale: Downscale factor in (0, 1]. Later mouse coordinates are interpreted in the
+                   downscaled image and mapped back to screen pixels automatically
+            max_width: Maximum image width, the screenshot is downscaled to fit
+            max_height: Maximum image height, the screenshot is downscaled to fit
+            region: Capture only this area, [left, top, width, height] in the same
+                    coordinates as the mouse tools
+            delta: Return only the image tiles changed since this session's last delta
+                   screenshot, the first one is a full keyframe
+            keyframe: With delta, return the full screenshot and use it as the new reference
+            inline: Return the full image inline instead of a thumbnail and a screenshot://
+                    resource link (default: server setting)
+        
+        Returns:
+            list: A description of the screenshot, a thumbnail (or the full image when it is
+                  small or inline is set) and a resource link to the full resolution image
         
         Example:
             result = take_screenshot()
-            # result["output"] contains the base64-encoded PNG image
-            # You can decode it to display or save the screenshot
+            # Read the linked screenshot://<id>.png resource for full resolution,
+            # or screenshot://<id>.png?left=0&top=0&width=400&height=300 for a crop
         """
 
-        # get screen size
-        screen_size = await execute_computer_action("get_screen_size", {})
-        if not screen_size:
-            return handle_error("take_screenshot", "Failed to get screen size")
-        output = screen_size.get("output", {})
-        width = output.get("Width", 0)
-        height = output.get("Height", 0)
-        if width <= 0 or height <= 0:
-            return handle_error("take_screenshot", "Invalid screen size")
-        # take screenshot
-        request = TakeScreenshotRequest()
+        # take screenshot, the result carries the screen size
+        request = TakeScreenshotRequest(
+            format=format,
+            quality=quality,
+            compress_level=compress_level,
+            scale=scale,
+            max_width=max_width,
+            max_height=max_height,
+            region=region,
+            coordinate_scale=get_coordinate_scale(None),
+            delta=delta,
+            keyframe=keyframe,
+            session=current_session_id(),
+        )
         screenshot = await execute_computer_action("take_screenshot", request.model_dump())
         if not screenshot:
             return handle_error("take_screenshot", "Failed to take screenshot")
         screenshot_output = screenshot.get("output", None)
         if not screenshot_output:
             return handle_error("take_screenshot", "Failed to take screenshot")
+        if delta:
+            if not region:
+                set_coordinate_scale(None, screenshot_output.scale)
+            return delta_screenshot_contents(screenshot_output)
+        if inline is None:
+            inline = settings.screenshot_inline
+        if region:
+            # Partial re-observation, the session coordinate space is unchanged
+            info = {"region": region}
+            if not inline:
+                return await stored_screenshot_contents(
+                    base64.b64decode(screenshot_output.screenshot), screenshot_output.format,
+                    screenshot_output.width, screenshot_output.height, info,
+                )
+            return [
+                types.TextContent(type="text", text=str(info)),
+                types.ImageContent(type="image", data=screenshot_output.screenshot, mimeType=f"image/{screenshot_output.format}")
+            ]
+        width, height = screenshot_output.screen_width, screenshot_output.screen_height
+        if width <= 0 or height <= 0:
+            return handle_error("take_screenshot", "Invalid screen size")
+        # Later mouse coordinates of this session refer to this image
+        set_coordinate_scale(None, screenshot_output.scale)
+        info = {"width": width, "height": height}
+        if screenshot_output.scale != 1:
+            info = {
+                "width": round(width * screenshot_output.scale),
+                "height": round(height * screenshot_output.scale),
+                "scale": screenshot_output.scale,
+                "screen_width": width,
+                "screen_height": height,
+            }
+        if not inline:
+            # Thumbnail and resource link, the full image is read from the frame store on demand
+            return await stored_screenshot_contents(
+                base64.b64decode(screenshot_output.screenshot), screenshot_output.format,
+                info["width"], info["height"], info,
+            )
         return [
-            types.TextContent(type="text", text=str({"width": width, "height": height})),
-            types.ImageContent(type="image", data=screenshot_output.screenshot, mimeType="image/png")
+            types.TextContent(type="text", text=str(info)),
+            types.ImageContent(type="image", data=screenshot_output.screenshot, mimeType=f"image/{screenshot_output.format}")
         ]
         
     
@@ -430,13 +582,153 @@ def register_computer_tools(mcp: FastMCP):
             if not result:
                 return handle_error("get_cursor_position", "Failed to get cursor position")
             output = result.get("output", {})
+            # Report the position in the coordinate space of the session's last screenshot
+            scale = get_coordinate_scale(None)
             return types.TextContent(
                 type="text",
                 text=str({
-                    "x": output.get("PositionX", output.get("x", 0)),
-                    "y": output.get("PositionY", output.get("y", 0))
+                    "x": round(output.get("PositionX", output.get("x", 0)) * scale),
+                    "y": round(output.get("PositionY", output.get("y", 0)) * scale)
                 })
             )
         except Exception as e:
             logger.error("Error in get_cursor_position: {}", e)
-            return handle_error("get_cursor_position", e)
\ No newline at end of file
+            return handle_error("get_cursor_position", e)
+
+    @mcp.tool()
+    async def get_pixels(pixels: list[list[int]]) -> dict:
+        """
+        Read the RGB colours of a few points or small areas in one call, e.g. whether a
+        checkbox is ticked or a status light is green, without taking a screenshot.
+        
+        Args:
+            pixels: Points [x, y] or areas [x, y, width, height] (mean colour), in the same
+                    coordinates as the mouse tools
+        
+        Returns:
+            dict: pixels in request order, each with its position and color [r, g, b]
+        
+        Example:
+            get_pixels(pixels=[[120, 340], [500, 20, 8, 8]])
+        """
+        request_data = {
+            "pixels": [probe.model_dump() for probe in pixel_probes(pixels)],
+            "coordinate_scale": get_coordinate_scale(None),
+        }
+        try:
+            result = await execute_computer_action("get_pixels", request_data)
+            if not result or not result.get("output"):
+                return handle_error("get_pixels", "Failed to get pixels")
+            return types.TextContent(
+                type="text",
+                text=str(result["output"].model_dump(exclude_none=True))
+            )
+        except Exception as e:
+            logger.error("Error in get_pixels: {}", e)
+            return handle_error("get_pixels", e)
+
+    @mcp.tool()
+    async def wait_for_pixels(
+        pixels: list[list[int]],
+        colors: list[list[int]],
+        tolerance: int = 16,
+        mode: Literal["all", "any"] = "all",
+        timeout: int = 10000
+    ) -> dict:
+        """
+        Wait until points or small areas of the screen have the expected colours, checked
+        on the machine without sending screenshots.
+        
+        Args:
+            pixels: Points [x, y] or areas [x, y, width, height] (mean colour), in the same
+                    coordinates as the mouse tools
+            colors: Expected [r, g, b] colour of each pixel
+            tolerance: Maximum difference per RGB channel
+            mode: "all" or "any" pixel must match
+            timeout: Maximum wait in milliseconds
+        
+        Returns:
+            dict: matched, timed_out, elapsed milliseconds, checks and the last sampled pixels
+        
+        Example:
+            wait_for_pixels(pixels=[[30, 40]], colors=[[0, 200, 0]])  # Wait for a green light
+        """
+        try:
+            request_data = {
+                "pixels": [probe.model_dump() for probe in pixel_probes(pixels, colors)],
+                "tolerance": tolerance,
+                "mode": mode,
+                "timeout": timeout,
+                "coordinate_scale": get_coordinate_scale(None),
+            }
+            result = await execute_computer_action("wait_for_pixels", request_data)
+            if not result or not result.get("output"):
+                return handle_error("wait_for_pixels", "Failed to wait for pixels")
+            return types.TextContent(
+                type="text",
+                text=str(result["output"].model_dump())
+            )
+        except Exception as e:
+            logger.error("Error in wait_for_pixels: {}", e)
+            return handle_error("wait_for_pixels", e)
+
+    @mcp.tool()
+    async def locate_image(
+        template: str,
+        region: list[int] | None = None,
+        confidence: float = 0.9,
+        limit: int = 10
+    ) -> dict:
+        """
+        Find a known image (icon, button) on the screen without taking a screenshot.
+        
+        Args:
+            template: Base64-encoded png, jpeg or webp image to find, e.g. cut from an earlier screenshot
+            region: Search only this area, [left, top, width, height] in the same
+                    coordinates as the mouse tools (default: whole screen)
+            confidence: Minimum match confidence from 0 to 1
+            limit: Maximum number of matches
+        
+        Returns:
+            dict: matches, best first, each with left, top, width, height, center_x, center_y and confidence
+        
+        Example:
+            locate_image(template=icon_base64)  # then click_mouse at center_x, center_y of the first match
+        """
+        request_data = {
+            "template": template,
+            "region": region,
+            "confidence": confidence,
+            "limit": limit,
+            "coordinate_scale": get_coordinate_scale(None),
+        }
+        try:
+            result = await execute_computer_action("locate_image", request_data)
+            if not result or not result.get("output"):
+                return handle_error("locate_image", "Failed to locate image")
+            return types.TextContent(
+                type="text",
+                text=str(result["output"].model_dump())
+            )
+        except Exception as e:
+            logger.error("Error in locate_image: {}", e)
+            return handle_error("locate_image", e)
+    @mcp.tool()
+    async def invalidate_cache() -> dict:
+        """
+        Drop cached observations so the next screenshot and cursor position are captured afresh.
+        Input actions invalidate the cache automatically, use this after changes made without
+        input, e.g. when waiting for an application to finish loading.
+        
+        Returns:
+            dict: Result with output and error fields
+        """
+        try:
+            await execute_computer_action("invalidate_cache", {})
+            return types.TextContent(
+                type="text",
+                text="Operation successful"
+            )
+        except Exception as e:
+            logger.error("Error in invalidate_cache: {}", e)
+            return handle_error("invalidate_cache", e)
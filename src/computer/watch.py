@@ -0,0 +1,47 @@
+"""Cheap screen fingerprints for waiting on screen changes"""
+import numpy as np
+from PIL import Image
+from core.config import settings
+
+
+def screen_fingerprint(image: Image.Image, size: int = None) -> np.ndarray:
+    """
+    Downsample a frame to a small grayscale thumbnail
+
+    The frame is first reduced by an integer box filter, which only touches
+    each source pixel once, and then resized to the thumbnail width. Averaging
+    hides noise such as antialiasing jitter while any visible change of a
+    control still moves the mean of its thumbnail pixels.
+
+    Args:
+        image: Captured frame
+        size: Thumbnail width, defaults to settings.screen_watch_size
+
+    Returns:
+        int16 array of gray levels, signed so fingerprints can be subtracted
+    """
+    size = size or settings.screen_watch_size
+    factor = max(image.width // (size * 2), 1)
+    if factor > 1:
+        image = image.reduce(factor)
+    if image.width > size:
+        image = image.resize((size, max(round(image.height * size / image.width), 1)), Image.BOX)
+    return np.asarray(image.convert("L"), dtype=np.int16)
+
+
+def screen_changed(before: np.ndarray, after: np.ndarray, tolerance: int = None) -> bool:
+    """
+    Compare two fingerprints
+
+    Args:
+        before: Earlier fingerprint
+        after: Later fingerprint
+        tolerance: Gray level difference that counts as a change, defaults to settings.screen_watch_tolerance
+
+    Returns:
+        Whether any thumbnail pixel changed by more than the tolerance, or the size changed
+    """
+    tolerance = settings.screen_watch_tolerance if tolerance is None else tolerance
+    if before.shape != after.shape:
+        return True
+    return bool((np.abs(after - before) > tolerance).any())
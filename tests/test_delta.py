@@ -0,0 +1,62 @@
+"""Test tile-based screenshot deltas"""
+import pytest
+from PIL import Image
+from core.config import settings
+from src.computer.delta import DeltaTracker, tile_hashes
+
+
+@pytest.fixture(autouse=True)
+def delta_settings(monkeypatch):
+    monkeypatch.setattr(settings, "screenshot_delta_tile_size", 16)
+    monkeypatch.setattr(settings, "screenshot_delta_max_sessions", 2)
+
+
+def frame(size=(100, 50), color=(20, 40, 60)) -> Image.Image:
+    return Image.new("RGB", size, color)
+
+
+def test_tile_hashes_shape_and_sensitivity():
+    image = frame()
+    hashes = tile_hashes(image, 16)
+    # Partial tiles at the right and bottom edge are padded
+    assert hashes.shape == (4, 7)
+    image.putpixel((40, 20), (255, 255, 255))
+    changed = tile_hashes(image, 16) != hashes
+    assert changed.sum() == 1 and changed[1, 2]
+
+
+def test_first_frame_is_a_keyframe_then_unchanged():
+    tracker = DeltaTracker()
+    assert tracker.diff("s1", frame()) is None
+    assert tracker.diff("s1", frame()) == []
+
+
+def test_changed_tiles_merged_per_row():
+    tracker = DeltaTracker()
+    tracker.diff("s1", frame())
+    image = frame()
+    # Two adjacent tiles in the second row and the clipped last tile of the bottom row
+    image.paste((255, 0, 0), (16, 16, 48, 20))
+    image.putpixel((99, 49), (0, 0, 0))
+    assert tracker.diff("s1", image) == [(16, 16, 32, 16), (96, 48, 4, 2)]
+    # The changed frame is the new reference
+    assert tracker.diff("s1", image) == []
+
+
+def test_keyframe_when_forced_or_settings_change():
+    tracker = DeltaTracker()
+    tracker.diff("s1", frame(), fingerprint=("png",))
+    assert tracker.diff("s1", frame(), fingerprint=("jpeg",)) is None
+    assert tracker.diff("s1", frame(), fingerprint=("jpeg",), keyframe=True) is None
+    assert tracker.diff("s1", frame((80, 50)), fingerprint=("jpeg",)) is None
+    tracker.reset("s1")
+    assert tracker.diff("s1", frame((80, 50)), fingerprint=("jpeg",)) is None
+
+
+def test_sessions_are_independent_and_bounded():
+    tracker = DeltaTracker()
+    for session in ("s1", "s2", "s3"):
+        tracker.diff(session, frame())
+    # s1 was the oldest session and was dropped
+    assert tracker.diff("s1", frame()) is None
+    assert tracker.diff("s3", frame()) == []
@@ -0,0 +1,128 @@
+"""Test the idempotency cache of the tool server"""
+import asyncio
+import pytest
+from core.config import settings
+from src.computer.idempotency import IdempotencyCache
+from src.computer.scheduler import ActionScheduler
+
+
+class Clicker:
+    """Stands in for an input action that takes a while on the input thread"""
+
+    def __init__(self, duration: float = 0.0, error: Exception = None):
+        self.duration = duration
+        self.error = error
+        self.clicks = 0
+
+    async def __call__(self):
+        self.clicks += 1
+        await asyncio.sleep(self.duration)
+        if self.error is not None:
+            raise self.error
+        return {"clicks": self.clicks}
+
+
+@pytest.fixture(autouse=True)
+def cache_settings(monkeypatch):
+    monkeypatch.setattr(settings, "idempotency_cache_ttl", 300.0)
+    monkeypatch.setattr(settings, "idempotency_cache_size", 16)
+
+
+def keyed(cache: IdempotencyCache, scheduler: ActionScheduler, key, job):
+    return cache.run(key, lambda started: scheduler.run("click_mouse", started(job)))
+
+
+@pytest.mark.asyncio
+async def test_retry_gets_stored_result():
+    cache, scheduler, click = IdempotencyCache(), ActionScheduler(), Clicker()
+    first = await keyed(cache, scheduler, "k1", click)
+    assert await keyed(cache, scheduler, "k1", click) == first
+    assert click.clicks == 1
+    assert await keyed(cache, scheduler, "k2", click) == {"clicks": 2}
+    assert cache.metrics()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unkeyed_requests_always_run():
+    cache, scheduler, click = IdempotencyCache(), ActionScheduler(), Clicker()
+    await keyed(cache, scheduler, None, click)
+    await keyed(cache, scheduler, None, click)
+    assert click.clicks == 2
+    assert cache.metrics()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_retries_share_one_execution():
+    cache, scheduler, click = IdempotencyCache(), ActionScheduler(), Clicker(0.05)
+    results = await asyncio.gather(*(keyed(cache, scheduler, "k1", click) for _ in range(5)))
+    assert click.clicks == 1
+    assert all(result == {"clicks": 1} for result in results)
+    assert cache.metrics()["joined"] == 4
+
+
+@pytest.mark.asyncio
+async def test_retry_after_timeout_does_not_run_action_again():
+    """A request aborted by its deadline while the action runs must not lead to a second click"""
+    cache, scheduler, click = IdempotencyCache(), ActionScheduler(), Clicker(0.2)
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.05):
+            await keyed(cache, scheduler, "k1", click)
+    # The retry arrives while the first click is still running and waits for it
+    assert await keyed(cache, scheduler, "k1", click) == {"clicks": 1}
+    # A retry after it finished gets the stored result
+    assert await keyed(cache, scheduler, "k1", click) == {"clicks": 1}
+    assert click.clicks == 1
+
+
+@pytest.mark.asyncio
+async def test_action_aborted_while_queued_runs_on_retry():
+    cache, scheduler = IdempotencyCache(), ActionScheduler()
+    busy, click = Clicker(0.2), Clicker()
+    blocker = asyncio.create_task(keyed(cache, scheduler, None, busy))
+    await asyncio.sleep(0)
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.05):
+            await keyed(cache, scheduler, "k1", click)
+    # The click never left the input lane queue, the retry runs it
+    assert click.clicks == 0
+    assert cache.metrics()["entries"] == 0
+    assert await keyed(cache, scheduler, "k1", click) == {"clicks": 1}
+    await blocker
+
+
+@pytest.mark.asyncio
+async def test_failure_after_start_is_stored():
+    cache, scheduler, click = IdempotencyCache(), ActionScheduler(), Clicker(error=RuntimeError("pyautogui error"))
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await keyed(cache, scheduler, "k1", click)
+    assert click.clicks == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_request_is_not_stored():
+    cache, click = IdempotencyCache(), Clicker()
+
+    async def rejected(started):
+        raise RuntimeError("input queue is full")
+
+    with pytest.raises(RuntimeError):
+        await cache.run("k1", rejected)
+    assert await keyed(cache, ActionScheduler(), "k1", click) == {"clicks": 1}
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_and_are_bounded(monkeypatch):
+    cache, scheduler, click = IdempotencyCache(), ActionScheduler(), Clicker()
+    monkeypatch.setattr(settings, "idempotency_cache_size", 2)
+    for key in ("k1", "k2", "k3"):
+        await keyed(cache, scheduler, key, click)
+    assert cache.metrics()["entries"] == 2
+    # The oldest key was evicted, its retry runs again
+    await keyed(cache, scheduler, "k1", click)
+    assert click.clicks == 4
+
+    monkeypatch.setattr(settings, "idempotency_cache_ttl", 0.01)
+    await asyncio.sleep(0.02)
+    await keyed(cache, scheduler, "k1", click)
+    assert click.clicks == 5
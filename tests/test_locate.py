@@ -0,0 +1,87 @@
+"""Test template matching of locate_image"""
+from io import BytesIO
+import numpy as np
+import pytest
+from PIL import Image
+from core.config import settings
+from src.computer.locate import TemplateCache, locate, ncc_map
+
+
+def encode(image: Image.Image) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def noise(width: int, height: int, seed: int = 1) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8))
+
+
+@pytest.fixture(autouse=True)
+def locate_settings(monkeypatch):
+    monkeypatch.setattr(settings, "locate_pyramid_levels", 2)
+    monkeypatch.setattr(settings, "locate_min_template_size", 8)
+    monkeypatch.setattr(settings, "locate_pyramid_slack", 0.3)
+    monkeypatch.setattr(settings, "locate_template_cache_size", 2)
+
+
+def test_ncc_map_matches_direct_computation():
+    rng = np.random.default_rng(7)
+    image = rng.random((20, 24))
+    template = rng.random((5, 6))
+    template = template - template.mean()
+    scores = ncc_map(image, template, float(np.sqrt((template * template).sum())))
+    assert scores.shape == (16, 19)
+    for y, x in ((0, 0), (7, 11), (15, 18)):
+        window = image[y:y + 5, x:x + 6]
+        window = window - window.mean()
+        expected = (window * template).sum() / np.sqrt((window * window).sum() * (template * template).sum())
+        assert scores[y, x] == pytest.approx(expected, abs=1e-9)
+
+
+def test_flat_windows_score_zero():
+    image = np.zeros((10, 10))
+    template = np.array([[1.0, -1.0], [-1.0, 1.0]])
+    assert not ncc_map(image, template, 2.0).any()
+
+
+@pytest.mark.parametrize("size", [12, 48], ids=["full-resolution", "pyramid"])
+def test_locate_finds_pasted_template(size):
+    screen = noise(320, 200)
+    template = noise(size, size, seed=2)
+    screen.paste(template, (123, 77))
+    cache = TemplateCache()
+    matches = locate(screen, cache.get(encode(template)), confidence=0.95)
+    assert len(matches) == 1
+    match = matches[0]
+    assert (match.left, match.top, match.width, match.height) == (123, 77, size, size)
+    assert match.confidence > 0.99
+
+
+def test_locate_returns_non_overlapping_matches_best_first():
+    screen = noise(320, 200)
+    template = noise(16, 16, seed=2)
+    screen.paste(template, (10, 10))
+    screen.paste(template, (200, 150))
+    matches = locate(screen, TemplateCache().get(encode(template)), confidence=0.95)
+    assert {(m.left, m.top) for m in matches} == {(10, 10), (200, 150)}
+    assert locate(screen, TemplateCache().get(encode(template)), confidence=0.95, limit=1)[:1] == matches[:1]
+
+
+def test_no_match_below_confidence_or_larger_than_image():
+    screen = noise(120, 80)
+    template = TemplateCache().get(encode(noise(16, 16, seed=3)))
+    assert locate(screen, template, confidence=0.9) == []
+    assert locate(noise(10, 10), template) == []
+
+
+def test_template_cache():
+    cache = TemplateCache()
+    data = encode(noise(16, 16))
+    assert cache.get(data) is cache.get(data)
+    assert cache.metrics() == {"hits": 1, "misses": 1, "entries": 1}
+    with pytest.raises(ValueError):
+        cache.get(encode(Image.new("RGB", (16, 16), (9, 9, 9))))
+    with pytest.raises(ValueError):
+        cache.get(b"not an image")
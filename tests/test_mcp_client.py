@@ -59,6 +59,10 @@ async def test_take_screenshot_with_client():
             elif item.type == "text":
                 text = item.text
                 assert text is not None
+            elif item.type == "resource_link":
+                # The full resolution screenshot is read lazily from the frame store
+                contents = await client.read_resource(f"{item.uri}?width=100&height=100")
+                assert contents[0].blob
             else:
                 assert False
         assert True
@@ -226,4 +230,37 @@ async def test_get_cursor_position_direct():
             # Cursor position should have x and y coordinates
             if response.get("output"):
                 output = response["output"]
-                assert isinstance(output, dict)
\ No newline at end of file
+                assert isinstance(output, dict)
+
+@pytest.mark.asyncio
+async def test_batch_actions_with_client():
+    """Test executing a batch of actions in one round trip via client"""
+    logger.info("Testing batch_actions with client, {}", MCP_BASE_URL)
+    client = get_client()
+    async with client:
+        response = await client.call_tool("batch_actions", {
+            "actions": [
+                {"action": "move_mouse", "params": {"x": 100, "y": 200}},
+                {"action": "click_mouse", "params": {"x": 100, "y": 200, "button": "left"}},
+                {"action": "take_screenshot"},
+            ],
+            "delay": 50,
+            "endpoint": TOOL_BASE_URL,
+        })
+        logger.info("MCP batch_actions response: {}", response)
+        assert response is not None
+        assert response.content[0].type == "text"
+        assert any(item.type == "image" for item in response.content)
+
+
+@pytest.mark.asyncio
+async def test_wait_until_stable_with_client():
+    """Test waiting for the screen to settle on the tool server via client"""
+    logger.info("Testing wait_until_stable with client, {}", MCP_BASE_URL)
+    client = get_client()
+    async with client:
+        response = await client.call_tool("wait_until_stable", {"stable": 200, "timeout": 2000, "endpoint": TOOL_BASE_URL})
+        logger.info("MCP wait_until_stable response: {}", response)
+        assert response is not None
+        assert response.content[0].type == "text"
+        assert "stable" in response.content[0].text
@@ -0,0 +1,107 @@
+"""Test the observation cache and its invalidation by input"""
+import asyncio
+import time
+import pytest
+from core.config import settings
+from src.computer.base import wrap_pyautogui_async
+from src.computer.observation import ObservationCache, observation_cache
+from src.computer.singleflight import SingleFlight
+
+
+class Loader:
+    def __init__(self):
+        self.loads = 0
+
+    async def __call__(self):
+        self.loads += 1
+        return self.loads
+
+
+@pytest.mark.asyncio
+async def test_observation_reused_until_input():
+    cache, load = ObservationCache(), Loader()
+    assert await cache.get_or_load("cursor", load, 10) == 1
+    assert await cache.get_or_load("cursor", load, 10) == 1
+    cache.bump()
+    assert await cache.get_or_load("cursor", load, 10) == 2
+    assert cache.metrics()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_screen_size_ignores_input():
+    cache, load = ObservationCache(), Loader()
+    await cache.get_or_load("size", load, 10, track_input=False)
+    cache.bump()
+    assert await cache.get_or_load("size", load, 10, track_input=False) == 1
+    cache.invalidate()
+    assert await cache.get_or_load("size", load, 10, track_input=False) == 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_disabled_cache():
+    cache, load = ObservationCache(), Loader()
+    await cache.get_or_load("cursor", load, 0.01)
+    await asyncio.sleep(0.02)
+    assert await cache.get_or_load("cursor", load, 0.01) == 2
+    assert await cache.get_or_load("cursor", load, 0) == 3
+    assert await cache.get_or_load("cursor", load, 0) == 4
+
+
+@pytest.mark.asyncio
+async def test_read_overlapping_input_is_not_reused():
+    cache, load = ObservationCache(), Loader()
+
+    async def slow_load():
+        value = await load()
+        # Input finishes while the observation is read
+        cache.bump()
+        return value
+
+    await cache.get_or_load("cursor", slow_load, 10)
+    assert cache.metrics()["entries"] == 0
+    assert await cache.get_or_load("cursor", load, 10) == 2
+
+
+@pytest.mark.asyncio
+async def test_screenshot_after_input_is_fresh():
+    """take_screenshot, click, take_screenshot with the capture coalescing window"""
+    cache, load = ObservationCache(), Loader()
+    flights = SingleFlight(window=10, epoch=lambda: cache.epoch)
+
+    def screenshot():
+        return cache.get_or_load("screenshot", lambda: flights.do("png", load), 10)
+
+    assert await screenshot() == 1
+    cache.bump()
+    cache.bump()
+    assert await screenshot() == 2
+    assert await screenshot() == 2
+
+
+@pytest.mark.asyncio
+async def test_entries_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "observation_cache_max_entries", 2)
+    cache, load = ObservationCache(), Loader()
+    for key in ("a", "b", "c"):
+        await cache.get_or_load(key, load, 10)
+    assert cache.metrics()["entries"] == 2
+    assert await cache.get_or_load("a", load, 10) == 4
+
+
+@pytest.mark.asyncio
+async def test_cancelled_input_invalidates_when_it_finishes():
+    """An input job goes on on the input thread after its request is cancelled"""
+    @wrap_pyautogui_async
+    def slow_click():
+        time.sleep(0.2)
+
+    load = Loader()
+    task = asyncio.create_task(slow_click())
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    # Read while the click still runs, it must not be reused after the click
+    await observation_cache.get_or_load("cancelled-input", load, 10)
+    await asyncio.sleep(0.3)
+    assert await observation_cache.get_or_load("cancelled-input", load, 10) == 2
@@ -0,0 +1,18 @@
+"""Test pixel colour sampling"""
+import numpy as np
+from PIL import Image
+from src.computer.pixels import colors_match, mean_colors, rounded
+
+
+def test_points_and_areas_of_any_mode():
+    image = Image.new("RGBA", (40, 30), (10, 20, 30, 255))
+    image.paste((200, 100, 0, 255), (20, 10, 24, 12))
+    colors = mean_colors(image, [(0, 0, 1, 1), (21, 11, 1, 1), (20, 10, 8, 2)])
+    assert rounded(colors) == [[10, 20, 30], [200, 100, 0], [105, 60, 15]]
+    gray = mean_colors(Image.new("L", (5, 5), 77), [(4, 4, 1, 1)])
+    assert rounded(gray) == [[77, 77, 77]]
+
+
+def test_colors_match_within_tolerance():
+    colors = np.array([[10.0, 20.0, 30.0], [200.0, 100.0, 0.0]])
+    assert colors_match(colors, [[12, 18, 30], [200, 90, 0]], 2).tolist() == [True, False]
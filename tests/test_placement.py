@@ -0,0 +1,142 @@
+"""Test node leasing of MCP sessions"""
+from contextlib import ExitStack
+import pytest
+from core.config import settings
+from mcp_server import placement as placement_module
+from mcp_server.nodes import NodeRegistration, NodeRegistry
+from mcp_server.placement import Placement
+
+
+class FakeSession:
+    """Stands in for an MCP server session, closing its exit stack when it ends"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self._exit_stack = ExitStack()
+
+    def close(self):
+        self._exit_stack.close()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = NodeRegistry()
+    for name, load in (("a", 3), ("b", 0), ("c", 1)):
+        node = registry.register(NodeRegistration(name=name, endpoint=f"http://{name}:8000", labels={"os": "linux"}))
+        node.healthy, node.load, node.latency = True, load, 0.01
+    monkeypatch.setattr(placement_module, "node_registry", registry)
+    monkeypatch.setattr(settings, "placement_auto", True)
+    monkeypatch.setattr(settings, "placement_idle_timeout", 600.0)
+    return registry
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """Switch the current MCP session of the placement module"""
+    current = {}
+
+    def use(session_id: str) -> FakeSession:
+        current["session"] = FakeSession(session_id)
+        return current["session"]
+
+    monkeypatch.setattr(placement_module, "current_session_id", lambda: current["session"].session_id)
+    monkeypatch.setattr(placement_module, "_current_session", lambda: current["session"])
+    return use
+
+
+def test_least_loaded_idle_node_is_leased(registry, session):
+    placement = Placement()
+    session("s1")
+    assert placement.acquire().node.name == "b"
+    # A session keeps its node
+    assert placement.acquire().node.name == "b"
+    session("s2")
+    assert placement.acquire().node.name == "c"
+    registry.get("a").healthy = False
+    session("s3")
+    with pytest.raises(ValueError):
+        placement.acquire()
+
+
+def test_leased_node_is_exclusive(registry, session):
+    placement = Placement()
+    session("s1")
+    assert placement.resolve("") == "http://b:8000"
+    session("s2")
+    with pytest.raises(ValueError):
+        placement.resolve("b")
+    assert placement.resolve("a") == "http://a:8000"
+
+
+def test_lease_released_when_session_ends(registry, session):
+    placement = Placement()
+    ended = session("s1")
+    placement.acquire()
+    session("s2")
+    placement.acquire()
+    ended.close()
+    assert placement.holder("b") is None
+    assert placement.holder("c") == "s2"
+
+
+def test_session_end_after_release_keeps_new_lease(registry, session):
+    placement = Placement()
+    first = session("s1")
+    placement.acquire()
+    placement.release()
+    session("s2")
+    assert placement.acquire().node.name == "b"
+    first.close()
+    assert placement.holder("b") == "s2"
+
+
+def test_idle_and_deregistered_leases_expire(registry, session, monkeypatch):
+    placement = Placement()
+    session("s1")
+    placement.acquire()
+    session("s2")
+    placement.acquire()
+    registry.deregister("c")
+    placement.expire()
+    assert placement.holder("b") == "s1"
+    assert placement.lease("s2") is None
+
+    monkeypatch.setattr(settings, "placement_idle_timeout", 0.0)
+    placement.expire()
+    assert placement.holder("b") is None
+
+
+def test_addressed_node_is_leased(registry, session):
+    placement = Placement()
+    first = session("s1")
+    assert placement.resolve("http://b:8000/") == "http://b:8000/"
+    assert placement.holder("b") == "s1"
+    # The addressed node is the session's default node
+    assert placement.resolve("") == "http://b:8000"
+    session("s2")
+    assert placement.acquire().node.name == "c"
+    with pytest.raises(ValueError):
+        placement.resolve("http://b:8000")
+    # Unregistered tool servers are not leased
+    assert placement.resolve("http://other:8000") == "http://other:8000"
+    first.close()
+    assert placement.holder("b") is None
+
+
+def test_session_leases_released_together(registry, session):
+    placement = Placement()
+    session("s1")
+    placement.resolve("a")
+    placement.resolve("b")
+    assert placement.lease().node.name == "a"
+    assert placement.release().node.name == "a"
+    assert placement.holder("a") is None and placement.holder("b") is None
+
+
+def test_session_without_exit_stack_is_logged(registry, session, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(placement_module.logger, "warning", lambda message, *args: warnings.append(message))
+    placement = Placement()
+    del session("s1")._exit_stack
+    placement.acquire()
+    assert warnings
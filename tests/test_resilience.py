@@ -0,0 +1,154 @@
+"""Test circuit breaking, retries and hedging of tool server requests"""
+import asyncio
+import httpx
+import pytest
+from core.config import settings
+from src.computer.channel import ChannelRequestError
+from src.computer.resilience import CircuitBreaker, CircuitOpenError, Resilience, is_failure, is_retryable
+
+
+def http_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://node/api/computer/ClickMouse")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+
+
+def channel_error(status_code: int) -> ChannelRequestError:
+    return ChannelRequestError(status_code, "error")
+
+
+@pytest.fixture(autouse=True)
+def fast_settings(monkeypatch):
+    monkeypatch.setattr(settings, "retry_attempts", 2)
+    monkeypatch.setattr(settings, "retry_backoff", 0.001)
+    monkeypatch.setattr(settings, "retry_backoff_max", 0.001)
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 3)
+    monkeypatch.setattr(settings, "circuit_open_seconds", 30.0)
+    monkeypatch.setattr(settings, "circuit_half_open_probes", 1)
+
+
+@pytest.mark.parametrize("make_error", [http_error, channel_error], ids=["http", "channel"])
+def test_status_classification(make_error):
+    """5xx replies are failures, 5xx and 429 are retryable, other errors are neither"""
+    assert is_failure(make_error(503)) and is_retryable(make_error(503))
+    assert not is_failure(make_error(429)) and is_retryable(make_error(429))
+    assert not is_failure(make_error(400)) and not is_retryable(make_error(400))
+
+
+def test_transport_errors_are_failures():
+    assert is_failure(httpx.ConnectError("refused")) and is_retryable(httpx.ConnectError("refused"))
+    assert is_failure(ConnectionError("channel closed"))
+    assert not is_failure(CircuitOpenError("http://node", 1.0))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_error", [http_error, channel_error], ids=["http", "channel"])
+async def test_idempotent_request_retried_after_5xx(make_error):
+    resilience = Resilience()
+    errors = [make_error(503), make_error(502)]
+
+    async def send():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert await resilience.call("http://node", "get_cursor_position", send, idempotent=True) == "ok"
+    assert resilience.retries == 2
+    # Recovered before the threshold, the circuit stays closed
+    assert resilience.state("http://node") == "closed"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_error", [http_error, channel_error], ids=["http", "channel"])
+async def test_5xx_replies_open_the_circuit(make_error):
+    resilience = Resilience()
+    calls = 0
+
+    async def send():
+        nonlocal calls
+        calls += 1
+        raise make_error(500)
+
+    for _ in range(settings.circuit_failure_threshold):
+        with pytest.raises(type(make_error(500))):
+            await resilience.call("http://node", "click_mouse", send)
+    assert resilience.state("http://node") == "open"
+    with pytest.raises(CircuitOpenError):
+        await resilience.call("http://node", "click_mouse", send)
+    assert calls == settings.circuit_failure_threshold
+
+
+@pytest.mark.asyncio
+async def test_input_actions_sent_once():
+    resilience = Resilience()
+    calls = 0
+
+    async def send():
+        nonlocal calls
+        calls += 1
+        raise channel_error(503)
+
+    with pytest.raises(ChannelRequestError):
+        await resilience.call("http://node", "click_mouse", send)
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_request_keeps_circuit_closed():
+    """A 4xx reply shows the node is reachable and resets the failure count"""
+    resilience = Resilience()
+    breaker = resilience.breaker("http://node")
+    breaker.failures = settings.circuit_failure_threshold - 1
+
+    async def send():
+        raise channel_error(400)
+
+    with pytest.raises(ChannelRequestError):
+        await resilience.call("http://node", "get_pixels", send, idempotent=True)
+    assert breaker.failures == 0
+    assert resilience.retries == 0
+
+
+def test_circuit_half_open_probe(monkeypatch):
+    breaker = CircuitBreaker("http://node")
+    for _ in range(settings.circuit_failure_threshold):
+        breaker.on_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # Open period over: one probe goes through, the next call is rejected while it runs
+    breaker.opened_at -= settings.circuit_open_seconds
+    assert breaker.state == "half_open"
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # A failed probe opens the circuit again, a successful one closes it
+    breaker.on_failure()
+    assert breaker.state == "open"
+    breaker.opened_at -= settings.circuit_open_seconds
+    assert breaker.before_call() is True
+    breaker.on_success()
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged(monkeypatch):
+    monkeypatch.setattr(settings, "hedge_enabled", True)
+    monkeypatch.setattr(settings, "hedge_min_samples", 5)
+    resilience = Resilience()
+    window = resilience._latency("http://node", "take_screenshot")
+    for _ in range(5):
+        window.add(0.01)
+    delays = [1.0, 0.0]
+
+    async def send():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    # The first request is slower than the p95, the hedged second one answers first
+    assert await resilience.call("http://node", "take_screenshot", send, idempotent=True, hedge=True) == 0.0
+    assert resilience.hedges == 1
+    assert resilience.hedge_wins == 1
@@ -0,0 +1,93 @@
+"""Test the action scheduler lanes of the tool server"""
+import asyncio
+import pytest
+from core.config import settings
+from src.computer.scheduler import ActionScheduler, Lane, SchedulerFullError
+
+
+async def hold(lane: Lane, release: asyncio.Event, order: list, name: str, priority: int = 0):
+    async with lane.slot(priority):
+        order.append(name)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_waiters_admitted_by_priority_then_fifo():
+    lane, release, order = Lane("input", 1, 8), asyncio.Event(), []
+    tasks = [asyncio.create_task(hold(lane, release, order, "first"))]
+    await asyncio.sleep(0)
+    for name, priority in (("low-1", 0), ("low-2", 0), ("high", 5)):
+        tasks.append(asyncio.create_task(hold(lane, release, order, name, priority)))
+        await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ["first", "high", "low-1", "low-2"]
+    assert lane.metrics()["completed"] == 4
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected():
+    lane, release, order = Lane("input", 1, 1), asyncio.Event(), []
+    running = asyncio.create_task(hold(lane, release, order, "running"))
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(hold(lane, release, order, "waiting"))
+    await asyncio.sleep(0)
+    with pytest.raises(SchedulerFullError):
+        async with lane.slot():
+            pass
+    assert lane.metrics()["rejected"] == 1
+    release.set()
+    await asyncio.gather(running, waiting)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    lane, release, order = Lane("input", 1, 8), asyncio.Event(), []
+    running = asyncio.create_task(hold(lane, release, order, "running"))
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(hold(lane, release, order, "cancelled"))
+    await asyncio.sleep(0)
+    assert lane.metrics()["queued"] == 1
+    cancelled.cancel()
+    await asyncio.gather(cancelled, return_exceptions=True)
+    assert lane.metrics()["queued"] == 0
+    release.set()
+    await running
+    assert order == ["running"]
+    assert lane.metrics()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reads_run_concurrently_and_input_serially(monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_read_concurrency", 2)
+    scheduler = ActionScheduler()
+    active = {"input": 0, "read": 0}
+    peak = {"input": 0, "read": 0}
+
+    def action(kind):
+        async def call():
+            active[kind] += 1
+            peak[kind] = max(peak[kind], active[kind])
+            await asyncio.sleep(0.01)
+            active[kind] -= 1
+        return call
+
+    await asyncio.gather(
+        *(scheduler.run("take_screenshot", action("read")) for _ in range(4)),
+        *(scheduler.run("click_mouse", action("input")) for _ in range(3)),
+    )
+    assert peak == {"input": 1, "read": 2}
+
+
+@pytest.mark.asyncio
+async def test_waits_hold_no_lane():
+    scheduler = ActionScheduler()
+    release = asyncio.Event()
+    blocked = asyncio.create_task(scheduler.run("click_mouse", release.wait))
+    await asyncio.sleep(0)
+    # A wait is not queued behind the running input
+    assert await asyncio.wait_for(scheduler.run("wait", lambda: asyncio.sleep(0, "waited")), 1) == "waited"
+    assert scheduler.load() == 1
+    release.set()
+    await blocked
+    assert scheduler.load() == 0
@@ -0,0 +1,84 @@
+"""Test single-flight sharing of identical concurrent calls"""
+import asyncio
+import pytest
+from src.computer.singleflight import SingleFlight
+
+
+class Capture:
+    def __init__(self, duration: float = 0.01, error: Exception = None):
+        self.duration = duration
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.duration)
+        if self.error is not None:
+            raise self.error
+        return call
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flights, capture = SingleFlight(), Capture()
+    results = await asyncio.gather(*(flights.do("png", capture) for _ in range(5)))
+    assert results == [1] * 5
+    assert capture.calls == 1
+    assert flights.metrics() == {"started": 1, "shared": 4, "entries": 0}
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    flights, capture = SingleFlight(), Capture()
+    await asyncio.gather(flights.do("png", capture), flights.do("jpeg", capture))
+    assert capture.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_result_reused_within_window():
+    flights, capture = SingleFlight(window=0.05), Capture(0)
+    assert await flights.do("png", capture) == 1
+    assert await flights.do("png", capture) == 1
+    await asyncio.sleep(0.06)
+    assert flights.metrics()["entries"] == 0
+    assert await flights.do("png", capture) == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_shared_but_not_cached():
+    flights, capture = SingleFlight(window=10), Capture(error=RuntimeError("capture failed"))
+    results = await asyncio.gather(flights.do("png", capture), flights.do("png", capture), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert capture.calls == 1
+    with pytest.raises(RuntimeError):
+        await flights.do("png", capture)
+    assert capture.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_abort_others():
+    flights, capture = SingleFlight(), Capture(0.05)
+    first = asyncio.create_task(flights.do("png", capture))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(flights.do("png", capture))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 1
+    assert capture.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_input_between_calls_starts_a_new_flight():
+    state = {"epoch": 0}
+    flights, capture = SingleFlight(window=10, epoch=lambda: state["epoch"]), Capture()
+    running = asyncio.create_task(flights.do("png", capture))
+    await asyncio.sleep(0)
+    # A click lands while the first capture runs
+    state["epoch"] += 1
+    assert await flights.do("png", capture) == 2
+    assert await running == 1
+    # A finished capture is not reused across input either
+    assert await flights.do("png", capture) == 2
+    state["epoch"] += 1
+    assert await flights.do("png", capture) == 3
@@ -1,4 +1,6 @@
+import asyncio
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 # Import logger early to initialize logging configuration
@@ -7,6 +9,24 @@ from core.config import settings
 from tool_server.api.endpoint import router
 from middleware.request_id import RequestIDMiddleware
 from middleware.auth import APIKeyMiddleware
+from tool_server.api.v1.computer import computer_tool
+from src.computer.frames import frame_grabber
+from tool_server.registration import register_node, deregister_node
+
+
+@asynccontextmanager
+async def tool_server_lifespan(app: FastAPI):
+    """Run the background frame grabber and the gateway registration while the server is up"""
+    if settings.frame_grabber_enabled:
+        frame_grabber.start(computer_tool.grab_frame)
+    registration = asyncio.create_task(register_node()) if settings.gateway_url else None
+    try:
+        yield
+    finally:
+        if registration is not None:
+            registration.cancel()
+            await deregister_node()
+        frame_grabber.stop()
 
 
 def create_http_server() -> FastAPI:
@@ -15,6 +35,7 @@ def create_http_server() -> FastAPI:
         title=settings.title,
         version=settings.version,
         description="Local tool service API",
+        lifespan=tool_server_lifespan,
     )
     
     # Configure CORS
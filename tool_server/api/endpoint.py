@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from core.config import settings
+from src.computer.scheduler import action_scheduler
 from .v1.computer import router as computer_router
 
 # Create main router
@@ -20,6 +21,6 @@ async def root():
 
 @router.get("/health")
 async def health():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+    """Health check endpoint, also reports the load used by the gateway to place sessions"""
+    return {"status": "healthy", "load": action_scheduler.load()}
 
@@ -1,12 +1,28 @@
-from fastapi import APIRouter, HTTPException, Body
-from typing import Dict, Any
+import asyncio
+from uuid import uuid4
+from fastapi import APIRouter, HTTPException, Body, Request, Response, WebSocket, WebSocketDisconnect, status
+from typing import Dict, Any, Optional
 from pydantic import ValidationError
-from middleware.request_id import get_request_id
+from middleware.request_id import get_request_id, set_request_id
+from middleware.auth import check_api_key
 from src.computer.computer_pyautogui import PyAutoGUIComputerTool
 from src.computer.base import IComputerTool
-from core.constants import REQUEST_MODELS
+from src.computer.scheduler import action_scheduler, SchedulerFullError, READ_ACTIONS
+from src.computer.singleflight import screenshot_flights
+from src.computer.observation import observation_cache
+from src.computer.frames import frame_grabber
+from src.computer.locate import template_cache
+from src.computer.idempotency import idempotency_cache
+from core.constants import REQUEST_MODELS, REQUEST_TIMEOUT_HEADER, PRIORITY_HEADER, IDEMPOTENCY_KEY_HEADER
 from core.logger import logger
 from src.common import BaseResponse, ResponseMetadataModel
+from src.computer.schema import (
+    BatchActionsRequest,
+    BatchActionsResource,
+    BatchStepResource,
+    TakeScreenshotRequest,
+    ScreenshotImage,
+)
 from core.config import settings
 
 router = APIRouter(prefix="/computer", tags=["Computer Control"])
@@ -24,9 +40,196 @@ def new_computer_tool(*args, **kwargs):
 
 computer_tool: IComputerTool = new_computer_tool()
 
+@router.get("/screenshot")
+async def screenshot(request: Request):
+    """
+    Capture a screenshot and return the raw image bytes
+
+    Query parameters are the TakeScreenshotRequest fields, Region as
+    "left,top,width,height". Image metadata is returned in the
+    X-Screenshot-Width, X-Screenshot-Height, X-Screenshot-Format,
+    X-Screenshot-Scale, X-Screenshot-Left, X-Screenshot-Top,
+    X-Screenshot-Captured-At, X-Screen-Width and X-Screen-Height headers.
+    """
+    try:
+        validated_request = TakeScreenshotRequest(**request.query_params)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request: {e.errors()}")
+    image = await run_cancellable(request, schedule(
+        "capture_screenshot",
+        lambda: action_route(computer_tool, "capture_screenshot", validated_request),
+        request.headers.get(PRIORITY_HEADER),
+    ))
+    return Response(content=image.data, media_type=image.mime_type, headers=screenshot_headers(image))
+
+
+def screenshot_headers(image: ScreenshotImage) -> Dict[str, str]:
+    """Build the metadata headers of a binary screenshot response"""
+    return {
+        "X-Screenshot-Width": str(image.width),
+        "X-Screenshot-Height": str(image.height),
+        "X-Screenshot-Format": image.format,
+        "X-Screen-Width": str(image.screen_width),
+        "X-Screen-Height": str(image.screen_height),
+        "X-Screenshot-Scale": str(image.scale),
+        "X-Screenshot-Left": str(image.left),
+        "X-Screenshot-Top": str(image.top),
+        "X-Screenshot-Captured-At": str(image.captured_at),
+    }
+
+
+@router.post("/batch")
+async def batch_actions(request: BatchActionsRequest, http_request: Request):
+    """
+    Execute an ordered sequence of actions in one round trip
+
+    Each step is validated with the same request model as the single action
+    route. Steps run back-to-back with an optional delay between them; with
+    stop_on_error the batch ends at the first failed step.
+    """
+    request_id = get_request_id()
+    key = idempotency_key(http_request.headers.get(IDEMPOTENCY_KEY_HEADER), "batch")
+    result = await run_cancellable(http_request, idempotency_cache.run(key, lambda started: schedule(
+        "batch", started(lambda: execute_batch(request)), http_request.headers.get(PRIORITY_HEADER)
+    )))
+    return BaseResponse(
+        ResponseMetadata=ResponseMetadataModel(RequestId=request_id, Action="batch", Version=settings.version),
+        Result=result.model_dump(),
+    ).model_dump()
+
+
+async def execute_batch(request: BatchActionsRequest) -> BatchActionsResource:
+    """Run the steps of a batch in order and collect per-step results"""
+    if len(request.actions) > settings.batch_max_actions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many actions in batch: {len(request.actions)} > {settings.batch_max_actions}"
+        )
+    steps = []
+    for index, item in enumerate(request.actions):
+        action = camel_to_snake_method(item.action)
+        try:
+            result = await execute_action(action, item.params)
+            steps.append(BatchStepResource(index=index, action=action, result=result))
+        except HTTPException as e:
+            steps.append(BatchStepResource(index=index, action=action, error=str(e.detail)))
+        except Exception as e:
+            steps.append(BatchStepResource(index=index, action=action, error=str(e)))
+        if steps[-1].error is not None:
+            logger.warning("Batch step {} ({}) failed: {}", index, action, steps[-1].error)
+            if request.stop_on_error:
+                break
+        delay = item.delay if item.delay is not None else request.delay
+        if delay > 0 and index < len(request.actions) - 1:
+            await asyncio.sleep(delay / 1000)
+    return BatchActionsResource(
+        steps=steps,
+        completed=sum(1 for step in steps if step.error is None),
+        failed=any(step.error is not None for step in steps),
+    )
+
+
+@router.websocket("/ws")
+async def action_channel(websocket: WebSocket):
+    """
+    Persistent action channel
+
+    The API key is checked once when the connection is opened, from the
+    X-API-Key/Authorization header or the api_key query parameter. Each text
+    frame carries one request:
+        {"id": "...", "action": "moveMouse", "params": {...}}
+    with an optional "timeout_ms" after which the action is aborted, an
+    optional scheduling "priority" and an optional "idempotency_key". It
+    is answered by exactly one frame with the same id and the usual
+    response envelope plus a Status code:
+        {"id": "...", "Status": 200, "ResponseMetadata": {...}, "Result": {...}}
+    Requests are executed concurrently, so results may arrive out of order.
+    """
+    if settings.api_key_enabled:
+        api_key = (
+            websocket.headers.get("X-API-Key")
+            or websocket.headers.get("Authorization")
+            or websocket.query_params.get("api_key")
+        )
+        error = check_api_key(api_key, websocket.url.path)
+        if error is not None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=error[1])
+            return
+    await websocket.accept()
+    logger.info("Action channel opened by {}", websocket.client)
+
+    send_lock = asyncio.Lock()
+    tasks = set()
+
+    async def handle_frame(frame: Dict[str, Any]):
+        reply = await dispatch_frame(frame)
+        async with send_lock:
+            await websocket.send_json(reply)
+
+    try:
+        while True:
+            try:
+                frame = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"id": None, "Status": 400, "Result": {"error": "Invalid frame", "output": None}})
+                continue
+            task = asyncio.create_task(handle_frame(frame))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except WebSocketDisconnect:
+        logger.info("Action channel closed by {}", websocket.client)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def dispatch_frame(frame: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute one action channel frame and build its reply"""
+    frame_id = frame.get("id") if isinstance(frame, dict) else None
+    request_id = str(frame_id) if frame_id is not None else str(uuid4())
+    set_request_id(request_id)
+    action = ""
+    try:
+        action = camel_to_snake_method(str(frame.get("action", "")))
+        params = frame.get("params") or {}
+        key = idempotency_key(frame.get("idempotency_key"), action, params)
+        async with asyncio.timeout(request_deadline(frame.get("timeout_ms"))):
+            if action == "batch":
+                batch = BatchActionsRequest(**params)
+                result = await idempotency_cache.run(key, lambda started: schedule(
+                    "batch", started(lambda: execute_batch(batch)), frame.get("priority")
+                ))
+                result = result.model_dump()
+            else:
+                result = await idempotency_cache.run(key, lambda started: schedule(
+                    action, started(lambda: execute_action(action, params)), frame.get("priority")
+                ))
+        status_code = 200
+    except TimeoutError:
+        status_code = 504
+        result = {"error": "Request deadline exceeded", "output": None}
+    except HTTPException as e:
+        status_code = e.status_code
+        result = {"error": e.detail if isinstance(e.detail, str) else str(e.detail), "output": None}
+    except ValidationError as e:
+        status_code = 400
+        result = {"error": f"Invalid request: {e.errors()}", "output": None}
+    except Exception as e:
+        status_code = 500
+        result = {"error": str(e), "output": None}
+    response = BaseResponse(
+        ResponseMetadata=ResponseMetadataModel(RequestId=request_id, Action=action, Version=settings.version),
+        Result=result,
+    ).model_dump()
+    response["id"] = frame_id
+    response["Status"] = status_code
+    return response
+
+
 @router.post("/{action}")
 async def computer_action(
     action: str,
+    http_request: Request,
     request: Dict[str, Any] = Body(...)
 ):
     """
@@ -42,9 +245,14 @@ async def computer_action(
     - pressKey: Press keyboard key
     - typeText: Type text
     - wait: Wait for specified duration
+    - waitForScreenChange: Wait until the screen or a region changes
+    - waitUntilStable: Wait until the screen or a region stops changing
     - takeScreenshot: Take a screenshot
     - getCursorPosition: Get current cursor position
     - getScreenSize: Get screen size
+    - locateImage: Find a template image on the screen
+    - getPixels: Sample pixel colours
+    - waitForPixels: Wait until pixel colours match
     """
     request_id = get_request_id()
     version = settings.version
@@ -70,11 +278,115 @@ async def computer_action(
             Result={"Error": f"Invalid request: {str(e)}"},
         ).model_dump()
     
-    # Execute computer control action
+    # Execute computer control action, aborted if the client goes away or its deadline passes.
+    # A keyed action that already started runs to completion, a retry with the same key gets its result
+    key = idempotency_key(http_request.headers.get(IDEMPOTENCY_KEY_HEADER), action, request)
+    result = await run_cancellable(http_request, idempotency_cache.run(key, lambda started: schedule(
+        action, started(lambda: run_action(action, validated_request)), http_request.headers.get(PRIORITY_HEADER)
+    )))
+    return BaseResponse(ResponseMetadata=ResponseMetadataModel(RequestId=request_id, Action=action, Version=version), Result=result).model_dump()
+
+
+def idempotency_key(key, action: str, params: Dict[str, Any] = None):
+    """
+    Idempotency cache key of a request, None if the request carries no key
+    or is an observation that is safe to run again
+
+    Delta screenshots advance the session's reference frame, so they are keyed.
+    """
+    if not key:
+        return None
+    params = params if isinstance(params, dict) else {}
+    if action in READ_ACTIONS and not params.get("Delta", params.get("delta")):
+        return None
+    return str(key), action
+
+
+async def schedule(action: str, call, priority=None):
+    """
+    Run an action through the node's action scheduler
+
+    Raises:
+        HTTPException: 429 if the action's lane queue is full
+    """
+    try:
+        priority = int(priority) if priority is not None else 0
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid priority: {priority}")
+    try:
+        return await action_scheduler.run(action, call, priority)
+    except SchedulerFullError as e:
+        logger.warning("Rejected {}: {}", action, e)
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+def request_deadline(value) -> Optional[float]:
+    """Parse a client time budget in milliseconds, None if absent or invalid"""
+    try:
+        timeout_ms = float(value)
+    except (TypeError, ValueError):
+        return None
+    return timeout_ms / 1000 if timeout_ms > 0 else None
+
+
+async def run_cancellable(http_request: Request, awaitable):
+    """
+    Await an action, cancelling it when the HTTP client disconnects or the
+    deadline from the X-Request-Timeout-Ms header passes
+
+    Raises:
+        HTTPException: 499 if the client disconnected, 504 if the deadline passed
+    """
+    task = asyncio.ensure_future(awaitable)
+    disconnected = False
+
+    async def watch():
+        nonlocal disconnected
+        # The body is already read, the next ASGI message is the disconnect
+        while (await http_request.receive())["type"] != "http.disconnect":
+            pass
+        if not task.done():
+            disconnected = True
+            task.cancel()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        async with asyncio.timeout(request_deadline(http_request.headers.get(REQUEST_TIMEOUT_HEADER))):
+            return await task
+    except TimeoutError:
+        logger.warning("Request deadline passed, action cancelled")
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
+    except asyncio.CancelledError:
+        if not disconnected:
+            raise
+        logger.info("Client disconnected, action cancelled")
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        watcher.cancel()
+
+
+async def execute_action(action: str, params: Dict[str, Any]):
+    """
+    Validate and execute a single snake_case action
+
+    Raises:
+        HTTPException: If the action is unknown, the parameters are invalid or the action fails
+    """
+    if action not in REQUEST_MODELS:
+        raise HTTPException(status_code=404, detail=f"Action '{action}' not found")
+    try:
+        validated_request = REQUEST_MODELS[action](**params)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request: {e.errors()}")
+    return await run_action(action, validated_request)
+
+
+async def run_action(action: str, validated_request):
+    """Execute a validated action and convert the result to a plain value"""
     result = await action_route(computer_tool, action, validated_request)
     if hasattr(result, 'model_dump'):
-        return BaseResponse(ResponseMetadata=ResponseMetadataModel(RequestId=request_id, Action=action, Version=version), Result=result.model_dump()).model_dump()
-    return BaseResponse(ResponseMetadata=ResponseMetadataModel(RequestId=request_id, Action=action, Version=version), Result=result).model_dump()
+        return result.model_dump()
+    return result
 
 
 async def action_route(obj: IComputerTool, action: str, params):
@@ -96,6 +408,19 @@ async def action_route(obj: IComputerTool, action: str, params):
         raise HTTPException(status_code=400, detail=f"Invalid request: {str(e)}")
 
 
+@router.get("/metrics")
+async def scheduler_metrics():
+    """Action scheduler lanes (queue depth, running, rejections, wait times), screenshot sharing, observation cache, frame grabber, template cache and idempotency cache"""
+    return {
+        **action_scheduler.metrics(),
+        "screenshots": screenshot_flights.metrics(),
+        "observations": observation_cache.metrics(),
+        "frames": frame_grabber.metrics(),
+        "templates": template_cache.metrics(),
+        "idempotency": idempotency_cache.metrics(),
+    }
+
+
 @router.get("/actions")
 async def list_actions():
     """List all available computer control actions"""
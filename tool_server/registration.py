@@ -0,0 +1,59 @@
+"""Self-registration of this tool server with the MCP gateway"""
+import asyncio
+import socket
+from typing import Dict
+import httpx
+from core.config import settings
+from core.logger import logger
+
+
+def _headers() -> Dict[str, str]:
+    if settings.api_key_enabled and settings.api_key:
+        return {"X-API-Key": settings.api_key}
+    return {}
+
+
+def node_name() -> str:
+    return settings.node_name or socket.gethostname()
+
+
+def node_registration() -> Dict:
+    """Registration body sent to the gateway"""
+    return {
+        "Name": node_name(),
+        "Endpoint": settings.node_endpoint or f"http://{socket.gethostname()}:{settings.port}",
+        "Labels": settings.node_labels,
+    }
+
+
+async def register_node():
+    """
+    Register with the gateway at settings.gateway_url
+
+    The gateway may start after the tool server, failed attempts are retried
+    every settings.node_heartbeat_interval seconds until one succeeds.
+    """
+    url = f"{settings.gateway_url.rstrip('/')}/nodes"
+    registration = node_registration()
+    async with httpx.AsyncClient(timeout=settings.http_connect_timeout) as client:
+        while True:
+            try:
+                response = await client.post(url, json=registration, headers=_headers())
+                response.raise_for_status()
+                logger.info("Registered as node {} with the gateway {}", registration["Name"], settings.gateway_url)
+                return
+            except Exception as e:
+                logger.warning("Registering with the gateway {} failed: {}", settings.gateway_url, e)
+            await asyncio.sleep(settings.node_heartbeat_interval)
+
+
+async def deregister_node():
+    """Remove this tool server from the gateway, failures are only logged"""
+    url = f"{settings.gateway_url.rstrip('/')}/nodes/{node_name()}"
+    try:
+        async with httpx.AsyncClient(timeout=settings.http_connect_timeout) as client:
+            response = await client.delete(url, headers=_headers())
+            if response.status_code != 404:
+                response.raise_for_status()
+    except Exception as e:
+        logger.warning("Deregistering from the gateway {} failed: {}", settings.gateway_url, e)